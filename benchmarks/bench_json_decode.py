@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+JSON解析微基准：比较 response.json() 完整解析 + normalize_weibo
+与 fast_json 解析 + 字段投影 + normalize_weibo 的单条微博耗时和常驻内存
+
+用法:
+    python benchmarks/bench_json_decode.py [--posts 2000] [--repeat 5]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fast_json  # noqa: E402
+from weibo_engine import normalize_weibo  # noqa: E402
+
+
+def make_payload(index):
+    """构造与 statuses/show 结构相近的响应（完整用户对象、page_info、转发等）"""
+    user = {f"field_{i}": f"value_{i}_{index}" for i in range(60)}
+    user.update({"id": 1000 + index, "screen_name": f"用户{index}", "description": "简介" * 40})
+    return json.dumps({
+        "id": 5000000000000000 + index,
+        "mblogid": f"Mb{index}",
+        "created_at": "Sat Oct 18 12:00:00 +0800 2025",
+        "text_raw": "微博正文内容 #话题# " * 20,
+        "text": "<a href='https://weibo.com'>微博正文内容</a> " * 20,
+        "reposts_count": index, "comments_count": index * 2, "attitudes_count": index * 3,
+        "source": "iPhone客户端",
+        "pic_ids": [f"pic{index}_{i}" for i in range(9)],
+        "pic_infos": {f"pic{index}_{i}": {"thumbnail": {"url": "u" * 80, "width": 180, "height": 180},
+                                          "large": {"url": "u" * 80, "width": 2048, "height": 2048}}
+                      for i in range(9)},
+        "user": user,
+        "page_info": {
+            "type": "video", "page_pic": {"url": "https://example.com/cover.jpg"},
+            "media_info": {"mp4_720p_mp4": "https://example.com/v720.mp4", "mp4_hd_url": "https://example.com/vhd.mp4",
+                           "duration": 60, "big_pic_info": {"pic_big": {"url": "x" * 100}},
+                           "playback_list": [{"meta": {"quality_label": str(i)}, "play_info": {"url": "p" * 100}}
+                                             for i in range(6)]},
+        },
+        "retweeted_status": {"id": 1, "text_raw": "被转发微博 " * 30, "user": dict(user)},
+        "annotations": [{"mapi_request": True}] * 3,
+        "comment_manage_info": {"comment_permission_type": -1, "approval_comment_type": 0},
+    }, ensure_ascii=False).encode("utf-8")
+
+
+def run_full(payloads):
+    return [normalize_weibo(json.loads(payload), "u") for payload in payloads]
+
+
+def run_projected(payloads):
+    return [normalize_weibo(fast_json.parse_weibo(payload), "u") for payload in payloads]
+
+
+def keep_full(payloads):
+    return [json.loads(payload) for payload in payloads]
+
+
+def keep_projected(payloads):
+    return [fast_json.parse_weibo(payload) for payload in payloads]
+
+
+def best_time(func, payloads, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(payloads)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def retained_bytes(func, payloads):
+    """解析结果在内存中常驻的大小（时间线上的微博在整页处理完之前都不会释放）"""
+    tracemalloc.start()
+    kept = func(payloads)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON解析与字段投影的微基准")
+    parser.add_argument("--posts", type=int, default=2000, help="微博条数（默认：2000）")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数，取最快一次（默认：5）")
+    args = parser.parse_args()
+
+    payloads = [make_payload(i) for i in range(args.posts)]
+    avg_size = sum(len(p) for p in payloads) / len(payloads)
+    print(f"JSON后端: {fast_json.BACKEND}，{args.posts} 条微博，平均响应 {avg_size / 1024:.1f} KB")
+
+    assert run_full(payloads[:50]) == run_projected(payloads[:50]), "投影前后生成的记录不一致"
+
+    full = best_time(run_full, payloads, args.repeat)
+    projected = best_time(run_projected, payloads, args.repeat)
+    print(f"json.loads + normalize:       {full / args.posts * 1e6:8.1f} µs/条")
+    print(f"fast_json 投影 + normalize:    {projected / args.posts * 1e6:8.1f} µs/条"
+          f"  （节省 {(1 - projected / full) * 100:.0f}%）")
+
+    full_mem = retained_bytes(keep_full, payloads)
+    projected_mem = retained_bytes(keep_projected, payloads)
+    print(f"常驻内存: 完整对象 {full_mem / args.posts / 1024:.1f} KB/条，"
+          f"投影后 {projected_mem / args.posts / 1024:.1f} KB/条")
+
+
+if __name__ == "__main__":
+    main()
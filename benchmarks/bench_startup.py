@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+MLAnalyzer 冷启动基准：在新的 Python 进程中测量导入 ml_analyzer 和构造 MLAnalyzer 的耗时，
+与构造时立即导入 sklearn/xgboost、重写并加载自定义词典、创建 XGBoost 模型的做法（此前的构造方式）对比。
+每种方式先运行一次生成词典和缓存文件，之后的各次取中位数；另外给出第一次提取关键词的耗时
+（延迟加载时同一文本已在分词缓存的持久层中，只需加载 IDF 词表，不必加载分词词典）。
+
+用法:
+    python benchmarks/bench_startup.py [--repeat 5]
+"""
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LAZY = """
+import time
+start = time.perf_counter()
+from ml_analyzer import MLAnalyzer
+imported = time.perf_counter()
+analyzer = MLAnalyzer(model_dir=MODEL_DIR)
+constructed = time.perf_counter()
+analyzer.extract_keywords("今天的综艺节目里明星和导演聊起了新电影的票房")
+first = time.perf_counter()
+"""
+
+# 此前的构造方式：导入时加载全部依赖，构造时重写自定义词典、load_userdict 并创建 XGBoost 模型
+EAGER = """
+import time
+start = time.perf_counter()
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.cluster import KMeans
+import xgboost as xgb
+import jieba
+import jieba.analyse
+from ml_analyzer import MLAnalyzer, CUSTOM_WORDS
+imported = time.perf_counter()
+path = os.path.join(MODEL_DIR, "custom_dict.txt")
+with open(path, "w", encoding="utf-8") as f:
+    f.write("".join(f"{word} 5\\n" for word in CUSTOM_WORDS))
+jieba.load_userdict(path)
+model_path = os.path.join(MODEL_DIR, "xgboost_content_scorer.model")
+try:
+    if os.path.exists(model_path):
+        xgb.Booster(model_file=model_path)
+    else:
+        xgb.Booster({"objective": "reg:squarederror"}).save_model(model_path)
+except Exception:
+    pass
+TfidfVectorizer(max_features=5000)
+constructed = time.perf_counter()
+jieba.analyse.extract_tags("今天的综艺节目里明星和导演聊起了新电影的票房", topK=10, withWeight=True)
+first = time.perf_counter()
+"""
+
+REPORT = """
+print(json.dumps({"import": imported - start, "construct": constructed - imported, "first_keywords": first - constructed}))
+"""
+
+
+def run(code, model_dir):
+    script = f"import os, sys, json\nsys.path.insert(0, {ROOT!r})\nMODEL_DIR = {model_dir!r}\n" + code + REPORT
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, cwd=model_dir, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure(name, code, repeat):
+    with tempfile.TemporaryDirectory() as model_dir:
+        # 第一次运行生成词典、前缀词典缓存和模型文件
+        run(code, model_dir)
+        samples = [run(code, model_dir) for _ in range(repeat)]
+    result = {key: statistics.median(sample[key] for sample in samples) for key in samples[0]}
+    startup = result["import"] + result["construct"]
+    print(f"{name:<6} 导入 {result['import']:6.2f}s  构造 {result['construct']:6.2f}s  "
+          f"启动合计 {startup:6.2f}s  第一次提取关键词 {result['first_keywords']:6.2f}s")
+    return startup, startup + result["first_keywords"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MLAnalyzer 冷启动基准")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数，取中位数（默认：5）")
+    args = parser.parse_args()
+
+    eager, eager_total = measure("立即加载", EAGER, args.repeat)
+    lazy, lazy_total = measure("延迟加载", LAZY, args.repeat)
+    print(f"构造 MLAnalyzer 的启动时间减少 {(1 - lazy / eager) * 100:.0f}%；"
+          f"包含第一次提取关键词时减少 {(1 - lazy_total / eager_total) * 100:.0f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+分词基准：比较在当前进程中逐条分词与 ParallelTokenizer 多进程分词的耗时，并检查结果一致
+
+用法:
+    python benchmarks/bench_tokenize.py [--posts 50000] [--workers 4]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml_analyzer import CUSTOM_WORDS  # noqa: E402
+from token_cache import tokenize, build_dictionary, load_dictionary, ParallelTokenizer  # noqa: E402
+
+WORDS = ("今天 明星 综艺 电影 电视剧 演员 导演 歌手 音乐 演唱会 热搜 八卦 爆料 票房 网红 直播 短视频 剧情 粉丝 "
+         "大家 喜欢 支持 新歌 上线 好看 期待 官宣 人工智能 大数据 云计算 乡村振兴 碳中和 发布会 现场 采访").split()
+
+
+def make_posts(count, seed=0):
+    rng = random.Random(seed)
+    return ["".join(rng.choice(WORDS) for _ in range(rng.randint(10, 60))) + f" 第{i}条" for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多进程分词基准")
+    parser.add_argument("--posts", type=int, default=50000, help="微博条数（默认：50000）")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="进程数（默认：CPU 核数）")
+    args = parser.parse_args()
+
+    posts = make_posts(args.posts)
+    with tempfile.TemporaryDirectory() as tmp:
+        userdict = os.path.join(tmp, "custom_dict.txt")
+        with open(userdict, "w", encoding="utf-8") as f:
+            f.write("".join(f"{word} 5\n" for word in CUSTOM_WORDS))
+        dictionary = build_dictionary(userdict, tmp)
+        load_dictionary(dictionary)
+
+        start = time.perf_counter()
+        serial = tokenize(posts)
+        serial_time = time.perf_counter() - start
+        print(f"{args.posts} 条微博，单进程分词: {serial_time:.2f} 秒")
+
+        tokenizer = ParallelTokenizer(workers=args.workers, threshold=0, dictionary=dictionary)
+        # 第一次调用包含启动进程和加载词典的时间
+        start = time.perf_counter()
+        tokenizer(posts[:args.workers])
+        startup = time.perf_counter() - start
+        start = time.perf_counter()
+        parallel = tokenizer(posts)
+        parallel_time = time.perf_counter() - start
+        tokenizer.close()
+
+    assert parallel == serial, "多进程分词结果与单进程不一致"
+    print(f"{args.workers} 个进程分词: {parallel_time:.2f} 秒（加速 {serial_time / parallel_time:.1f}x），"
+          f"进程池启动 {startup:.2f} 秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+评论与转发抓取
+只对筛选后排名靠前的微博抓取评论和转发，按游标翻页，每条微博有抓取上限，
+结果逐条追加写入与结果文件同名的 JSONL 文件（以 weibo_id 关联）
+"""
+
+import os
+import json
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import fast_json
+
+COMMENTS_URL = ("https://weibo.com/ajax/statuses/buildComments?flow=0&is_reload=1&id={weibo_id}"
+                "&is_show_bulletin=2&is_mix=0&count={count}&max_id={cursor}")
+REPOSTS_URL = "https://weibo.com/ajax/statuses/repostTimeline?id={weibo_id}&page={page}&moduleID=feed&count={count}"
+
+
+def comments_file_for(result_file):
+    """根据结果文件路径生成对应的评论文件路径"""
+    return os.path.splitext(result_file)[0] + '_comments.jsonl'
+
+
+class CommentCrawler:
+    def __init__(self, spider, max_workers=4, per_post_budget=200, page_size=20, include_reposts=True):
+        """
+        初始化评论抓取器
+
+        参数:
+        - spider: 爬虫引擎实例，请求经由其传输层发出
+        - max_workers: 同时抓取的线程数
+        - per_post_budget: 每条微博评论、转发各自最多抓取的条数
+        - page_size: 每次请求的条数
+        - include_reposts: 是否同时抓取转发
+        """
+        self.spider = spider
+        self.max_workers = max(1, int(max_workers))
+        self.per_post_budget = per_post_budget
+        self.page_size = page_size
+        self.include_reposts = include_reposts
+        self._write_lock = threading.Lock()
+
+    def _get_json(self, url):
+        """请求接口并解析JSON，失败时返回 None"""
+        try:
+            response = self.spider.get(url, timeout=10)
+            if response.status_code != 200:
+                print(f"请求失败，状态码: {response.status_code}")
+                if response.status_code == 429:
+                    time.sleep(30)
+                return None
+            return fast_json.loads(response.content)
+        except Exception as e:
+            print(f"请求 {url} 时出错: {e}")
+            return None
+
+    def _to_record(self, weibo_id, thread_type, item):
+        """将接口返回的评论/转发转换为输出记录"""
+        user = item.get('user', {}) or {}
+        return {
+            'weibo_id': str(weibo_id),
+            'thread_type': thread_type,
+            'item_id': str(item.get('id', '')),
+            'user_id': str(user.get('id', '')),
+            'user_name': user.get('screen_name', ''),
+            'content': item.get('text_raw') or item.get('text', ''),
+            'created_at': item.get('created_at', ''),
+            'like_count': item.get('like_counts', item.get('attitudes_count', 0)),
+            'reply_count': item.get('total_number', item.get('comments_count', 0)),
+        }
+
+    def iter_comments(self, weibo_id):
+        """
+        按 max_id 游标逐页抓取一条微博的评论
+
+        参数:
+        - weibo_id: 微博ID
+
+        生成:
+        - 评论记录字典，数量不超过 per_post_budget
+        """
+        cursor = 0
+        fetched = 0
+        while fetched < self.per_post_budget:
+            data = self._get_json(COMMENTS_URL.format(weibo_id=weibo_id, count=self.page_size, cursor=cursor))
+            if not data:
+                break
+            items = data.get('data', []) or []
+            for item in items[:self.per_post_budget - fetched]:
+                fetched += 1
+                yield self._to_record(weibo_id, 'comment', item)
+            cursor = data.get('max_id', 0)
+            if not items or not cursor:
+                break
+            time.sleep(random.uniform(0.5, 1.5))
+
+    def iter_reposts(self, weibo_id):
+        """
+        逐页抓取一条微博的转发
+
+        参数:
+        - weibo_id: 微博ID
+
+        生成:
+        - 转发记录字典，数量不超过 per_post_budget
+        """
+        page = 1
+        fetched = 0
+        while fetched < self.per_post_budget:
+            data = self._get_json(REPOSTS_URL.format(weibo_id=weibo_id, page=page, count=self.page_size))
+            if not data:
+                break
+            items = data.get('data', []) or []
+            if isinstance(items, dict):
+                items = items.get('data', []) or []
+            for item in items[:self.per_post_budget - fetched]:
+                fetched += 1
+                yield self._to_record(weibo_id, 'repost', item)
+            max_page = data.get('max_page', 0) or 0
+            if not items or (max_page and page >= max_page):
+                break
+            page += 1
+            time.sleep(random.uniform(0.5, 1.5))
+
+    def _crawl_thread(self, iterator, out):
+        """抓取单条微博的一类讨论并逐条写出，返回写出的条数"""
+        count = 0
+        for record in iterator:
+            line = json.dumps(record, ensure_ascii=False)
+            with self._write_lock:
+                out.write(line + '\n')
+                out.flush()
+            count += 1
+        return count
+
+    def crawl(self, weibos, output_file, top_k=10):
+        """
+        抓取排名前 top_k 的微博的评论和转发
+
+        参数:
+        - weibos: 已按排名排序的微博列表
+        - output_file: 输出的 JSONL 文件路径
+        - top_k: 抓取的微博数量
+
+        返回:
+        - 写出的记录总数
+        """
+        weibo_ids = []
+        for weibo in weibos:
+            weibo_id = str(weibo.get('weibo_id', '') or '')
+            if weibo_id and weibo_id not in weibo_ids:
+                weibo_ids.append(weibo_id)
+            if len(weibo_ids) >= top_k:
+                break
+        if not weibo_ids:
+            return 0
+
+        print(f"开始抓取 {len(weibo_ids)} 条微博的评论{'和转发' if self.include_reposts else ''}...")
+        os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+        total = 0
+        with open(output_file, 'a', encoding='utf-8') as out:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = []
+                for weibo_id in weibo_ids:
+                    futures.append(executor.submit(self._crawl_thread, self.iter_comments(weibo_id), out))
+                    if self.include_reposts:
+                        futures.append(executor.submit(self._crawl_thread, self.iter_reposts(weibo_id), out))
+                for future in futures:
+                    try:
+                        total += future.result()
+                    except Exception as e:
+                        print(f"抓取评论时出错: {e}")
+
+        print(f"评论抓取完成，共写入 {total} 条记录到 {output_file}")
+        return total
+
+    def start(self, weibos, output_file, top_k=10):
+        """
+        在后台线程中抓取评论，调用方无需等待即可继续后续分析
+
+        参数:
+        - weibos: 已按排名排序的微博列表
+        - output_file: 输出的 JSONL 文件路径
+        - top_k: 抓取的微博数量
+
+        返回:
+        - concurrent.futures.Future，结果为写出的记录总数
+        """
+        executor = ThreadPoolExecutor(max_workers=1)
+        future = executor.submit(self.crawl, list(weibos), output_file, top_k)
+        executor.shutdown(wait=False)
+        return future
@@ -3,6 +3,7 @@
 
 import argparse
 from fetch import WeiboSpider
+from weibo_record import records_to_dicts
 import json
 import os
 
@@ -104,7 +105,7 @@ def main():
             output_file = os.path.join('results', f"user_{user_id}_all_keywords.json")
             try:
                 with open(output_file, 'w', encoding='utf-8') as f:
-                    json.dump(all_results, f, ensure_ascii=False, indent=2)
+                    json.dump({kw: records_to_dicts(items) for kw, items in all_results.items()}, f, ensure_ascii=False, indent=2)
                 print(f"\n已保存所有结果到: {output_file}")
             except Exception as e:
                 print(f"保存结果失败: {str(e)}")
@@ -12,6 +12,10 @@ from datetime import datetime
 from PIL import Image
 import hashlib
 import urllib.parse
+from result_store import load_latest
+
+# 图片索引从结果存储中读取的列
+INDEX_COLUMNS = ['keyword', 'weibo_id', 'content', 'user_name', 'likes', 'comments', 'forwards']
 
 def get_image_info(image_path):
     """获取图片的详细信息"""
@@ -46,17 +50,19 @@ def create_image_index():
         print("媒体目录不存在")
         return
         
-    # 读取最新的汇总结果
-    result_files = [f for f in os.listdir(results_dir) if f.startswith('all_results_') and f.endswith('.csv')]
-    if not result_files:
-        print("未找到结果文件")
-        return
-        
-    latest_result = sorted(result_files)[-1]
-    result_path = os.path.join(results_dir, latest_result)
-    
-    print(f"读取结果文件: {result_path}")
-    df = pd.read_csv(result_path)
+    # 读取最新的汇总结果，优先从列式结果存储中只读索引用到的列
+    df = load_latest(columns=INDEX_COLUMNS, result_dir=results_dir)
+    if df is None:
+        result_files = [f for f in os.listdir(results_dir) if f.startswith('all_results_') and f.endswith('.csv')]
+        if not result_files:
+            print("未找到结果文件")
+            return
+
+        latest_result = sorted(result_files)[-1]
+        result_path = os.path.join(results_dir, latest_result)
+
+        print(f"读取结果文件: {result_path}")
+        df = pd.read_csv(result_path)
     
     # 创建图片索引
     image_index = {}
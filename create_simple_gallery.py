@@ -2,18 +2,23 @@
 # -*- coding: utf-8 -*-
 """
 简化版图片画廊生成器
-使用Base64编码直接嵌入图片来避免路径问题
+图片引用 results/thumbnails 中缓存的缩略图（相对路径、loading="lazy" 延迟加载、srcset 提供 1x/2x 两种尺寸），
+HTML 本身很小；需要单个文件即可查看时用 --inline 把缩略图以 Base64 内嵌
 """
 
 import os
 import json
 import pandas as pd
 from datetime import datetime
-from PIL import Image
-import base64
-import io
 import hashlib
 import requests
+from result_store import load_latest
+from thumbnails import make_thumbnail, make_variants, img_tag, data_uri, SRCSET_SIZES
+
+# 画廊从结果存储中读取的列
+GALLERY_COLUMNS = ['keyword', 'weibo_id', 'content', 'attitudes_count', 'video_url', 'video_cover', 'local_image_paths']
+# 每条微博在卡片中最多显示的图片数
+MAX_CARD_IMAGES = 3
 
 # Load cookies if available
 def load_cookies():
@@ -47,29 +52,32 @@ def get_image_hash(image_path):
         return None
 
 def image_to_base64(image_path, max_size=(400, 400)):
-    """将图片转换为Base64编码"""
-    try:
-        with Image.open(image_path) as img:
-            # 转换为RGB模式
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-            
-            # 调整图片大小
-            img.thumbnail(max_size, Image.Resampling.LANCZOS)
-            
-            # 保存到内存
-            buffer = io.BytesIO()
-            img.save(buffer, format='JPEG', quality=85, optimize=True)
-            buffer.seek(0)
-            
-            # 转换为Base64
-            image_data = buffer.getvalue()
-            base64_string = base64.b64encode(image_data).decode('utf-8')
-            
-            return f"data:image/jpeg;base64,{base64_string}"
-    except Exception as e:
-        print(f"转换图片失败 {image_path}: {e}")
+    """将图片转换为Base64编码（使用 thumbnails 的缓存缩略图）"""
+    thumbnail = make_thumbnail(image_path, size=max_size)
+    if thumbnail is None:
+        print(f"转换图片失败 {image_path}")
         return None
+    return data_uri(thumbnail)
+
+def parse_image_paths(value):
+    """
+    解析本地图片路径字段（列表、JSON 字符串或 | 分隔的字符串）
+
+    返回:
+    - 存在的本地图片路径列表
+    """
+    if isinstance(value, str):
+        value = value.strip()
+        if value.startswith('['):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                value = []
+        else:
+            value = value.split('|')
+    elif value is None or not hasattr(value, '__iter__'):
+        value = []
+    return [str(path) for path in value if path and os.path.isfile(str(path))]
 
 def has_video(row):
     """检查是否包含视频"""
@@ -79,8 +87,15 @@ def has_video(row):
     # 如果没有video_url列，假设所有条目都包含视频（因为已经过滤过了）
     return True
 
-def create_simple_gallery(keyword_videos=None, html_filename=None):
-    """创建简化版视频画廊"""
+def create_simple_gallery(keyword_videos=None, html_filename=None, inline_images=False):
+    """
+    创建简化版视频画廊
+
+    参数:
+    - keyword_videos: {关键词: [微博字典]}，为空时读取最新的结果；微博字典的 images 为本地图片路径列表
+    - html_filename: 输出的 HTML 路径
+    - inline_images: 为 True 时缩略图以 Base64 内嵌（单文件模式），否则引用缓存的缩略图文件
+    """
     try:
         if keyword_videos is None:
             # 查找最新的结果文件
@@ -89,24 +104,30 @@ def create_simple_gallery(keyword_videos=None, html_filename=None):
                 print("结果目录不存在")
                 return None
             
-            # 查找最新的汇总CSV文件
-            csv_files = [f for f in os.listdir(results_dir) if f.endswith(".csv")]
-            if not csv_files:
-                print("未找到结果文件")
-                return None
-            
-            # 选择最新的文件
-            latest_csv = max(csv_files, key=lambda x: os.path.getmtime(os.path.join(results_dir, x)))
-            csv_path = os.path.join(results_dir, latest_csv)
-            
-            print(f"读取结果文件: {csv_path}")
-            
-            # 读取CSV数据
-            try:
-                df = pd.read_csv(csv_path, encoding='utf-8-sig')
-            except:
-                df = pd.read_csv(csv_path, encoding='utf-8')
-            
+            # 优先读取列式结果存储，只读画廊用到的列
+            df = load_latest(columns=GALLERY_COLUMNS, result_dir=results_dir)
+            if df is not None:
+                df['keyword'] = df['keyword'].astype(str)
+                df = df.sort_values(by='attitudes_count', ascending=False)
+            else:
+                # 查找最新的汇总CSV文件
+                csv_files = [f for f in os.listdir(results_dir) if f.endswith(".csv")]
+                if not csv_files:
+                    print("未找到结果文件")
+                    return None
+
+                # 选择最新的文件
+                latest_csv = max(csv_files, key=lambda x: os.path.getmtime(os.path.join(results_dir, x)))
+                csv_path = os.path.join(results_dir, latest_csv)
+
+                print(f"读取结果文件: {csv_path}")
+
+                # 读取CSV数据
+                try:
+                    df = pd.read_csv(csv_path, encoding='utf-8-sig')
+                except:
+                    df = pd.read_csv(csv_path, encoding='utf-8')
+
             if df.empty:
                 print("CSV文件为空")
                 return None
@@ -151,7 +172,8 @@ def create_simple_gallery(keyword_videos=None, html_filename=None):
                     videos.append({
                         'content': content,
                         'video_url': video_url,
-                        'weibo_id': weibo_id
+                        'weibo_id': weibo_id,
+                        'images': parse_image_paths(row.get('local_image_paths'))[:MAX_CARD_IMAGES]
                     })
                 
                 if videos:  # 只添加有内容的关键词
@@ -166,6 +188,11 @@ def create_simple_gallery(keyword_videos=None, html_filename=None):
         # 确保输出目录存在
         os.makedirs(os.path.dirname(html_filename), exist_ok=True)
         
+        # 所有卡片的缩略图一次批量生成（已缓存的直接使用）；单文件模式只需要 1x 尺寸
+        html_dir = os.path.dirname(html_filename)
+        image_paths = [path for videos in keyword_videos.values() for video in videos for path in video.get('images', [])]
+        variants = make_variants(image_paths, sizes=SRCSET_SIZES[:1] if inline_images else SRCSET_SIZES)
+        
         # 统计视频数量
         total_videos = sum(len(videos) for videos in keyword_videos.values())
         unique_videos = len(set(video['video_url'] for videos in keyword_videos.values() for video in videos))
@@ -282,6 +309,19 @@ def create_simple_gallery(keyword_videos=None, html_filename=None):
             box-shadow: 0 20px 40px rgba(0,0,0,0.15);
         }}
         
+        .card-images {{
+            display: flex;
+            gap: 4px;
+            background: #f0f0f0;
+        }}
+        
+        .card-images .thumb {{
+            flex: 1;
+            min-width: 0;
+            height: 180px;
+            object-fit: cover;
+        }}
+        
         .video-content-wrapper {{
             flex: 1;
             padding: 20px;
@@ -392,8 +432,13 @@ def create_simple_gallery(keyword_videos=None, html_filename=None):
 """
             
             for video_data in videos:
+                images = ''.join(img_tag(variants[path], html_dir, alt=keyword, inline=inline_images)
+                                 for path in video_data.get('images', []) if path in variants)
+                if images:
+                    images = f'<div class="card-images">{images}</div>'
                 html_content += f"""
                     <div class="video-card" onclick="window.open('{video_data['video_url']}', '_blank')">
+                        {images}
                         <div class="video-content-wrapper">
                             <div class="video-content">{video_data['content']}</div>
                             <div class="video-play-button">
@@ -438,4 +483,9 @@ def create_simple_gallery(keyword_videos=None, html_filename=None):
         return None
 
 if __name__ == "__main__":
-    create_simple_gallery() 
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser(description='根据最新的爬取结果生成微博画廊')
+    parser.add_argument('--inline', action='store_true', help='单文件模式：缩略图以 Base64 内嵌到 HTML 中')
+    parser.add_argument('--output', help='输出的 HTML 路径')
+    args = parser.parse_args()
+    create_simple_gallery(html_filename=args.output, inline_images=args.inline) 
\ No newline at end of file
@@ -0,0 +1,263 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+互动数时间序列（SQLite，只追加）
+每次爬取把每条微博的 (点赞, 评论, 转发) 快照追加到 snapshots 表。快照以整数编号代替 weibo_id，
+互动数只存与上一次快照的差值：SQLite 按数值大小变长存储整数，差值通常只占 1～2 字节，
+每条快照约 15 字节，数百万条快照也只有几十MB。posts 表保存每条微博的最新值，用于计算下一次的差值。
+首次记录且已知发布时间的微博会补一条发布时刻为 0 的起点快照，因此只爬到一次的微博也能算出速度。
+velocity 按最近的快照计算每小时的增长速度和加速度，供排序和分析使用。
+"""
+
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+DEFAULT_SERIES_PATH = os.path.join("results", "engagement.db")
+METRICS = ('attitudes_count', 'comments_count', 'reposts_count')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    post INTEGER PRIMARY KEY,
+    weibo_id TEXT UNIQUE NOT NULL,
+    last_ts INTEGER,
+    likes INTEGER,
+    comments INTEGER,
+    reposts INTEGER
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    post INTEGER NOT NULL,
+    ts INTEGER NOT NULL,
+    d_likes INTEGER,
+    d_comments INTEGER,
+    d_reposts INTEGER,
+    PRIMARY KEY (post, ts)
+) WITHOUT ROWID;
+"""
+
+# 按快照顺序还原绝对值，再取每条微博最近的三次快照
+RECENT_SQL = """
+SELECT weibo_id, ts, likes, comments, reposts, n FROM (
+    SELECT p.weibo_id, s.ts,
+           SUM(s.d_likes) OVER w AS likes,
+           SUM(s.d_comments) OVER w AS comments,
+           SUM(s.d_reposts) OVER w AS reposts,
+           ROW_NUMBER() OVER (PARTITION BY s.post ORDER BY s.ts DESC) AS n
+    FROM snapshots s JOIN posts p ON p.post = s.post
+    {where}
+    WINDOW w AS (PARTITION BY s.post ORDER BY s.ts)
+) WHERE n <= 3
+"""
+
+
+def _count(value):
+    if type(value) is int:
+        return value
+    try:
+        if value is None or pd.isna(value):
+            return 0
+    except (TypeError, ValueError):
+        pass
+    try:
+        return int(float(str(value).replace(',', '')))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _rate(new, old, hours):
+    return (new - old) / hours if hours > 0 else 0.0
+
+
+class EngagementSeries:
+    """微博互动数时间序列"""
+
+    def __init__(self, path=DEFAULT_SERIES_PATH):
+        """
+        打开（必要时创建）时间序列库
+
+        参数:
+        - path: 数据库文件路径
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _fill_wanted(self, weibo_ids):
+        # 通过临时表按 weibo_id 过滤，避免超出 SQL 参数个数上限
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS wanted (weibo_id TEXT PRIMARY KEY)")
+        self.conn.execute("DELETE FROM wanted")
+        self.conn.executemany("INSERT OR IGNORE INTO wanted VALUES (?)", ((weibo_id,) for weibo_id in weibo_ids))
+
+    def record(self, weibos, ts=None, parse_time=None):
+        """
+        追加一次爬取的互动数快照
+
+        参数:
+        - weibos: 微博字典/记录列表，或结果 DataFrame
+        - ts: 快照时间（datetime），默认为当前时间
+        - parse_time: 可选，把 publish_time 解析为 datetime 的函数，用于首次记录时补发布时刻的起点快照
+
+        返回:
+        - 追加的快照数
+        """
+        if isinstance(weibos, pd.DataFrame):
+            weibos = weibos.to_dict('records')
+        ts = int((ts or datetime.now()).timestamp())
+
+        # 同一次爬取中重复出现的微博（如被多个关键词爬到）只记一次
+        current = {}
+        for weibo in weibos:
+            weibo_id = weibo.get('weibo_id')
+            if weibo_id and str(weibo_id) not in current:
+                current[str(weibo_id)] = weibo
+
+        snapshots = []
+        with self._lock, self.conn:
+            heads = {}
+            self._fill_wanted(current)
+            for post, weibo_id, last_ts, likes, comments, reposts in self.conn.execute(
+                    "SELECT post, weibo_id, last_ts, likes, comments, reposts FROM posts "
+                    "WHERE weibo_id IN (SELECT weibo_id FROM wanted)"):
+                heads[weibo_id] = (post, last_ts, (likes, comments, reposts))
+
+            updates = []
+            for weibo_id, weibo in current.items():
+                counts = tuple(_count(weibo.get(metric)) for metric in METRICS)
+                head = heads.get(weibo_id)
+                if head is None:
+                    post = self.conn.execute(
+                        "INSERT INTO posts (weibo_id, last_ts, likes, comments, reposts) VALUES (?, ?, 0, 0, 0)",
+                        (weibo_id, ts)).lastrowid
+                    last_ts, last = None, (0, 0, 0)
+                    published = parse_time(weibo.get('publish_time', '')) if parse_time else None
+                    if published is not None and int(published.timestamp()) < ts:
+                        snapshots.append((post, int(published.timestamp()), 0, 0, 0))
+                else:
+                    post, last_ts, last = head
+                if last_ts is not None and ts <= last_ts:
+                    continue
+                snapshots.append((post, ts) + tuple(new - old for new, old in zip(counts, last)))
+                updates.append((ts,) + counts + (post,))
+
+            self.conn.executemany(
+                "INSERT INTO snapshots (post, ts, d_likes, d_comments, d_reposts) VALUES (?, ?, ?, ?, ?)", snapshots)
+            self.conn.executemany(
+                "UPDATE posts SET last_ts = ?, likes = ?, comments = ?, reposts = ? WHERE post = ?", updates)
+        return len(snapshots)
+
+    def velocity(self, weibo_ids=None):
+        """
+        计算每条微博最近的增长速度和加速度
+
+        参数:
+        - weibo_ids: 只计算这些微博，为空时计算全部
+
+        返回:
+        - DataFrame，列为 weibo_id、snapshots（参与计算的快照数，最多3）、velocity（点赞/小时）、
+          acceleration（点赞/小时²）、comment_velocity、repost_velocity；只有一次快照的微博速度为 0
+        """
+        where = ""
+        if weibo_ids is not None:
+            weibo_ids = [str(weibo_id) for weibo_id in weibo_ids]
+            if not weibo_ids:
+                return pd.DataFrame(columns=['weibo_id', 'snapshots', 'velocity', 'acceleration',
+                                             'comment_velocity', 'repost_velocity'])
+            with self._lock:
+                self._fill_wanted(weibo_ids)
+            where = "WHERE p.weibo_id IN (SELECT weibo_id FROM wanted)"
+
+        with self._lock:
+            rows = self.conn.execute(RECENT_SQL.format(where=where)).fetchall()
+
+        recent = {}
+        for weibo_id, ts, likes, comments, reposts, n in rows:
+            recent.setdefault(weibo_id, [None, None, None])[n - 1] = (ts, likes, comments, reposts)
+
+        result = []
+        for weibo_id, (latest, previous, earliest) in recent.items():
+            velocity = acceleration = comment_velocity = repost_velocity = 0.0
+            count = sum(1 for snapshot in (latest, previous, earliest) if snapshot is not None)
+            if previous is not None:
+                hours = (latest[0] - previous[0]) / 3600
+                velocity = _rate(latest[1], previous[1], hours)
+                comment_velocity = _rate(latest[2], previous[2], hours)
+                repost_velocity = _rate(latest[3], previous[3], hours)
+                if earliest is not None:
+                    earlier_velocity = _rate(previous[1], earliest[1], (previous[0] - earliest[0]) / 3600)
+                    # 两段速度的差除以两段中点之间的时间
+                    span = (latest[0] - earliest[0]) / 7200
+                    acceleration = _rate(velocity, earlier_velocity, span)
+            result.append({
+                'weibo_id': weibo_id,
+                'snapshots': count,
+                'velocity': velocity,
+                'acceleration': acceleration,
+                'comment_velocity': comment_velocity,
+                'repost_velocity': repost_velocity,
+            })
+        return pd.DataFrame(result, columns=['weibo_id', 'snapshots', 'velocity', 'acceleration',
+                                             'comment_velocity', 'repost_velocity'])
+
+    def stats(self):
+        """返回 (微博数, 快照数)"""
+        with self._lock:
+            posts = self.conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+            snapshots = self.conn.execute("SELECT COUNT(*) FROM snapshots").fetchone()[0]
+        return posts, snapshots
+
+
+def open_series(path=DEFAULT_SERIES_PATH, create=False):
+    """
+    打开互动数时间序列库
+
+    参数:
+    - path: 数据库文件路径
+    - create: 文件不存在时是否创建
+
+    返回:
+    - EngagementSeries，文件不存在且不创建时返回 None
+    """
+    if not path or (not create and not os.path.exists(path)):
+        return None
+    try:
+        return EngagementSeries(path)
+    except sqlite3.Error as e:
+        print(f"打开互动数时间序列失败: {e}")
+        return None
+
+
+def add_velocity(df, series):
+    """
+    为结果 DataFrame 补充 velocity / acceleration 列（没有快照的微博为 0）
+
+    参数:
+    - df: 含 weibo_id 列的 DataFrame
+    - series: EngagementSeries
+
+    返回:
+    - 新的 DataFrame
+    """
+    stats = series.velocity(df['weibo_id'].astype(str).unique())
+    df = df.drop(columns=[c for c in ('velocity', 'acceleration') if c in df.columns])
+    merged = df.assign(_weibo_key=df['weibo_id'].astype(str)).merge(
+        stats[['weibo_id', 'velocity', 'acceleration']].rename(columns={'weibo_id': '_weibo_key'}),
+        on='_weibo_key', how='left').drop(columns=['_weibo_key'])
+    merged.index = df.index
+    merged[['velocity', 'acceleration']] = merged[['velocity', 'acceleration']].fillna(0.0)
+    return merged
@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+受内存预算限制的排序
+ExternalSorter 在缓冲的记录超过内存预算时，把已排好序的一段写入临时文件，最后用 heapq.merge 归并各段；
+只需要前 N 条时改用 TopK，缓冲超过 2N 条就用 heapq.nsmallest 裁剪回 N 条。
+两种方式与在内存中排序的结果完全一致：键相同的记录保持输入顺序。
+"""
+
+import os
+import sys
+import heapq
+import pickle
+import tempfile
+from itertools import count
+
+DEFAULT_MEMORY_BUDGET_MB = 256
+
+
+def _number(value):
+    """把互动数等字段转换为数值，无法转换时按 0 处理"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return number if number == number else 0.0
+
+
+def final_order_key(row):
+    """
+    汇总结果的排序键：show 类别优先，然后按点赞数降序
+
+    参数:
+    - row: 含 type（或 is_show）和 attitudes_count 的记录
+
+    返回:
+    - 升序排列即为目标顺序的元组
+    """
+    is_show = row['is_show'] if 'is_show' in row else row.get('type') == 'show'
+    return (-int(bool(is_show)), -_number(row.get('attitudes_count')))
+
+
+def velocity_order_key(row):
+    """按点赞增长速度排序时的排序键：show 类别优先，然后按速度、点赞数降序"""
+    return final_order_key(row)[:1] + (-_number(row.get('velocity')), -_number(row.get('attitudes_count')))
+
+
+def _estimate_size(row):
+    return sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row.values())
+
+
+class ExternalSorter:
+    """外部归并排序"""
+
+    def __init__(self, key, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB, spill_dir=None):
+        """
+        参数:
+        - key: 排序键函数（升序）
+        - memory_budget_mb: 内存中缓冲的记录大小上限（MB），超过后写出一段
+        - spill_dir: 临时文件目录，默认为系统临时目录
+        """
+        self.key = key
+        self.budget = max(1, int(memory_budget_mb * 1024 * 1024))
+        self.spill_dir = spill_dir
+        self._buffer = []
+        self._buffer_size = 0
+        self._runs = []
+        self._seq = count()
+        self.count = 0
+
+    def add(self, rows):
+        """
+        加入一批记录
+
+        参数:
+        - rows: 字典的可迭代对象
+        """
+        for row in rows:
+            # 序号作为第二排序键，保证键相同的记录保持输入顺序
+            self._buffer.append((self.key(row), next(self._seq), row))
+            self._buffer_size += _estimate_size(row)
+            self.count += 1
+            if self._buffer_size >= self.budget:
+                self._spill()
+
+    def _spill(self):
+        if not self._buffer:
+            return
+        self._buffer.sort(key=lambda item: item[:2])
+        fd, path = tempfile.mkstemp(prefix='sort_run_', suffix='.pkl', dir=self.spill_dir)
+        with os.fdopen(fd, 'wb') as f:
+            for item in self._buffer:
+                pickle.dump(item, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self._runs.append(path)
+        self._buffer = []
+        self._buffer_size = 0
+
+    @staticmethod
+    def _read_run(path):
+        with open(path, 'rb') as f:
+            while True:
+                try:
+                    yield pickle.load(f)
+                except EOFError:
+                    return
+
+    def __iter__(self):
+        """按顺序生成全部记录；生成结束后临时文件会被删除"""
+        try:
+            if not self._runs:
+                self._buffer.sort(key=lambda item: item[:2])
+                for item in self._buffer:
+                    yield item[2]
+                return
+            self._spill()
+            for item in heapq.merge(*(self._read_run(path) for path in self._runs), key=lambda item: item[:2]):
+                yield item[2]
+        finally:
+            self.close()
+
+    @property
+    def spilled_runs(self):
+        return len(self._runs)
+
+    def close(self):
+        """删除临时文件"""
+        for path in self._runs:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._runs = []
+        self._buffer = []
+
+
+class TopK:
+    """只保留排序后前 k 条记录，接口与 ExternalSorter 相同"""
+
+    def __init__(self, key, k):
+        """
+        参数:
+        - key: 排序键函数（升序）
+        - k: 保留的记录数
+        """
+        self.key = key
+        self.k = max(0, int(k))
+        self._items = []
+        self._seq = count()
+        self.count = 0
+
+    def add(self, rows):
+        for row in rows:
+            self._items.append((self.key(row), next(self._seq), row))
+            self.count += 1
+            # 缓冲到 2k 条时裁剪回 k 条，内存始终为 O(k)
+            if len(self._items) >= 2 * self.k + 1:
+                self._trim()
+
+    def _trim(self):
+        self._items = heapq.nsmallest(self.k, self._items, key=lambda item: item[:2])
+
+    def __iter__(self):
+        self._trim()
+        for item in self._items:
+            yield item[2]
+
+    def close(self):
+        self._items = []
+
+
+def create_sorter(key, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB, limit=None, spill_dir=None):
+    """
+    创建排序器：limit 为空时为外部归并排序，否则为前 limit 条的堆选取
+
+    返回:
+    - 有 add(rows) 方法、迭代即按顺序生成记录的排序器
+    """
+    if limit is not None:
+        return TopK(key, limit)
+    return ExternalSorter(key, memory_budget_mb=memory_budget_mb, spill_dir=spill_dir)
+
+
+def sorted_rows(rows, key, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB, limit=None, spill_dir=None):
+    """
+    在内存预算内排序
+
+    参数:
+    - rows: 字典的可迭代对象
+    - key: 排序键函数（升序）
+    - memory_budget_mb: 内存预算（MB）
+    - limit: 只需要前 limit 条时使用堆，只保留 limit 条记录
+    - spill_dir: 临时文件目录
+
+    返回:
+    - 按顺序排列的记录的可迭代对象
+    """
+    sorter = create_sorter(key, memory_budget_mb=memory_budget_mb, limit=limit, spill_dir=spill_dir)
+    sorter.add(rows)
+    return iter(sorter)
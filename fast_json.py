@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+接口响应的快速JSON解析与字段投影
+优先使用 simdjson（按需解析，只物化用到的字段），其次 orjson，都不可用时退回标准库 json。
+project_weibo 只取出生成结果记录需要的字段，不保留完整的用户对象、卡片信息等嵌套结构。
+"""
+
+import json
+import threading
+
+try:
+    import simdjson
+    BACKEND = 'simdjson'
+except ImportError:
+    simdjson = None
+    try:
+        import orjson
+        BACKEND = 'orjson'
+    except ImportError:
+        orjson = None
+        BACKEND = 'json'
+
+# 生成结果记录和长文本/数据源转换用到的微博字段
+WEIBO_FIELDS = (
+    'id', 'mblogid', 'created_at', 'text_raw', 'text', 'raw_text', 'isLongText', 'continue_tag',
+    'reposts_count', 'comments_count', 'attitudes_count', 'source', 'pic_ids',
+)
+USER_FIELDS = ('id', 'screen_name')
+PAGE_INFO_FIELDS = ('type', 'page_pic', 'play_url', 'media_url', 'url')
+MIX_MEDIA_DATA_FIELDS = ('play_url', 'media_url', 'url', 'cover_image_url', 'thumb_pic')
+VIDEO_URL_FIELDS = ('mp4_720p_mp4', 'mp4_hd_url', 'mp4_sd_url', 'stream_url')
+
+_local = threading.local()
+
+
+def _parser():
+    # simdjson 的解析器不能跨线程共用，且同一解析器再次解析会使上一份文档失效，
+    # 因此每个线程一个解析器，调用方需在下一次解析前完成投影
+    parser = getattr(_local, 'parser', None)
+    if parser is None:
+        parser = _local.parser = simdjson.Parser()
+    return parser
+
+
+def parse(data):
+    """
+    解析JSON，simdjson 可用时返回按需解析的文档对象，否则返回普通的 dict/list
+
+    参数:
+    - data: bytes 或 str
+
+    返回:
+    - 文档对象，只应通过 get / project_weibo 等函数读取
+
+    异常:
+    - ValueError: JSON格式错误（json.JSONDecodeError 也是 ValueError 的子类）
+    """
+    if simdjson is not None:
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        return _parser().parse(data)
+    return loads(data)
+
+
+def loads(data):
+    """
+    将JSON完整解析为 Python 对象
+
+    参数:
+    - data: bytes 或 str
+
+    返回:
+    - dict / list 等 Python 对象
+    """
+    if simdjson is not None:
+        return simdjson.loads(data)
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def to_python(value):
+    """把 simdjson 的对象/数组转换为 dict/list，其他值原样返回"""
+    if hasattr(value, 'as_dict'):
+        return value.as_dict()
+    if hasattr(value, 'as_list'):
+        return value.as_list()
+    return value
+
+
+def get(obj, key, default=None):
+    """从 dict 或 simdjson 对象中取值，obj 不是对象或没有该键时返回 default"""
+    if obj is None or not hasattr(obj, 'keys'):
+        return default
+    if key in obj:
+        value = obj[key]
+        return default if value is None else value
+    return default
+
+
+def _pick(obj, fields):
+    """只取出 fields 中存在的标量字段"""
+    picked = {}
+    for field in fields:
+        if field in obj:
+            picked[field] = to_python(obj[field])
+    return picked
+
+
+def _project_video_urls(obj):
+    urls = get(obj, 'urls')
+    media_info = get(obj, 'media_info')
+    projected = {}
+    if urls is not None:
+        projected['urls'] = _pick(urls, VIDEO_URL_FIELDS)
+    if media_info is not None:
+        projected['media_info'] = _pick(media_info, VIDEO_URL_FIELDS)
+    return projected
+
+
+def _project_page_info(page_info):
+    projected = _pick(page_info, PAGE_INFO_FIELDS)
+    projected.update(_project_video_urls(page_info))
+    return projected
+
+
+def project_weibo(obj):
+    """
+    从接口返回的微博（完整对象或 simdjson 文档）中只取出需要的字段
+
+    参数:
+    - obj: mymblog / container / statuses/show 格式的微博对象
+
+    返回:
+    - 精简后的微博字典，字段名与接口一致，可直接交给 normalize_weibo
+    """
+    weibo = _pick(obj, WEIBO_FIELDS)
+
+    user = get(obj, 'user')
+    if user is not None:
+        weibo['user'] = _pick(user, USER_FIELDS)
+
+    pics = get(obj, 'pics')
+    if pics is not None:
+        weibo['pics'] = [{'pid': get(pic, 'pid')} for pic in pics]
+
+    page_info = get(obj, 'page_info')
+    if page_info is not None:
+        weibo['page_info'] = _project_page_info(page_info)
+
+    mix_items = get(get(obj, 'mix_media_info'), 'items')
+    if mix_items is not None:
+        items = []
+        for item in mix_items:
+            data = get(item, 'data', {})
+            projected = _pick(data, MIX_MEDIA_DATA_FIELDS)
+            projected.update(_project_video_urls(data))
+            cover_url = get(get(data, 'cover_image'), 'url')
+            if cover_url:
+                projected['cover_image'] = {'url': cover_url}
+            items.append({'type': get(item, 'type'), 'data': projected})
+        weibo['mix_media_info'] = {'items': items}
+
+    retweeted_page_info = get(get(obj, 'retweeted_status'), 'page_info')
+    if retweeted_page_info is not None:
+        weibo['retweeted_status'] = {'page_info': _project_page_info(retweeted_page_info)}
+
+    return weibo
+
+
+def parse_weibo(data):
+    """
+    解析单条微博的响应（如 statuses/show）并投影为精简字典
+
+    参数:
+    - data: 响应内容 bytes 或 str
+
+    返回:
+    - 精简后的微博字典，响应为空对象时返回空字典
+    """
+    doc = parse(data)
+    if not hasattr(doc, 'keys'):
+        return {}
+    return project_weibo(doc)
@@ -3,9 +3,9 @@
 
 import json
 import time
-from datetime import datetime, timedelta
+from datetime import datetime
 from fetch import WeiboSpider
-import re
+from time_parser import parse_publish_times, within_recent_days
 
 def load_config():
     """加载配置文件"""
@@ -38,69 +38,12 @@ def save_results(results, filename_prefix="user_posts"):
         enable_filter = cfg.get('enable_time_filter', True)
         recent_days = int(cfg.get('filter_recent_calendar_days', 2)) if enable_filter else 0
 
-        def parse_weibo_time_for_results(time_str, now=None):
-            if now is None:
-                now = datetime.now()
-            s = str(time_str).strip()
-            if not s:
-                return None
-            # 英文格式: Thu Aug 07 16:59:47 +0800 2025
-            try:
-                dt_aware = datetime.strptime(s, '%a %b %d %H:%M:%S %z %Y')
-                local_tz = datetime.now().astimezone().tzinfo
-                dt_local = dt_aware.astimezone(local_tz)
-                return dt_local.replace(tzinfo=None)
-            except Exception:
-                pass
-            # 相对时间/中文格式（简化处理）
-            if '昨天' in s:
-                try:
-                    t = s.replace('昨天', '').strip()
-                    hhmm = datetime.strptime(t, '%H:%M')
-                    return now.replace(hour=hhmm.hour, minute=hhmm.minute, second=0, microsecond=0) - timedelta(days=1)
-                except Exception:
-                    return now - timedelta(days=1)
-            if '今天' in s:
-                try:
-                    t = s.replace('今天', '').strip()
-                    hhmm = datetime.strptime(t, '%H:%M')
-                    return now.replace(hour=hhmm.hour, minute=hhmm.minute, second=0, microsecond=0)
-                except Exception:
-                    return now
-            if '分钟前' in s:
-                try:
-                    minutes = int(re.sub(r'\D', '', s))
-                    return now - timedelta(minutes=minutes)
-                except Exception:
-                    return now
-            if '小时前' in s:
-                try:
-                    hours = int(re.sub(r'\D', '', s))
-                    return now - timedelta(hours=hours)
-                except Exception:
-                    return now
-            # 形如 2024-05-23 12:34
-            try:
-                return datetime.strptime(s, '%Y-%m-%d %H:%M')
-            except Exception:
-                pass
-            # 形如 05-23 12:34 （补年）
-            try:
-                return datetime.strptime(f"{now.year}-" + s, '%Y-%m-%d %H:%M')
-            except Exception:
-                pass
-            return None
-
-        def within_recent_days(dt_obj, now, days):
-            if dt_obj is None:
-                return False
-            start_date = (now.date() - timedelta(days=days - 1))
-            return start_date <= dt_obj.date() <= now.date()
-
         if enable_filter and recent_days > 0:
             now_dt = datetime.now()
             before_len = len(results)
-            results = [r for r in results if within_recent_days(parse_weibo_time_for_results(r.get('publish_time', ''), now=now_dt), now_dt, recent_days)]
+            published = parse_publish_times([r.get('publish_time', '') for r in results], now=now_dt)
+            recent = within_recent_days(published, now_dt, recent_days)
+            results = [r for r, keep in zip(results, recent) if keep]
             print(f"时间过滤（最近{recent_days}个自然日）后保留 {len(results)}/{before_len} 条")
 
         with open(filename, 'w', encoding='utf-8-sig', newline='') as f:
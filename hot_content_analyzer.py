@@ -8,6 +8,14 @@ import pandas as pd
 from datetime import datetime
 import glob
 from ml_analyzer import MLAnalyzer
+from weibo_record import records_from_dataframe, records_to_dataframe
+import result_store
+from result_db import open_db
+from engagement_series import open_series
+
+# 分析时从结果存储中读取的列
+ANALYSIS_COLUMNS = ['keyword', 'weibo_id', 'user_name', 'content', 'publish_time', 'reposts_count',
+                    'comments_count', 'attitudes_count', 'post_link', 'type']
 
 class HotContentAnalyzer:
     """热门内容和话题分析器"""
@@ -49,7 +57,7 @@ class HotContentAnalyzer:
                 df['post_link'] = df['weibo_id'].apply(lambda x: f"https://weibo.com/detail/{x}")
             
             print(f"已加载 {len(df)} 条微博数据，来自 {csv_file}")
-            return df.to_dict('records')
+            return records_from_dataframe(df)
         except Exception as e:
             print(f"加载数据文件 {csv_file} 时出错: {e}")
             return []
@@ -71,8 +79,9 @@ class HotContentAnalyzer:
             return []
         
         # 预处理数据
-        for item in weibo_data:
-            item['content'] = self.ml_analyzer.preprocess_text(item.get('content', ''))
+        contents = self.ml_analyzer.preprocess_texts([item.get('content', '') for item in weibo_data])
+        for item, content in zip(weibo_data, contents):
+            item['content'] = content
         
         # 使用机器学习分析器提取热门话题
         trending_topics = self.ml_analyzer.identify_trending_topics(weibo_data, top_n=top_n*2)
@@ -100,8 +109,10 @@ class HotContentAnalyzer:
             return []
         
         # 预处理数据并计算内容分数
-        for item in weibo_data:
-            item['content'] = self.ml_analyzer.preprocess_text(item.get('content', ''))
+        contents = self.ml_analyzer.preprocess_texts([item.get('content', '') for item in weibo_data])
+        self.ml_analyzer.token_cache.prefetch(contents)
+        for item, content in zip(weibo_data, contents):
+            item['content'] = content
             item['content_score'] = self.ml_analyzer.calculate_content_score(item)
         
         # 按内容分数过滤
@@ -113,6 +124,34 @@ class HotContentAnalyzer:
         # 取前top_n个
         return appealing_content[:top_n]
     
+    def find_rising_content(self, weibo_data, top_n=20):
+        """
+        按互动数时间序列找出点赞增长最快的内容
+
+        参数:
+        - weibo_data: 微博数据列表
+        - top_n: 返回的内容数量
+
+        返回:
+        - 按 velocity 降序的内容列表（附带 velocity、acceleration 字段），没有时间序列时返回空列表
+        """
+        series = open_series(os.path.join(self.result_dir, "engagement.db"))
+        if series is None or not weibo_data:
+            return []
+        with series:
+            stats = series.velocity([item.get('weibo_id') for item in weibo_data if item.get('weibo_id')])
+        by_id = {row.weibo_id: row for row in stats.itertuples(index=False) if row.velocity > 0}
+
+        rising = []
+        for item in weibo_data:
+            row = by_id.get(str(item.get('weibo_id')))
+            if row is not None:
+                item['velocity'] = row.velocity
+                item['acceleration'] = row.acceleration
+                rising.append(item)
+        rising.sort(key=lambda x: (x['velocity'], x['acceleration']), reverse=True)
+        return rising[:top_n]
+
     def cluster_by_topic(self, weibo_data, n_clusters=5):
         """
         按话题聚类微博内容
@@ -129,8 +168,9 @@ class HotContentAnalyzer:
             return {}
         
         # 预处理数据
-        for item in weibo_data:
-            item['content'] = self.ml_analyzer.preprocess_text(item.get('content', ''))
+        contents = self.ml_analyzer.preprocess_texts([item.get('content', '') for item in weibo_data])
+        for item, content in zip(weibo_data, contents):
+            item['content'] = content
         
         # 执行聚类
         cluster_labels, cluster_keywords = self.ml_analyzer.cluster_topics(weibo_data, n_clusters)
@@ -149,7 +189,7 @@ class HotContentAnalyzer:
     
     def analyze_all_results(self, keyword=None, latest_only=True):
         """
-        分析结果目录中的所有CSV文件
+        分析结果目录中的结果（依次尝试结果数据库、Parquet 结果存储和CSV文件）
         
         参数:
         - keyword: 特定关键词，如果提供则只分析该关键词的结果
@@ -158,6 +198,26 @@ class HotContentAnalyzer:
         返回:
         - 分析结果字典
         """
+        # 优先查询结果数据库：每条微博只有一行且互动数为最新值
+        result_db = open_db(os.path.join(self.result_dir, "weibo.db"))
+        if result_db is not None:
+            with result_db:
+                run_id = result_db.latest_run_id()
+                if run_id and run_id >= (result_store.latest_csv_run_id(self.result_dir) or ''):
+                    df = result_db.query_posts(columns=ANALYSIS_COLUMNS, keyword=keyword, latest_run=latest_only)
+                    if not df.empty:
+                        return self._analyze_data(records_from_dataframe(df))
+
+        # 其次读取列式结果存储：按列投影，关键词和批次条件下推到分区
+        store_dir = os.path.join(self.result_dir, "store")
+        if latest_only:
+            df = result_store.load_latest(columns=ANALYSIS_COLUMNS, keyword=keyword,
+                                          result_dir=self.result_dir, store_dir=store_dir)
+        else:
+            df = result_store.load_results(columns=ANALYSIS_COLUMNS, keyword=keyword, store_dir=store_dir)
+        if df is not None and not df.empty:
+            return self._analyze_data(records_from_dataframe(df))
+
         # 构建文件匹配模式
         if keyword:
             file_pattern = f"{self.result_dir}/{keyword}_*.csv"
@@ -189,6 +249,18 @@ class HotContentAnalyzer:
             data = self.load_csv_data(csv_file)
             all_data.extend(data)
         
+        return self._analyze_data(all_data)
+
+    def _analyze_data(self, all_data):
+        """
+        对已加载的微博数据执行热门话题、吸引力内容和话题聚类分析
+
+        参数:
+        - all_data: 微博记录列表
+
+        返回:
+        - 分析结果字典
+        """
         if not all_data:
             print("没有找到微博数据")
             return None
@@ -204,13 +276,17 @@ class HotContentAnalyzer:
         
         # 3. 按话题聚类
         topic_clusters = self.cluster_by_topic(all_data)
+
+        # 4. 找出互动增长最快的内容
+        rising_content = self.find_rising_content(all_data)
         
         # 构建分析结果
         result = {
             'total_weibos': len(all_data),
             'hot_topics': hot_topics,
             'appealing_content': appealing_content,
-            'topic_clusters': topic_clusters
+            'topic_clusters': topic_clusters,
+            'rising_content': rising_content
         }
         
         return result
@@ -238,15 +314,17 @@ class HotContentAnalyzer:
         # 创建可序列化的副本
         result_copy = result.copy()
         
-        # 处理appealing_content字段
-        if 'appealing_content' in result_copy:
+        # 处理appealing_content和rising_content字段
+        for field in ('appealing_content', 'rising_content'):
+            if field not in result_copy:
+                continue
             serializable_content = []
-            for item in result_copy['appealing_content']:
+            for item in result_copy[field]:
                 item_copy = {k: v for k, v in item.items() if k not in ['user_id', 'image_urls', 'local_image_paths']}
                 if 'post_link' not in item_copy and 'weibo_id' in item_copy:
                     item_copy['post_link'] = f"https://weibo.com/detail/{item_copy['weibo_id']}"
                 serializable_content.append(item_copy)
-            result_copy['appealing_content'] = serializable_content
+            result_copy[field] = serializable_content
         
         # 处理topic_clusters字段
         if 'topic_clusters' in result_copy:
@@ -328,6 +406,15 @@ class HotContentAnalyzer:
                     f.write(f"   互动数据: 转发 {content.get('forwards', 0)}, 评论 {content.get('comments', 0)}, 点赞 {content.get('likes', 0)}\n")
                     f.write(f"   链接: {content.get('post_link', '无')}\n")
                     f.write("\n")
+
+                if result.get('rising_content'):
+                    f.write("\n==== 互动增长最快的内容Top5 ====\n\n")
+                    for i, content in enumerate(result['rising_content'][:5], 1):
+                        f.write(f"{i}. 点赞增速: {content.get('velocity', 0):.1f}/小时, 加速度: {content.get('acceleration', 0):.1f}/小时²\n")
+                        text = str(content.get('content', '')).replace('\n', ' ')
+                        f.write(f"   内容: {text[:100]}{'...' if len(text) > 100 else ''}\n")
+                        f.write(f"   链接: {content.get('post_link', '无')}\n")
+                        f.write("\n")
             
             print(f"热门话题报告已生成: {output_file}")
             return output_file
@@ -357,7 +444,7 @@ class HotContentAnalyzer:
         
         try:
             # 转换为DataFrame
-            df = pd.DataFrame(result['appealing_content'])
+            df = records_to_dataframe(result['appealing_content'])
             
             # 导出到CSV
             df.to_csv(output_file, index=False, encoding='utf-8-sig')
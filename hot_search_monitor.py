@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+微博热搜榜监控
+定时拉取热搜榜，只保留与上一次快照的差异（新上榜、排名变化、下榜），
+把新上榜的词追加到关键词分类文件，并只针对这些新词触发爬取
+"""
+
+import os
+import json
+import time
+import argparse
+from datetime import datetime
+
+import fast_json
+from weibo_engine import WeiboEngine
+
+HOT_SEARCH_URL = "https://weibo.com/ajax/side/hotSearch"
+CLASSIFICATION_FILE = "keyword and classification.txt"
+
+
+class HotSearchMonitor:
+    def __init__(self, snapshot_file="results/hot_search_snapshot.json",
+                 diff_file="results/hot_search_diff.jsonl",
+                 classification_file=CLASSIFICATION_FILE, keyword_type="hot", engine=None):
+        """
+        初始化热搜监控器
+
+        参数:
+        - snapshot_file: 上一次热搜榜快照的保存路径
+        - diff_file: 差异记录（JSONL）的追加路径
+        - classification_file: 关键词分类文件
+        - keyword_type: 新词写入分类文件时使用的分类
+        - engine: 爬虫引擎，请求经由其传输层（连接池、限速）和 Cookie 发出；为空时按 config.json 创建
+        """
+        self.snapshot_file = snapshot_file
+        self.diff_file = diff_file
+        self.classification_file = classification_file
+        self.keyword_type = keyword_type
+        self.engine = engine or WeiboEngine()
+
+    def fetch_hot_list(self):
+        """
+        拉取当前热搜榜
+
+        返回:
+        - 热搜列表，每项包含 word、rank、num、label，失败时返回 None
+        """
+        try:
+            response = self.engine.get(HOT_SEARCH_URL, timeout=10)
+            if response.status_code != 200:
+                print(f"热搜榜请求失败，状态码: {response.status_code}")
+                return None
+            realtime = (fast_json.loads(response.content).get('data', {}) or {}).get('realtime', []) or []
+        except Exception as e:
+            print(f"拉取热搜榜时出错: {e}")
+            return None
+
+        hot_list = []
+        for item in realtime:
+            # 跳过广告位
+            if item.get('is_ad'):
+                continue
+            word = (item.get('word') or item.get('note') or '').strip()
+            if not word:
+                continue
+            hot_list.append({
+                'word': word,
+                'rank': len(hot_list) + 1,
+                'num': item.get('num', 0),
+                'label': item.get('label_name', ''),
+            })
+        return hot_list
+
+    def load_snapshot(self):
+        """读取上一次的热搜快照，返回 word -> 条目 的字典"""
+        if not os.path.exists(self.snapshot_file):
+            return {}
+        try:
+            with open(self.snapshot_file, 'r', encoding='utf-8') as f:
+                return {item['word']: item for item in json.load(f).get('items', [])}
+        except Exception as e:
+            print(f"读取热搜快照失败: {e}")
+            return {}
+
+    def save_snapshot(self, hot_list):
+        """保存当前热搜快照"""
+        os.makedirs(os.path.dirname(self.snapshot_file) or '.', exist_ok=True)
+        with open(self.snapshot_file, 'w', encoding='utf-8') as f:
+            json.dump({'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 'items': hot_list},
+                      f, ensure_ascii=False, indent=2)
+
+    @staticmethod
+    def diff(previous, hot_list):
+        """
+        计算两次热搜榜之间的差异
+
+        参数:
+        - previous: 上一次快照，word -> 条目
+        - hot_list: 本次热搜列表
+
+        返回:
+        - 差异字典，包含 new（新上榜）、rank_changes（排名变化）和 dropped（下榜）
+        """
+        current = {item['word']: item for item in hot_list}
+        new_items = [item for item in hot_list if item['word'] not in previous]
+        rank_changes = [
+            {'word': item['word'], 'old_rank': previous[item['word']]['rank'], 'new_rank': item['rank']}
+            for item in hot_list
+            if item['word'] in previous and previous[item['word']]['rank'] != item['rank']
+        ]
+        dropped = [word for word in previous if word not in current]
+        return {'new': new_items, 'rank_changes': rank_changes, 'dropped': dropped}
+
+    def append_diff(self, diff):
+        """把非空差异追加到差异记录文件"""
+        if not (diff['new'] or diff['rank_changes'] or diff['dropped']):
+            return
+        os.makedirs(os.path.dirname(self.diff_file) or '.', exist_ok=True)
+        record = {key: value for key, value in diff.items() if key != 'baseline'}
+        record['time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with open(self.diff_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def register_keywords(self, words):
+        """
+        把新词追加到关键词分类文件，已存在的关键词不会重复写入
+
+        参数:
+        - words: 关键词列表
+
+        返回:
+        - 实际新增的关键词列表
+        """
+        existing = set()
+        has_file = os.path.exists(self.classification_file)
+        if has_file:
+            with open(self.classification_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    existing.add(line.split(',', 1)[0].strip())
+
+        added = []
+        for word in words:
+            # 分类文件为CSV格式，关键词中的逗号会破坏列结构
+            word = word.replace(',', ' ').strip()
+            if word and word not in existing:
+                existing.add(word)
+                added.append(word)
+        if not added:
+            return []
+
+        # 文件末尾没有换行时先补上，否则第一个新词会接在最后一行后面
+        needs_newline = False
+        if has_file and os.path.getsize(self.classification_file) > 0:
+            with open(self.classification_file, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b'\n'
+
+        with open(self.classification_file, 'a', encoding='utf-8') as f:
+            if not has_file:
+                f.write('关键词,分类\n')
+            elif needs_newline:
+                f.write('\n')
+            for word in added:
+                f.write(f"{word},{self.keyword_type}\n")
+        print(f"已将 {len(added)} 个新热搜词写入 {self.classification_file}")
+        return added
+
+    def poll_once(self):
+        """
+        拉取一次热搜榜并与上一次快照比较
+
+        返回:
+        - 差异字典，拉取失败时返回 None
+        """
+        hot_list = self.fetch_hot_list()
+        if hot_list is None:
+            return None
+
+        previous = self.load_snapshot()
+        diff = self.diff(previous, hot_list)
+        # 没有历史快照时本次只作为基线，不把整张榜单当作新词
+        diff['baseline'] = not previous
+        if not diff['baseline']:
+            self.append_diff(diff)
+        self.save_snapshot(hot_list)
+
+        print(f"热搜榜共 {len(hot_list)} 条: 新上榜 {len(diff['new'])} 条, "
+              f"排名变化 {len(diff['rank_changes'])} 条, 下榜 {len(diff['dropped'])} 条")
+        return diff
+
+    def run(self, interval=600, max_polls=None, on_new_terms=None):
+        """
+        按固定间隔轮询热搜榜
+
+        参数:
+        - interval: 轮询间隔（秒）
+        - max_polls: 最多轮询次数，为空时一直运行
+        - on_new_terms: 有新词写入分类文件时的回调，参数为新词列表
+        """
+        polls = 0
+        while max_polls is None or polls < max_polls:
+            polls += 1
+            diff = self.poll_once()
+            if diff and diff['new'] and not diff['baseline']:
+                added = self.register_keywords([item['word'] for item in diff['new']])
+                if added and on_new_terms:
+                    try:
+                        on_new_terms(added)
+                    except Exception as e:
+                        print(f"处理新热搜词时出错: {e}")
+            if max_polls is not None and polls >= max_polls:
+                break
+            time.sleep(interval)
+
+
+def crawl_new_terms(terms):
+    """只针对新上榜的热搜词运行一次全站搜索爬取"""
+    import main as crawler_main
+    print(f"开始爬取新热搜词: {', '.join(terms)}")
+    crawler_main.main(keywords=terms, search_mode='global')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='监控微博热搜榜，并对新上榜的词触发爬取')
+    parser.add_argument('--interval', type=int, default=600, help='轮询间隔秒数（默认：600）')
+    parser.add_argument('--once', action='store_true', help='只拉取一次')
+    parser.add_argument('--no-crawl', action='store_true', help='只记录差异和新词，不触发爬取')
+    args = parser.parse_args()
+
+    monitor = HotSearchMonitor()
+    monitor.run(
+        interval=args.interval,
+        max_polls=1 if args.once else None,
+        on_new_terms=None if args.no_crawl else crawl_new_terms
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,7 @@ import shutil
 from datetime import datetime
 import argparse
 import webbrowser
+from result_store import load_latest
 
 class ImageManager:
     def __init__(self):
@@ -23,6 +24,10 @@ class ImageManager:
     def load_latest_results(self):
         """加载最新的结果文件"""
         try:
+            # 优先读取列式结果存储
+            self.df = load_latest(result_dir=self.results_dir)
+            if self.df is not None:
+                return
             result_files = [f for f in os.listdir(self.results_dir) 
                           if f.startswith('all_results_') and f.endswith('.csv')]
             if result_files:
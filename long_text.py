@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+长微博全文展开
+时间线接口返回的 text_raw 对长微博只给出截断的前缀，这里按页批量收集
+被截断的微博，只请求 longtext 接口拿全文，并发受限且带缓存
+缓存按最近使用保留固定条数，爬取过程中按时间间隔写入缓存文件，进程退出时再写一次
+"""
+
+import os
+import json
+import time
+import atexit
+import threading
+from collections import OrderedDict
+
+import fast_json
+
+LONG_TEXT_URL = "https://weibo.com/ajax/statuses/longtext?id={}"
+
+
+class LongTextExpander:
+    def __init__(self, spider, max_workers=4, cache_file=None, max_entries=20000, save_interval=300):
+        """
+        初始化长文本展开器
+
+        参数:
+        - spider: 爬虫引擎实例，请求经由其传输层发出
+        - max_workers: 同时请求 longtext 接口的最大线程数
+        - cache_file: 全文缓存文件路径，为空时只在内存中缓存
+        - max_entries: 缓存的最大条数，超出时淘汰最久未使用的全文
+        - save_interval: 爬取过程中两次写入缓存文件的最小间隔（秒）
+        """
+        self.spider = spider
+        self.max_workers = max(1, int(max_workers))
+        self.cache_file = cache_file
+        self.max_entries = max(1, int(max_entries))
+        self.save_interval = save_interval
+        self.cache = OrderedDict()
+        self._lock = threading.Lock()
+        # 并行爬取的各线程共用一个展开器，写缓存文件时串行，避免同时写同一个临时文件
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self._exit_hook = False
+
+        if cache_file and os.path.exists(cache_file):
+            try:
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    # 文件中按使用先后排列，只载入最近的 max_entries 条
+                    self.cache = OrderedDict(list(json.load(f).items())[-self.max_entries:])
+            except Exception as e:
+                print(f"读取长文本缓存失败: {e}")
+
+    @staticmethod
+    def is_truncated(weibo):
+        """判断时间线接口返回的微博文本是否被截断"""
+        return bool(weibo.get('isLongText') or weibo.get('continue_tag'))
+
+    def needs_expansion(self, weibo, keyword=None):
+        """
+        判断微博是否需要请求全文
+
+        未截断的微博已有全文，关键词是否命中可以直接确定；截断的前缀中已经
+        包含关键词时，命中也已确定，两种情况都不需要再请求。
+
+        参数:
+        - weibo: 时间线接口返回的微博字典
+        - keyword: 搜索关键词，为空时所有截断的微博都需要展开
+
+        返回:
+        - 是否需要请求全文
+        """
+        if not self.is_truncated(weibo):
+            return False
+        if keyword and keyword.lower() in (weibo.get('text_raw') or '').lower():
+            return False
+        return True
+
+    def fetch(self, weibo_key):
+        """
+        请求单条微博的全文
+
+        参数:
+        - weibo_key: 微博的 mblogid 或数字ID
+
+        返回:
+        - 全文字符串，失败时返回 None
+        """
+        try:
+            response = self.spider.get(LONG_TEXT_URL.format(weibo_key), timeout=10)
+        except Exception as e:
+            response = e
+        return self._parse(weibo_key, response)
+
+    @staticmethod
+    def _parse(weibo_key, response):
+        """从 longtext 接口的响应中取出全文，失败时返回 None"""
+        if isinstance(response, Exception):
+            print(f"获取长文本时出错 {weibo_key}: {response}")
+            return None
+        try:
+            if response.status_code != 200:
+                print(f"获取长文本失败 {weibo_key}，状态码: {response.status_code}")
+                return None
+            data = fast_json.get(fast_json.parse(response.content), 'data', {})
+            return fast_json.get(data, 'longTextContent') or None
+        except Exception as e:
+            print(f"获取长文本时出错 {weibo_key}: {e}")
+            return None
+
+    def expand(self, weibo_list, keyword=None, skip_ids=None):
+        """
+        批量展开一页（或一个用户）中被截断的微博，结果直接写回 text_raw
+
+        参数:
+        - weibo_list: 时间线接口返回的微博列表
+        - keyword: 搜索关键词，用于跳过前缀已命中的微博
+        - skip_ids: 无需处理的微博ID集合（如已爬取过的微博）
+
+        返回:
+        - 成功展开的微博数量
+        """
+        pending = {}
+        for weibo in weibo_list:
+            weibo_id = str(weibo.get('id', ''))
+            if skip_ids and weibo_id in skip_ids:
+                continue
+            if not self.needs_expansion(weibo, keyword):
+                continue
+            pending.setdefault(str(weibo.get('mblogid') or weibo_id), []).append(weibo)
+
+        if not pending:
+            return 0
+
+        texts = {}
+        with self._lock:
+            for key in pending:
+                if key in self.cache:
+                    self.cache.move_to_end(key)
+                    texts[key] = self.cache[key]
+        missing = [key for key in pending if key not in texts]
+        if missing:
+            # 经爬虫的 get_many 并发请求（async 传输时使用传输层的线程池）
+            responses = self.spider.get_many([(LONG_TEXT_URL.format(key), {'timeout': 10}) for key in missing],
+                                             max_workers=self.max_workers)
+            for key, response in zip(missing, responses):
+                text = self._parse(key, response)
+                if text:
+                    texts[key] = text
+                    self._store(key, text)
+
+        expanded = 0
+        for key, weibos in pending.items():
+            text = texts.get(key)
+            if not text:
+                continue
+            for weibo in weibos:
+                weibo['text_raw'] = text
+                weibo['isLongText'] = False
+                weibo.pop('continue_tag', None)
+                expanded += 1
+
+        if expanded:
+            print(f"展开长微博全文 {expanded} 条（新请求 {len(missing)} 条）")
+        return expanded
+
+    def _store(self, key, text):
+        """写入缓存，超出 max_entries 时淘汰最久未使用的条目"""
+        with self._lock:
+            self.cache[key] = text
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.max_entries:
+                self.cache.popitem(last=False)
+            self._dirty = True
+            if self.cache_file and not self._exit_hook:
+                # 进程退出时写入距上次保存之后新增的全文
+                atexit.register(self.save_cache, force=True)
+                self._exit_hook = True
+
+    def save_cache(self, force=False):
+        """
+        将全文缓存写入缓存文件
+
+        参数:
+        - force: 为 False 时距上次写入不足 save_interval 秒则跳过，爬取过程中可以频繁调用
+        """
+        if not self.cache_file:
+            return
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                if not force and time.monotonic() - self._last_save < self.save_interval:
+                    return
+                data = dict(self.cache)
+                self._dirty = False
+                self._last_save = time.monotonic()
+            try:
+                cache_dir = os.path.dirname(self.cache_file)
+                if cache_dir:
+                    os.makedirs(cache_dir, exist_ok=True)
+                # 先写临时文件再替换，中途退出不会留下写了一半的缓存
+                tmp_file = self.cache_file + '.tmp'
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(tmp_file, self.cache_file)
+            except Exception as e:
+                with self._lock:
+                    self._dirty = True
+                print(f"保存长文本缓存失败: {e}")
@@ -5,18 +5,28 @@ import os
 import sys
 import json
 import logging
+import argparse
+import queue
+import threading
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor
 from fetch import WeiboSpider
 from keyword_manager import KeywordManager
+from comment_crawler import CommentCrawler, comments_file_for
+from topic_crawler import TopicCrawler, extract_hashtags
+from result_store import write_results
+from result_sink import create_sink
+from external_sort import create_sorter, sorted_rows, final_order_key, velocity_order_key
+import csv
+from result_db import open_db
+from engagement_series import open_series, add_velocity
+from text_cleaner import clean_texts
+from pipeline import Pipeline, Stage
+from weibo_record import records_to_dataframe
+from time_parser import parse_publish_time, parse_publish_times, publish_time_lookup, within_recent_days
 import time
-import base64
-try:
-    from PIL import Image  # 可选依赖
-except Exception:
-    Image = None
-import io
+from thumbnails import make_thumbnail, make_thumbnails, data_uri, relative_url
 import re
 import unicodedata
 
@@ -41,8 +51,55 @@ def load_config():
         "download_media": False,
         "max_retries": 3,
         "retry_delay": 5,
+        # 按用户并行爬取的线程数（评论抓取也使用该并发数），命令行 --workers 可覆盖；请求总速率仍受 rate_limit_per_second 限制
         "thread_pool_size": 4,
         "proxy": None,
+        # HTTP传输层: sync / pooled（线程内复用连接）/ async（批量请求共用传输层的线程池）；限速为所有线程合计的每秒请求数，0表示不限速（此时只能逐个用户爬取）
+        "transport": "pooled",
+        "http_pool_size": 10,
+        "rate_limit_per_second": 2,
+        "rate_limit_burst": 1,
+        "response_cache_ttl": 300,
+        # 结果存储: csv（只写CSV）/ parquet（另写入 results/store 下按日期、关键词分区的Parquet，需要pyarrow）
+        "result_store": "csv",
+        # 结果数据库（SQLite），按 weibo_id 更新；为空则不写入
+        "result_db": "results/weibo.db",
+        # 互动数时间序列（每次爬取追加快照，为空则不记录）与排序方式: likes（按点赞数）/ velocity（按点赞增长速度）
+        "engagement_db": "results/engagement.db",
+        "ranking": "likes",
+        # 流式输出格式: jsonl / csv / parquet，每爬完一页追加一次；汇总时每次读取的记录数
+        "stream_format": "jsonl",
+        "finalize_chunk_size": 10000,
+        # 分阶段结果流水线：爬取的同时处理结果；每批合并的记录数、阶段之间队列的容量（批次数）
+        "staged_pipeline": True,
+        "pipeline_batch_size": 500,
+        "pipeline_queue_size": 4,
+        # 画廊单文件模式：缩略图以Base64内嵌到HTML中；默认引用 results/thumbnails 下缓存的缩略图文件
+        "gallery_inline_images": False,
+        # 汇总排序的内存预算（MB），超出后分段写入临时文件再归并；export_top_n 大于0时只导出排名前N条
+        "sort_memory_mb": 256,
+        "export_top_n": 0,
+        # 时间线数据源: auto（按用户自动选择单页返回最多的）/ mymblog / container
+        "timeline_source": "auto",
+        "timeline_page_size": 50,
+        # 长微博全文展开的并发数与缓存文件（为空则只在内存中缓存）；缓存最多保留的条数（淘汰最久未使用的），
+        # 爬取过程中写入缓存文件的最小间隔（秒），爬取结束时再写一次
+        "long_text_workers": 4,
+        "long_text_cache": "results/long_text_cache.json",
+        "long_text_cache_size": 20000,
+        "long_text_save_interval": 300,
+        # 爬取模式: user（在 user_urls.txt 的用户主页中搜索）/ global（s.weibo.com 全站搜索）
+        "search_mode": "user",
+        "search_workers": 3,
+        # 话题跟进：从高分微博中取前N个 #话题# 爬取（0表示关闭）
+        "topic_top_n": 0,
+        "topic_pages": 2,
+        # 评论/转发抓取：对通过噪声过滤的前K条微博抓取（0表示关闭）
+        "comment_top_k": 0,
+        "comment_budget_per_post": 200,
+        "crawl_reposts": True,
+        # 关键词分析：结束时对通过噪声过滤的微博按关键词一次完成话题聚类和热门话题识别，写入 results/analysis_<时间>.json
+        "keyword_analysis": True,
         # 是否按自然日过滤最近N天（默认2天=今天+昨天）
         "enable_time_filter": True,
         "filter_recent_calendar_days": 2
@@ -77,7 +134,7 @@ def save_config(config):
 
 def image_to_base64(image_path, max_size=(300, 300)):
     """
-    将图片转换为Base64编码字符串
+    将图片转换为Base64编码字符串（使用 thumbnails 的缓存缩略图）
     
     参数:
     - image_path: 图片文件路径
@@ -86,59 +143,34 @@ def image_to_base64(image_path, max_size=(300, 300)):
     返回:
     - Base64编码字符串
     """
-    try:
-        if not os.path.exists(image_path) or Image is None:
-            return ""
-        
-        # 打开图片并调整大小以减少文件大小
-        with Image.open(image_path) as img:
-            # 转换为RGB（如果是RGBA等格式）
-            if img.mode in ('RGBA', 'LA', 'P'):
-                img = img.convert('RGB')
-            
-            # 计算缩放比例，保持长宽比
-            img.thumbnail(max_size, Image.Resampling.LANCZOS)
-            
-            # 将图片保存到内存中
-            buffer = io.BytesIO()
-            img.save(buffer, format='JPEG', quality=85, optimize=True)
-            buffer.seek(0)
-            
-            # 转换为Base64
-            image_data = buffer.getvalue()
-            base64_string = base64.b64encode(image_data).decode('utf-8')
-            
-            return f"data:image/jpeg;base64,{base64_string}"
-    
-    except Exception as e:
-        logging.warning(f"转换图片到Base64时出错 {image_path}: {e}")
-        return ""
+    return data_uri(make_thumbnail(image_path, size=max_size))
 
-def add_image_data_to_weibos(weibos):
+def add_image_data_to_weibos(weibos, inline=False, html_dir="results"):
     """
-    为微博数据添加图片的Base64编码
+    为微博数据添加图片缩略图的引用
+    
+    所有图片的缩略图先用进程池批量生成（已缓存的直接使用）。默认只记录缩略图相对 html_dir 的 URL，
+    记录、CSV 和 HTML 中都不再携带图片内容；inline 为 True 时（单文件模式）额外添加 Base64 编码
     
     参数:
     - weibos: 微博数据列表
+    - inline: 是否同时添加 image_base64 字段
+    - html_dir: 引用缩略图的 HTML 所在目录
     
     返回:
-    - 包含图片数据的微博列表
+    - 包含 image_thumbnails（以 | 分隔的相对 URL）和 image_count 的微博列表
     """
+    paths = [path for weibo in weibos for path in (weibo.get('image_paths', '') or '').split('|') if path]
+    thumbnails = make_thumbnails(paths)
     for weibo in weibos:
-        image_paths = weibo.get('image_paths', '')
-        base64_images = []
-        
-        if image_paths:
-            paths = image_paths.split('|')
-            for path in paths:
-                if path and os.path.exists(path):
-                    base64_data = image_to_base64(path)
-                    if base64_data:
-                        base64_images.append(base64_data)
+        image_paths = weibo.get('image_paths', '') or ''
+        thumbs = [thumbnails.get(path) for path in image_paths.split('|') if path]
+        thumbs = [thumb for thumb in thumbs if thumb]
         
-        # 添加Base64图片数据到微博信息中
-        weibo['image_base64'] = '|'.join(base64_images) if base64_images else ''
-        weibo['image_count'] = len(base64_images)
+        weibo['image_thumbnails'] = '|'.join(relative_url(thumb, html_dir) for thumb in thumbs)
+        weibo['image_count'] = len(thumbs)
+        if inline:
+            weibo['image_base64'] = '|'.join(data_uri(thumb) for thumb in thumbs)
     
     return weibos
 
@@ -170,156 +202,122 @@ def download_filtered_media(spider, filtered_weibos, keyword):
     
     return downloaded_count
 
-def parse_weibo_time(time_str, now=None):
+_analyzer = None
+_analyzer_lock = threading.Lock()
+
+def get_analyzer():
     """
-    解析微博时间字符串为 datetime 对象。
-    支持格式：'5分钟前'、'今天 12:34'、'昨天 12:34'、'2024-05-23 12:34'等。
+    获取本次运行共用的 MLAnalyzer，第一次调用时创建
+    
+    返回:
+    - MLAnalyzer 实例；ML 依赖不可用时返回 None
     """
-    if now is None:
-        now = datetime.now()
-    time_str = str(time_str).strip()
-    if not time_str or time_str == '未知时间':
-        return None
-    try:
-        if '分钟前' in time_str:
-            minutes = int(time_str.replace('分钟前', '').strip())
-            return now - timedelta(minutes=minutes)
-        elif '小时前' in time_str:
-            hours = int(time_str.replace('小时前', '').strip())
-            return now - timedelta(hours=hours)
-        elif '今天' in time_str:
-            t = time_str.replace('今天', '').strip()
-            dt = datetime.strptime(t, '%H:%M')
-            return now.replace(hour=dt.hour, minute=dt.minute, second=0, microsecond=0)
-        elif '昨天' in time_str:
-            t = time_str.replace('昨天', '').strip()
-            dt = datetime.strptime(t, '%H:%M')
-            dt = now.replace(hour=dt.hour, minute=dt.minute, second=0, microsecond=0) - timedelta(days=1)
-            return dt
-        elif '-' in time_str:
-            # 可能是 '05-23 12:34' 或 '2024-05-23 12:34'
-            if len(time_str) == 11:  # '05-23 12:34'
-                t = f"{now.year}-{time_str}"
-                return datetime.strptime(t, '%Y-%m-%d %H:%M')
-            elif len(time_str) == 16:  # '2024-05-23 12:34'
-                return datetime.strptime(time_str, '%Y-%m-%d %H:%M')
-        else:
-            # 兼容微博 created_at 英文格式，如 'Thu Aug 07 16:59:47 +0800 2025'
-            # 尝试解析为含时区的时间并转换为本地无时区时间
+    global _analyzer
+    with _analyzer_lock:
+        if _analyzer is None:
             try:
-                dt_aware = datetime.strptime(time_str, '%a %b %d %H:%M:%S %z %Y')
-                local_tz = datetime.now().astimezone().tzinfo
-                dt_local = dt_aware.astimezone(local_tz)
-                return dt_local.replace(tzinfo=None)
-            except Exception:
-                pass
-    except Exception:
-        pass
-    return None
-
-def is_within_recent_calendar_days(dt_obj, now, days):
-    """判断给定时间是否在最近 days 个自然日内（包含今天）。"""
-    if dt_obj is None:
-        return False
-    start_date = (now.date() - timedelta(days=days - 1))
-    return start_date <= dt_obj.date() <= now.date()
-
-def process_keyword(keyword, spider, ml_analyzer, config, now, keyword_to_type):
-    """处理单个关键词的爬取和分析"""
-    try:
-        logging.info(f"开始搜索关键词: {keyword}")
-        
-        # 获取关键词的分类
-        keyword_type = keyword_to_type.get(keyword, "unknown")
-        logging.info(f"关键词 '{keyword}' 的分类: {keyword_type}")
-        
-        # 获取搜索结果 - 强制关闭媒体下载
-        results = spider.search_keyword(
-            keyword, 
-            pages=config["default_pages"], 
-            start_page=config["start_page"],
-            download_media=False  # 强制关闭媒体下载
-        )
-        
-        if not results:
-            logging.warning(f"未找到关键词 '{keyword}' 的相关微博")
-            return None
-        
-        logging.info(f"获取到 {len(results)} 条微博")
-        
-        # ====== 筛选最近两天的微博（不再强制要求视频） ======
-        now_dt = datetime.now()
-        two_days_ago = now_dt - timedelta(days=2)
-        filtered_by_time = []
-        for weibo in results:
-            dt = parse_weibo_time(weibo.get('publish_time', ''), now=now_dt)
-            if dt and dt >= two_days_ago:
-                filtered_by_time.append(weibo)
-        logging.info(f"筛选后剩余 {len(filtered_by_time)} 条最近两天的微博")
-        if not filtered_by_time:
-            logging.warning(f"最近两天没有关键词 '{keyword}' 的相关微博")
-            return None
-        # ====== 后续分析用 filtered_by_time 替换 results ======
-        
-        # 应用机器学习分析
-        logging.info("正在进行机器学习分析...")
-        analysis_result = ml_analyzer.analyze_weibos(
-            filtered_by_time, 
-            min_score=config["min_score"],
-            min_likes=config["min_likes"],  # 传递最低点赞数参数
-            min_comments=config["min_comments"] if "min_comments" in config else 0,
-            min_forwards=config["min_forwards"] if "min_forwards" in config else 0
-        )
-        
-        if not analysis_result or "filtered_weibos" not in analysis_result:
-            logging.warning(f"机器学习分析未返回有效结果")
-            return None
-        
-        filtered_results = analysis_result["filtered_weibos"]
-        logging.info(f"机器学习分析后保留 {len(filtered_results)} 条高质量微博")
-        
-        # 为每条微博添加关键词分类信息
-        for weibo in filtered_results:
-            weibo['type'] = keyword_type
-        
-        # 如果启用了媒体下载，为筛选后的微博下载图片 - 移除此功能
-        if config["download_media"]:
-            logging.info(f"媒体下载已禁用")
-        
-        # 移除图片处理相关代码
-        if config["download_media"]:
-            logging.info(f"图片处理已禁用")
-        
-        # 保存结果
-        result_dir = "results"
-        os.makedirs(result_dir, exist_ok=True)
-        
-        # 保存过滤后的微博数据
-        df = pd.DataFrame(filtered_results)
-        df = clean_and_reorder_dataframe(df)  # 清理和重新排列列
-        # 按点赞量降序排序
-        df = df.sort_values(by='likes', ascending=False)
-        keyword_file = f"{result_dir}/{keyword}_{now}.csv"
-        df.to_csv(keyword_file, index=False, encoding='utf-8-sig')
-        logging.info(f"已保存过滤后的结果到 {keyword_file}")
-        
-        # 保存分析结果
-        analysis_file = f"{result_dir}/{keyword}_analysis_{now}.json"
-        with open(analysis_file, 'w', encoding='utf-8') as f:
-            json.dump(analysis_result, f, ensure_ascii=False, indent=2)
-        logging.info(f"已保存分析结果到 {analysis_file}")
-        
-        # 输出热门话题
-        if "trending_topics" in analysis_result:
-            logging.info("\n热门话题:")
-            for topic in analysis_result["trending_topics"]:
-                logging.info(f"- {topic['keyword']} (热度: {topic['score']:.2f}, 相关微博数: {topic['weibo_count']})")
-        
-        return filtered_results
-        
-    except Exception as e:
-        logging.error(f"处理关键词 '{keyword}' 时出错: {e}")
+                from ml_analyzer import MLAnalyzer
+                _analyzer = MLAnalyzer()
+            except Exception as e:
+                logging.warning(f"噪声过滤不可用，按点赞数选取微博: {e}")
+                _analyzer = False
+        return _analyzer or None
+
+def select_top_posts(weibos, config, limit=None):
+    """
+    用 MLAnalyzer.filter_noise 筛选并按分数排序微博
+    
+    参数:
+    - weibos: 微博数据的可迭代对象
+    - config: 配置字典
+    - limit: 只需要前 limit 条时用堆选取，不对全部结果排序
+    
+    返回:
+    - 通过噪声过滤的微博副本列表（带 content_score）；分析器不可用时按点赞数排序返回原微博
+    """
+    analyzer = get_analyzer()
+    if analyzer is not None:
+        try:
+            # 只为副本评分，传入的微博不被修改
+            return analyzer.filter_noise(
+                (dict(weibo) for weibo in weibos),
+                min_likes=config["min_likes"],
+                min_comments=config.get("min_comments", 0),
+                min_forwards=config.get("min_forwards", 0),
+                limit=limit
+            )
+        except Exception as e:
+            logging.warning(f"噪声过滤出错，按点赞数选取微博: {e}")
+    return sorted_rows(weibos, lambda w: -int(float(w.get('attitudes_count', 0) or 0)),
+                       memory_budget_mb=config.get("sort_memory_mb", 256), limit=limit)
+
+def crawl_hashtag_topics(spider, weibos, config):
+    """
+    跟进高分微博中的 #话题#，爬取话题下的微博
+    
+    话题下的微博按搜索页经 spider._emit_page 清理后交给 spider.on_page，与其他结果一起进入后续处理。
+    
+    参数:
+    - spider: 爬虫实例
+    - weibos: 已爬取的微博的可迭代对象（可以是逐块读回流式输出的生成器）
+    - config: 配置字典
+    
+    返回:
+    - 话题下新增的微博列表，未启用时返回空列表
+    """
+    top_n = int(config.get("topic_top_n", 0) or 0)
+    if top_n <= 0 or weibos is None:
+        return []
+    
+    topics = extract_hashtags(select_top_posts(weibos, config), top_n=top_n)
+    if not topics:
+        logging.info("高分微博中没有找到话题标签")
+        return []
+    
+    logging.info(f"跟进话题: {', '.join(topics)}")
+    crawler = TopicCrawler(
+        spider,
+        max_workers=config.get("search_workers", 3),
+        pages_per_topic=config.get("topic_pages", 2)
+    )
+    return crawler.crawl(topics)
+
+def start_comment_crawl(spider, weibos, config, result_file, selected=False):
+    """
+    在后台为通过噪声过滤的前K条微博抓取评论和转发
+    
+    参数:
+    - spider: 爬虫实例
+    - weibos: 微博数据的可迭代对象（可以是逐行读取的生成器）
+    - config: 配置字典
+    - result_file: 结果文件路径，评论写入同名的 _comments.jsonl 文件
+    - selected: weibos 是否已经是选好的前K条（如 ResultPipeline 中选出的候选），为 True 时不再筛选
+    
+    返回:
+    - 后台任务的 Future，未启用时返回 None
+    """
+    top_k = int(config.get("comment_top_k", 0) or 0)
+    if top_k <= 0 or weibos is None:
         return None
+    
+    survivors = list(weibos) if selected else select_top_posts(weibos, config, limit=top_k)
+    
+    crawler = CommentCrawler(
+        spider,
+        max_workers=config.get("thread_pool_size", 4),
+        per_post_budget=config.get("comment_budget_per_post", 200),
+        include_reposts=config.get("crawl_reposts", True)
+    )
+    logging.info(f"后台抓取前 {top_k} 条微博的评论，输出到 {comments_file_for(result_file)}")
+    return crawler.start(survivors, comments_file_for(result_file), top_k=top_k)
+
+def parse_weibo_time(time_str, now=None):
+    """
+    解析微博时间字符串为 datetime 对象。
+    支持格式：'5分钟前'、'今天 12:34'、'昨天 12:34'、'2024-05-23 12:34'等，见 time_parser。
+    一列时间请直接用 time_parser.parse_publish_times 批量解析。
+    """
+    return parse_publish_time(time_str, now=now)
 
 def load_keyword_classifications():
     """
@@ -349,8 +347,17 @@ def load_keyword_classifications():
     
     return keyword_to_type
 
-def clean_and_reorder_dataframe(df):
-    """清理并重新排序DataFrame"""
+# 汇总CSV保留的字段
+FINAL_COLUMNS = ['keyword', 'weibo_id', 'content', 'publish_time', 'reposts_count', 'comments_count', 'attitudes_count', 'post_link']
+
+def clean_and_reorder_dataframe(df, keep_user_name=False):
+    """
+    清理并重新排序DataFrame
+    
+    参数:
+    - df: 结果 DataFrame
+    - keep_user_name: 是否保留用户名字段（写入结果数据库和列式存储时需要）
+    """
     # 确保所有必要的列都存在
     required_columns = ['weibo_id', 'content', 'publish_time', 'reposts_count', 'comments_count', 
                         'attitudes_count', 'post_link', 'video_url', 'video_cover']
@@ -361,7 +368,7 @@ def clean_and_reorder_dataframe(df):
             df[col] = ''
     
     # 删除用户名字段
-    if 'user_name' in df.columns:
+    if 'user_name' in df.columns and not keep_user_name:
         df = df.drop(columns=['user_name'])
     
     # 确保post_link列非空，如果为空则使用weibo_id生成
@@ -371,20 +378,9 @@ def clean_and_reorder_dataframe(df):
             lambda x: f'https://weibo.com/detail/{x}'
         )
     
-    # 清理content，保留纯文本
+    # 清理content，保留纯文本（HTML标签、[表情]、链接、零宽字符、多余空白一次扫描完成）
     if 'content' in df.columns:
-        # 移除HTML标签
-        df['content'] = df['content'].astype(str).replace(r'<[^>]*>', '', regex=True)
-        # 移除微博特殊标记如[表情]
-        df['content'] = df['content'].replace(r'\[.*?\]', '', regex=True)
-        # 移除链接
-        df['content'] = df['content'].replace(r'http[s]?://\S+', '', regex=True)
-        # 移除多余空格和换行
-        df['content'] = df['content'].replace(r'\s+', ' ', regex=True).str.strip()
-        # 移除特殊Unicode字符
-        df['content'] = df['content'].replace(r'[\u200b-\u200f\u2028-\u202f\u205f-\u206f]', '', regex=True)
-        # 移除"​​​"结尾（这是微博文本常见的结尾）
-        df['content'] = df['content'].replace(r'​+$', '', regex=True)
+        df['content'] = clean_texts(df['content'])
     
     # 重新排序列，优先显示重要信息
     ordered_columns = ['keyword'] + required_columns
@@ -447,30 +443,444 @@ def process_weibo_data(df):
     df['has_video'] = df.apply(has_video, axis=1)
     return df[df['has_video'] == True].drop('has_video', axis=1)
 
-def main():
+def crawl_user(spider, user_url, index, keywords, config):
+    """
+    单个用户的爬取流水线：依次在用户主页中搜索每个关键词，并补充用户ID和关键词信息
+    
+    参数:
+    - spider: 爬虫实例
+    - user_url: 用户主页URL
+    - index: 用户序号（从1开始），无法提取用户ID时用于生成占位ID
+    - keywords: 关键词列表
+    - config: 配置字典
+    
+    返回:
+    - 该用户的微博数据列表
+    """
+    user_results = []
+    user_id = spider._extract_user_id(user_url) or f"user_{index}"
+    
+    # 对每个关键词进行搜索
+    for keyword in keywords:
+        logging.info(f"\n搜索关键词: {keyword}")
+        try:
+            # 爬取该用户的微博
+            # 图片由结果流水线的 enrich 阶段只为通过过滤的微博下载
+            results = spider.search_keyword(
+                user_url=user_url,
+                keyword=keyword,
+                pages=1,  # 固定为1页
+                download_media=False
+            )
+            
+            if results:
+                # 为每条微博添加用户ID和关键词信息
+                for result in results:
+                    result['user_id'] = user_id
+                    result['keyword'] = keyword
+                user_results.extend(results)
+                logging.info(f"找到 {len(results)} 条包含关键词 '{keyword}' 的微博")
+            else:
+                logging.info(f"未找到包含关键词 '{keyword}' 的微博")
+            
+        except Exception as e:
+            logging.error(f"处理关键词 {keyword} 时出错: {str(e)}")
+            continue
+
+    return user_results
+
+def crawl_user_timelines(spider, user_urls, keywords, config, workers=1):
+    """
+    在每个用户的主页中搜索所有关键词
+    
+    workers 大于1时多个用户并行爬取，各用户的请求共用爬虫传输层的限速器；未设置限速（rate_limit_per_second 为0）时
+    仍逐个用户爬取。每个线程使用独立的爬虫副本
+    （spider.worker_copy），爬完一页就放入本用户的队列；主线程按用户顺序逐页取出，去掉前面用户已爬到的微博后
+    交给 spider.on_page 并合并，页面随爬随出，输出与逐个用户爬取时相同。
+    
+    参数:
+    - spider: 爬虫实例
+    - user_urls: 用户主页URL列表
+    - keywords: 关键词列表
+    - config: 配置字典
+    - workers: 同时爬取的用户数
+    
+    返回:
+    - 爬到的微博条数（结果经 spider.on_page 流式输出，不在内存中保留）
+    """
+    total = 0
+    workers = max(1, min(int(workers or 1), len(user_urls)))
+    if workers > 1 and float(config.get("rate_limit_per_second", 0) or 0) <= 0:
+        # 不限速时多个线程会成倍放大请求速率，容易被封，只允许逐个用户爬取
+        logging.warning("rate_limit_per_second 为0（不限速），并行爬取需要设置限速，改为逐个用户爬取")
+        workers = 1
+
+    if workers == 1:
+        # 处理每个用户
+        for i, user_url in enumerate(user_urls, 1):
+            logging.info(f"\n处理第 {i}/{len(user_urls)} 个用户: {user_url}")
+            total += len(crawl_user(spider, user_url, i, keywords, config))
+        return total
+
+    def run_user(i, user_url, worker):
+        try:
+            logging.info(f"\n处理第 {i}/{len(user_urls)} 个用户: {user_url}")
+            crawl_user(worker, user_url, i, keywords, config)
+        except Exception as e:
+            logging.error(f"爬取用户 {user_url} 时出错: {str(e)}")
+        finally:
+            # None 表示该用户已爬完
+            worker.on_page(None)
+
+    logging.info(f"使用 {workers} 个线程并行爬取 {len(user_urls)} 个用户")
+    page_queues = [queue.Queue() for _ in user_urls]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for i, (user_url, pages) in enumerate(zip(user_urls, page_queues), 1):
+            executor.submit(run_user, i, user_url, spider.worker_copy(on_page=pages.put))
+        # 按用户顺序逐页输出：当前用户的页面爬到即输出，后面用户的页面在各自队列中等待
+        for pages in page_queues:
+            for records in iter(pages.get, None):
+                fresh = []
+                for record in records:
+                    if record['weibo_id'] in spider.seen_weibos:
+                        continue
+                    spider.seen_weibos.add(record['weibo_id'])
+                    fresh.append(record)
+                if fresh and spider.on_page is not None:
+                    spider.on_page(fresh)
+                total += len(fresh)
+
+    return total
+
+def crawl_global_search(spider, keywords, config):
+    """
+    在 s.weibo.com 全站搜索每个关键词
+    
+    参数:
+    - spider: 爬虫实例
+    - keywords: 关键词列表
+    - config: 配置字典
+    
+    返回:
+    - 爬到的微博条数（结果经 spider.on_page 流式输出，不在内存中保留）
+    """
+    total = 0
+    for keyword in keywords:
+        logging.info(f"\n全站搜索关键词: {keyword}")
+        try:
+            results = spider.search_global(
+                keyword,
+                pages=config["default_pages"],
+                download_media=False,
+                max_workers=config.get("search_workers", 3)
+            )
+            total += len(results)
+            logging.info(f"找到 {len(results)} 条包含关键词 '{keyword}' 的微博")
+        except Exception as e:
+            logging.error(f"搜索关键词 {keyword} 时出错: {str(e)}")
+            continue
+    return total
+
+def write_rows_csv(rows, output_file, columns):
+    """
+    逐行写出CSV，缺失值写为空
+
+    参数:
+    - rows: 字典的可迭代对象
+    - output_file: 输出路径
+    - columns: 输出的列
+
+    返回:
+    - 写出的行数
+    """
+    written = 0
+    with open(output_file, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=columns, extrasaction='ignore')
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({col: ('' if pd.isna(row.get(col)) else row.get(col)) for col in columns})
+            written += 1
+    return written
+
+def iter_csv_rows(csv_file):
+    """逐行读取CSV为字典，不一次性载入内存"""
+    with open(csv_file, 'r', encoding='utf-8-sig', newline='') as f:
+        yield from csv.DictReader(f)
+
+def iter_sink_rows(sink, chunk_size=10000):
+    """按块读回流式输出，逐条生成微博字典，不一次性载入内存"""
+    for chunk in sink.iter_chunks(chunk_size):
+        yield from chunk.to_dict('records')
+
+class ResultPipeline:
+    """
+    爬取结果的分阶段处理：normalize（清理、解析发布时间）→ engagement（互动数快照和增长速度）→ filter（时间过滤、分类）
+    → enrich（下载保留下来的微博的图片）→ score（噪声过滤和内容评分，为评论抓取选取前K条）→ persist（写入存储、数据库和排序器）；
+    全部批次处理完后，通过噪声过滤的微博按关键词一次批量分析（MLAnalyzer.analyze_weibos_by_keyword）
+    
+    各阶段在独立线程中运行，由有界队列连接（见 pipeline.Pipeline）。爬取时把每页结果 put 进来，
+    处理与爬取同时进行；队列满时 put 阻塞，爬虫随之放慢。批次按顺序流过各阶段，结果与逐块顺序处理相同。
+    某个阶段出错的批次会被丢弃，finish 记录失败的批次数，check_failures 据此让本次运行以失败结束。
+    """
+
+    def __init__(self, config, keyword_to_type, now, result_dir, spider=None, batch_size=None):
+        """
+        参数:
+        - config: 配置字典
+        - keyword_to_type: 关键词到分类的映射
+        - now: 运行批次（YYYYMMDD_HHMMSS），用于文件命名
+        - result_dir: 结果目录
+        - spider: 爬虫实例，下载图片时使用
+        - batch_size: 不为空时，put 进来的记录合并到该条数再处理
+        """
+        self.config = config
+        self.keyword_to_type = keyword_to_type
+        self.now = now
+        self.result_dir = result_dir
+        self.spider = spider
+        self.now_dt = datetime.now()
+        self.time_filter = config.get("enable_time_filter", True)
+        self.recent_days = max(1, int(config.get("filter_recent_calendar_days", 2)))
+        self.total = self.kept = 0
+        self._part = 0
+
+        self.series = open_series(config.get("engagement_db"), create=True)
+        self.result_db = open_db(config.get("result_db"), create=True)
+        # 先按关键词分类排序（show类别优先），然后按点赞量降序排序
+        # ranking 为 velocity 时按点赞增长速度排序，优先展示上升快的新微博
+        self.sort_key = velocity_order_key if config.get("ranking", "likes") == "velocity" else final_order_key
+        # 超出内存预算时分段排序写入临时文件再归并；只导出前N条时用堆选取
+        top_n = int(config.get("export_top_n", 0) or 0)
+        self.sorter = create_sorter(self.sort_key, memory_budget_mb=config.get("sort_memory_mb", 256),
+                                    limit=top_n or None)
+        # 评论抓取的候选在流水线中边爬边选；只导出前N条时候选须来自导出的结果，仍从汇总CSV中选取
+        self.comment_top_k = int(config.get("comment_top_k", 0) or 0) if not top_n else 0
+        self.candidates = []
+        # 关键词分析需要全部通过噪声过滤的微博（只保留汇总CSV的字段和 content_score）
+        self.keyword_analysis = bool(config.get("keyword_analysis", True))
+        self.survivors = []
+        self.failed_batches = 0
+
+        stages = [Stage('normalize', self._normalize)]
+        if self.series is not None:
+            stages.append(Stage('engagement', self._engagement))
+        stages.append(Stage('filter', self._filter))
+        if config.get("download_media") and spider is not None:
+            stages.append(Stage('enrich', self._enrich))
+        stages.append(Stage('score', self._score))
+        stages.append(Stage('persist', self._persist))
+        self.pipeline = Pipeline(stages, queue_size=config.get("pipeline_queue_size", 4),
+                                 batch_size=batch_size, name='结果流水线')
+
+    def start(self):
+        self.pipeline.start()
+        return self
+
+    def put(self, records):
+        """输入一批记录（记录列表或 DataFrame），第一个阶段的队列满时阻塞"""
+        self.pipeline.put(records)
+
+    def feed(self, chunks):
+        """依次输入每个批次"""
+        self.pipeline.feed(chunks)
+
+    def _normalize(self, batch):
+        chunk = batch if isinstance(batch, pd.DataFrame) else records_to_dataframe(batch)
+        self.total += len(chunk)
+        # 清理和重新排序；用户名保留给结果数据库和列式存储，汇总CSV只写 FINAL_COLUMNS
+        chunk = clean_and_reorder_dataframe(chunk, keep_user_name=True)
+        # 整块批量解析发布时间，时间过滤、起点快照和结果数据库共用同一次解析结果
+        chunk['_published'] = parse_publish_times(chunk['publish_time'], now=self.now_dt)
+        return chunk
+
+    def _parse_time(self, chunk):
+        return publish_time_lookup(chunk['publish_time'], parsed=chunk['_published'])
+
+    def _engagement(self, chunk):
+        # 追加本次爬到的互动数快照，并计算增长速度/加速度
+        self.series.record(chunk, ts=self.now_dt, parse_time=self._parse_time(chunk))
+        return add_velocity(chunk, self.series)
+
+    def _filter(self, chunk):
+        # 按自然日过滤最近N天（默认今天+昨天）
+        if self.time_filter:
+            chunk = chunk[within_recent_days(chunk['_published'], self.now_dt, self.recent_days).to_numpy()]
+        if chunk.empty:
+            return None
+        # 添加分类信息
+        return chunk.assign(type=chunk['keyword'].map(self.keyword_to_type).fillna('other'))
+
+    def _enrich(self, chunk):
+        # 只为通过过滤的微博下载图片
+        paths = []
+        for row in chunk.itertuples(index=False):
+            local_paths = row.local_image_paths if isinstance(getattr(row, 'local_image_paths', None), list) else []
+            if not local_paths and isinstance(getattr(row, 'image_urls', None), list):
+                for url in row.image_urls:
+                    local_path = self.spider.download_media(url, 'image', row.keyword, row.weibo_id)
+                    if local_path:
+                        local_paths.append(local_path)
+            paths.append(local_paths)
+        return chunk.assign(local_image_paths=paths)
+
+    def _final_rows(self, chunk):
+        return chunk[[col for col in FINAL_COLUMNS + ['type', 'velocity'] if col in chunk.columns]].to_dict('records')
+
+    def _select_top(self, rows, limit=None):
+        analyzer = get_analyzer()
+        if analyzer is not None:
+            return analyzer.filter_noise(
+                rows,
+                min_likes=self.config["min_likes"],
+                min_comments=self.config.get("min_comments", 0),
+                min_forwards=self.config.get("min_forwards", 0),
+                limit=limit
+            )
+        return list(sorted_rows(rows, lambda w: -int(float(w.get('attitudes_count', 0) or 0)), limit=limit))
+
+    def _score(self, chunk):
+        # 噪声过滤和内容评分是计算密集的部分，与爬取重叠进行。评分写在行的副本上，通过过滤的微博在块中
+        # 加上 content_score 列；需要抓取评论时每块只保留前K条候选，最后再合并
+        # 先按汇总CSV的顺序排列，分数相同的微博与从汇总CSV中选取时的先后一致
+        full_rows = sorted(self._final_rows(chunk), key=self.sort_key)
+        rows = [{key: value for key, value in row.items() if key in FINAL_COLUMNS} for row in full_rows]
+        survivors = self._select_top(rows)
+        if self.keyword_analysis and get_analyzer() is not None:
+            self.survivors.extend(survivors)
+        if self.comment_top_k > 0:
+            order = {id(row): self.sort_key(full) for row, full in zip(rows, full_rows)}
+            self.candidates.extend((order[id(row)], row) for row in survivors[:self.comment_top_k])
+        scores = {row['weibo_id']: row['content_score'] for row in survivors if 'content_score' in row}
+        return chunk.assign(content_score=chunk['weibo_id'].map(scores))
+
+    def _persist(self, chunk):
+        parse_time = self._parse_time(chunk)
+        chunk = chunk.drop(columns=['_published'])
+        # 带分类列的完整结果写入列式存储（按日期/关键词分区）和结果数据库
+        if self.config.get("result_store", "csv") == "parquet":
+            write_results(chunk, self.now, part=self._part)
+        if self.result_db is not None:
+            # 按 weibo_id 更新，重复爬到的微博只更新互动数
+            self.result_db.upsert_posts(chunk, self.now, parse_time=parse_time)
+        self._part += 1
+        self.kept += len(chunk)
+        self.sorter.add(self._final_rows(chunk))
+        return chunk
+
+    def finish(self):
+        """
+        等待所有批次处理完成，按排序结果写出汇总CSV
+        
+        返回:
+        - (汇总CSV路径, 写出的行数)，时间过滤后没有结果时返回 (None, 0)
+        """
+        try:
+            self.pipeline.close()
+            self.pipeline.report()
+        finally:
+            if self.series is not None:
+                self.series.close()
+            if self.result_db is not None:
+                self.result_db.close()
+
+        self.failed_batches = self.pipeline.failed_batches
+        if self.failed_batches:
+            logging.error(f"结果流水线有 {self.failed_batches} 个批次处理失败，其中的微博不在本次结果中")
+
+        if not self.kept:
+            self.sorter.close()
+            return None, 0
+        if self.time_filter:
+            logging.info(f"时间过滤（最近{self.recent_days}个自然日）后保留 {self.kept}/{self.total} 条")
+
+        # 只保留指定字段，按排序结果逐行写一次CSV
+        output_file = os.path.join(self.result_dir, f"all_results_{self.now}.csv")
+        exported = write_rows_csv(self.sorter, output_file, FINAL_COLUMNS)
+        self.analyze_keywords()
+        return output_file, exported
+
+    def analyze_keywords(self):
+        """
+        对通过噪声过滤的微博按关键词批量分析：整个语料只预处理、向量化一次，再按关键词聚类、识别热门话题
+        
+        返回:
+        - 分析结果文件路径；未启用或没有微博时返回 None
+        """
+        analyzer = get_analyzer()
+        survivors, self.survivors = self.survivors, []
+        if not survivors or analyzer is None:
+            return None
+        logging.info(f"正在对 {len(survivors)} 条微博按关键词进行机器学习分析...")
+        analysis = analyzer.analyze_weibos_by_keyword(
+            survivors,
+            min_score=self.config["min_score"],
+            min_likes=self.config["min_likes"],
+            min_comments=self.config.get("min_comments", 0),
+            min_forwards=self.config.get("min_forwards", 0)
+        )
+        analysis_file = os.path.join(self.result_dir, f"analysis_{self.now}.json")
+        try:
+            with open(analysis_file, 'w', encoding='utf-8') as f:
+                json.dump(analysis, f, ensure_ascii=False, indent=2, default=str)
+            logging.info(f"已保存关键词分析结果到 {analysis_file}")
+        except Exception as e:
+            logging.error(f"保存关键词分析结果时出错: {e}")
+            return None
+        
+        # 输出热门话题
+        for keyword, result in analysis.items():
+            if result.get("trending_topics"):
+                logging.info(f"\n关键词 '{keyword}' 的热门话题:")
+                for topic in result["trending_topics"]:
+                    logging.info(f"- {topic['keyword']} (热度: {topic['score']:.2f}, 相关微博数: {topic['weibo_count']})")
+        return analysis_file
+
+    def comment_candidates(self):
+        """
+        流水线中选出的评论抓取候选
+
+        返回:
+        - 候选微博列表；没有在流水线中选取时返回 None
+        """
+        if self.comment_top_k <= 0:
+            return None
+        self.candidates.sort(key=lambda candidate: candidate[0])
+        return self._select_top([row for _, row in self.candidates], limit=self.comment_top_k)
+
+    def check_failures(self):
+        """有批次处理失败时抛出 RuntimeError，使本次运行以失败结束；已写出的结果保留"""
+        if self.failed_batches:
+            raise RuntimeError(f"结果流水线有 {self.failed_batches} 个批次处理失败，本次结果不完整")
+
+def main(keywords=None, search_mode=None, workers=None):
+    """
+    运行一次完整的爬取流程
+    
+    参数:
+    - keywords: 要爬取的关键词列表，为空时从 keywords.txt 读取
+    - search_mode: 覆盖配置中的爬取模式（user/global）
+    - workers: 覆盖配置中按用户并行爬取的线程数（thread_pool_size）
+    """
     # 加载配置
     config = load_config()
+    if search_mode:
+        config["search_mode"] = search_mode
+    if workers:
+        config["thread_pool_size"] = workers
     
     # 读取关键词列表
-    keywords = read_keywords('keywords.txt')
-    if not keywords:
-        logging.error("未在keywords.txt中找到任何关键词")
-        return
+    if keywords is None:
+        keywords = read_keywords('keywords.txt')
+        if not keywords:
+            logging.error("未在keywords.txt中找到任何关键词")
+            return
 
-    logging.info(f"从keywords.txt中读取到 {len(keywords)} 个关键词")
+        logging.info(f"从keywords.txt中读取到 {len(keywords)} 个关键词")
 
     # 读取关键词分类
     keyword_to_type = load_keyword_classifications()
     logging.info(f"加载了 {len(keyword_to_type)} 个关键词分类信息")
 
-    # 读取用户URL列表
-    user_urls = read_user_urls('user_urls.txt')
-    if not user_urls:
-        logging.error("user_urls.txt中没有找到有效的用户URL")
-        return
-
-    logging.info(f"从user_urls.txt中读取到 {len(user_urls)} 个用户URL")
-
     # 创建爬虫实例
     spider = WeiboSpider()
 
@@ -481,92 +891,71 @@ def main():
     # 当前时间，用于文件命名
     now = datetime.now().strftime("%Y%m%d_%H%M%S")
 
-    # 存储所有结果
-    all_results = []
+    # 每爬完一页就把结果追加到流式输出，中途崩溃时已爬到的结果不会丢失
+    sink = create_sink(config.get("stream_format", "jsonl"), os.path.join(result_dir, f"stream_{now}"))
+    logging.info(f"爬取结果将实时写入: {sink.path}")
 
-    # 处理每个用户
-    for i, user_url in enumerate(user_urls, 1):
-        logging.info(f"\n处理第 {i}/{len(user_urls)} 个用户: {user_url}")
-        user_id = spider._extract_user_id(user_url) or f"user_{i}"
-        
-        # 对每个关键词进行搜索
-        for keyword in keywords:
-            logging.info(f"\n搜索关键词: {keyword}")
-            try:
-                # 爬取该用户的微博
-                results = spider.search_keyword(
-                    user_url=user_url,
-                    keyword=keyword,
-                    pages=1,  # 固定为1页
-                    download_media=config["download_media"]
-                )
-                
-                if results:
-                    # 为每条微博添加用户ID和关键词信息
-                    for result in results:
-                        result['user_id'] = user_id
-                        result['keyword'] = keyword
-                    all_results.extend(results)
-                    logging.info(f"找到 {len(results)} 条包含关键词 '{keyword}' 的微博")
-                else:
-                    logging.info(f"未找到包含关键词 '{keyword}' 的微博")
-                
-            except Exception as e:
-                logging.error(f"处理关键词 {keyword} 时出错: {str(e)}")
-                continue
+    # staged_pipeline 为 True 时每页结果同时进入结果流水线，清理、过滤、评分、入库与爬取并行；
+    # 否则爬取结束后再分块读取流式输出，经同一条流水线处理
+    staged = config.get("staged_pipeline", True)
+    results = ResultPipeline(config, keyword_to_type, now, result_dir, spider=spider,
+                             batch_size=max(1, int(config.get("pipeline_batch_size", 500))) if staged else None).start()
+
+    def on_page(records):
+        sink.write(records)
+        if staged:
+            results.put(records)
+
+    spider.on_page = on_page
+
+    if config.get("search_mode", "user") == "global":
+        # 全站关键词搜索，不依赖用户URL列表
+        crawl_global_search(spider, keywords, config)
+    else:
+        # 读取用户URL列表
+        user_urls = read_user_urls('user_urls.txt')
+        if not user_urls:
+            logging.error("user_urls.txt中没有找到有效的用户URL")
+            spider.on_page = None
+            sink.close()
+            results.finish()
+            return
+
+        logging.info(f"从user_urls.txt中读取到 {len(user_urls)} 个用户URL")
+        crawl_user_timelines(spider, user_urls, keywords, config, workers=config.get("thread_pool_size", 4))
+
+    # 跟进高分微博中的话题：从流式输出中逐块读回已爬到的微博选取话题，话题下的微博经 on_page 与其他结果一起进入后续分析
+    if sink.count:
+        crawl_hashtag_topics(spider, iter_sink_rows(sink, max(1, int(config.get("finalize_chunk_size", 10000)))), config)
+    spider.on_page = None
+    spider.long_text.save_cache(force=True)
+    sink.close()
 
     # 保存所有结果到CSV文件
-    if all_results:
+    if sink.count:
         try:
-            # 转换为DataFrame
-            df_all = pd.DataFrame(all_results)
-            
-            # 清理和重新排序DataFrame
-            df_all = clean_and_reorder_dataframe(df_all)
-
-            # 按自然日过滤最近N天（默认今天+昨天）
-            if config.get("enable_time_filter", True) and 'publish_time' in df_all.columns:
-                now_dt = datetime.now()
-                recent_days = max(1, int(config.get("filter_recent_calendar_days", 2)))
-                df_all['_parsed_dt'] = df_all['publish_time'].apply(lambda s: parse_weibo_time(s, now=now_dt))
-                before_count = len(df_all)
-                df_all = df_all[df_all['_parsed_dt'].apply(lambda d: is_within_recent_calendar_days(d, now_dt, recent_days))]
-                df_all = df_all.drop(columns=['_parsed_dt'])
-                logging.info(f"时间过滤（最近{recent_days}个自然日）后保留 {len(df_all)}/{before_count} 条")
-            
-            # 添加分类信息
-            df_all['keyword_type'] = df_all['keyword'].map(keyword_to_type).fillna('other')
-            
-            # 先按关键词分类排序（show类别优先），然后按点赞量降序排序
-            df_all['is_show'] = (df_all['keyword_type'] == 'show').astype(int)
-            df_all = df_all.sort_values(by=['is_show', 'attitudes_count'], ascending=[False, False])
-            
-            # 删除辅助排序列
-            if 'is_show' in df_all.columns:
-                df_all = df_all.drop(columns=['is_show'])
-            if 'keyword_type' in df_all.columns:
-                df_all = df_all.drop(columns=['keyword_type'])
-            
-            # 不再过滤视频，保留所有微博
-            
-            # 保存为CSV
-            output_file = os.path.join(result_dir, f"all_results_{now}.csv")
-            df_all.to_csv(output_file, index=False, encoding='utf-8-sig')
-            
-            # 删除多余字段，只保留指定字段
-            keep_columns = ['keyword', 'weibo_id', 'content', 'publish_time', 'reposts_count', 'comments_count', 'attitudes_count', 'post_link']
-            existing_keep_columns = [col for col in keep_columns if col in df_all.columns]
-            df_filtered = df_all[existing_keep_columns]
-            df_filtered.to_csv(output_file, index=False, encoding='utf-8-sig')
-            
+            if not staged:
+                results.feed(sink.iter_chunks(max(1, int(config.get("finalize_chunk_size", 10000)))))
+            output_file, exported = results.finish()
+            if output_file is None:
+                logging.warning("时间过滤后没有剩余结果")
+                return
+
             logging.info(f"\n已保存所有微博到: {output_file}")
-            logging.info(f"总共获取到 {len(df_all)} 条微博")
+            logging.info(f"总共获取到 {exported} 条微博")
+            
+            # 评论抓取在后台进行，不阻塞画廊生成；候选已在流水线中选出，否则从汇总CSV逐行读取，只保留前K条
+            candidates = results.comment_candidates()
+            if candidates is not None:
+                comment_future = start_comment_crawl(spider, candidates, config, output_file, selected=True)
+            else:
+                comment_future = start_comment_crawl(spider, iter_csv_rows(output_file), config, output_file)
 
             # 自动生成图片画廊
             try:
                 from create_simple_gallery import create_simple_gallery
                 logging.info("\n正在生成图片画廊...")
-                html_file = create_simple_gallery()
+                html_file = create_simple_gallery(inline_images=config.get("gallery_inline_images", False))
                 
                 if html_file:
                     # 获取完整路径
@@ -602,10 +991,23 @@ def main():
                 logging.warning("图片画廊生成器模块未找到，跳过画廊生成")
             except Exception as e:
                 pass  # 忽略画廊生成错误
+            
+            if comment_future is not None:
+                logging.info("等待后台评论抓取完成...")
+                try:
+                    comment_future.result()
+                except Exception as e:
+                    logging.error(f"评论抓取失败: {e}")
         except Exception as e:
             logging.error(f"保存结果到CSV时出错: {str(e)}")
+        finally:
+            results.check_failures()
     else:
+        results.finish()
         logging.warning("未获取到任何结果")
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description='按关键词爬取微博并生成汇总结果')
+    parser.add_argument('--workers', type=int, help='并行爬取的用户数，覆盖配置中的 thread_pool_size')
+    args = parser.parse_args()
+    main(workers=args.workers)
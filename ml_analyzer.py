@@ -1,30 +1,56 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
+"""
+机器学习分析器
+构造 MLAnalyzer 只读取停用词和准备词典文件：sklearn、xgboost 和 jieba 的词典都在第一次用到时才导入或加载，
+HotContentAnalyzer、WeiboSpider 和 Web 界面每次启动的新进程不再为用不到的模型付出启动时间。
+"""
 
 import os
 import json
-import numpy as np
+import hashlib
 import pandas as pd
 from datetime import datetime
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
-import joblib
-import xgboost as xgb
 from collections import Counter
-import jieba
-import jieba.analyse
-import re
+from external_sort import TopK
+from text_cleaner import clean_text, clean_texts
+from token_cache import get_token_cache, tokenize, build_dictionary, ParallelTokenizer
 import warnings
 warnings.filterwarnings('ignore')
 
+# jieba自定义词典：热门领域的关键词
+CUSTOM_WORDS = [
+    "人工智能", "机器学习", "深度学习", "神经网络", "自然语言处理", 
+    "数字化转型", "元宇宙", "区块链", "大数据", "云计算",
+    "碳中和", "碳达峰", "绿色能源", "可持续发展", 
+    "乡村振兴", "精准扶贫", "脱贫攻坚",
+    # 添加娱乐相关词汇
+    "明星", "综艺", "电影", "电视剧", "演员", "导演", "歌手",
+    "音乐", "演唱会", "热搜", "八卦", "绯闻", "爆料", "票房",
+    "收视率", "网红", "直播", "短视频", "剧情", "粉丝", "流量"
+]
+
+def _to_count(value):
+    """把互动数转换为整数；NaN、空值或无法解析的值记为 0，兼容 "1,234"、"12.0" 这样的写法"""
+    try:
+        if value is None or pd.isna(value):
+            return 0
+    except (TypeError, ValueError):
+        pass
+    try:
+        return int(float(str(value).replace(',', '')))
+    except (TypeError, ValueError):
+        return 0
+
 class MLAnalyzer:
-    def __init__(self, model_dir="models"):
+    def __init__(self, model_dir="models", token_cache_file="token_cache.db", tokenize_workers=None):
         """
         初始化机器学习分析器
         
         参数:
         - model_dir: 模型保存目录
+        - token_cache_file: 分词缓存的持久层文件（位于 model_dir 下），为空时只使用内存缓存
+        - tokenize_workers: 多进程分词的进程数，默认为 CPU 核数；一次需要分词的文本较多时才启用
         """
         self.model_dir = model_dir
         os.makedirs(model_dir, exist_ok=True)
@@ -32,23 +58,24 @@ class MLAnalyzer:
         # 加载中文停用词
         self.stopwords = self._load_stopwords()
         
-        # 初始化XGBoost模型用于内容评分
-        try:
-            self.xgb_model = self._load_or_create_xgb_model()
-            print("XGBoost模型初始化成功")
-        except Exception as e:
-            print(f"XGBoost模型初始化失败: {e}")
-            print("将使用简化评分逻辑")
-            self.xgb_model = None
-        
-        # TF-IDF向量化器，用于主题建模
-        self.vectorizer = TfidfVectorizer(max_features=5000, stop_words=self.stopwords)
+        # XGBoost模型和TF-IDF向量化器在第一次使用时创建
+        self._xgb_model = None
+        self._xgb_loaded = False
+        self._vectorizer = None
         
         # 聚类模型，用于话题聚类
         self.kmeans = None
         
-        # 加载jieba自定义词典
-        self._load_custom_dict()
+        # 准备jieba自定义词典（只在词表变化时重写），词典在第一次分词时加载
+        dictionary = self._load_custom_dict()
+        
+        # 分词与关键词缓存：所有分析器共用，词典变化后使用新的命名空间
+        namespace = hashlib.blake2b('\n'.join(CUSTOM_WORDS).encode('utf-8'), digest_size=8).hexdigest()
+        self.token_cache = get_token_cache(
+            os.path.join(model_dir, token_cache_file) if token_cache_file else None, namespace=namespace)
+        if self.token_cache.tokenizer is tokenize:
+            # 当前进程和工作进程都使用合并了自定义词的词典，分词结果一致
+            self.token_cache.tokenizer = ParallelTokenizer(workers=tokenize_workers, dictionary=dictionary)
         
         print("分析器初始化完成 - 优化版（无BERT依赖）")
     
@@ -73,31 +100,59 @@ class MLAnalyzer:
             return []
     
     def _load_custom_dict(self):
-        """加载自定义词典到jieba"""
+        """
+        写入自定义词典（内容不变时不重写），并生成包含自定义词的jieba词典
+        
+        返回:
+        - 合并后的词典路径，出错时返回 None（使用jieba默认词典）
+        """
         try:
-            # 添加热门领域的关键词
-            custom_words = [
-                "人工智能", "机器学习", "深度学习", "神经网络", "自然语言处理", 
-                "数字化转型", "元宇宙", "区块链", "大数据", "云计算",
-                "碳中和", "碳达峰", "绿色能源", "可持续发展", 
-                "乡村振兴", "精准扶贫", "脱贫攻坚",
-                # 添加娱乐相关词汇
-                "明星", "综艺", "电影", "电视剧", "演员", "导演", "歌手",
-                "音乐", "演唱会", "热搜", "八卦", "绯闻", "爆料", "票房",
-                "收视率", "网红", "直播", "短视频", "剧情", "粉丝", "流量"
-            ]
-            
             custom_dict_file = os.path.join(self.model_dir, "custom_dict.txt")
-            with open(custom_dict_file, 'w', encoding='utf-8') as f:
-                for word in custom_words:
-                    f.write(f"{word} 5\n")  # 词 权重
-            
-            jieba.load_userdict(custom_dict_file)
+            content = ''.join(f"{word} 5\n" for word in CUSTOM_WORDS)  # 词 权重
+            try:
+                with open(custom_dict_file, 'r', encoding='utf-8') as f:
+                    unchanged = f.read() == content
+            except OSError:
+                unchanged = False
+            if not unchanged:
+                with open(custom_dict_file, 'w', encoding='utf-8') as f:
+                    f.write(content)
+            
+            return build_dictionary(custom_dict_file, self.model_dir)
         except Exception as e:
             print(f"加载自定义词典时出错: {e}")
+            return None
+    
+    @property
+    def xgb_model(self):
+        """XGBoost内容评分模型（第一次访问时加载或创建，失败时为 None）"""
+        if not self._xgb_loaded:
+            self._xgb_loaded = True
+            try:
+                self._xgb_model = self._load_or_create_xgb_model()
+                print("XGBoost模型初始化成功")
+            except Exception as e:
+                print(f"XGBoost模型初始化失败: {e}")
+                print("将使用简化评分逻辑")
+                self._xgb_model = None
+        return self._xgb_model
+    
+    @xgb_model.setter
+    def xgb_model(self, model):
+        self._xgb_model = model
+        self._xgb_loaded = True
+    
+    @property
+    def vectorizer(self):
+        """TF-IDF向量化器，用于主题建模"""
+        if self._vectorizer is None:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            self._vectorizer = TfidfVectorizer(max_features=5000, stop_words=self.stopwords)
+        return self._vectorizer
     
     def _load_or_create_xgb_model(self):
         """加载或创建XGBoost模型"""
+        import xgboost as xgb
         xgb_model_path = os.path.join(self.model_dir, "xgboost_content_scorer.model")
         
         if os.path.exists(xgb_model_path):
@@ -124,7 +179,7 @@ class MLAnalyzer:
     
     def preprocess_text(self, text):
         """
-        预处理文本内容
+        预处理文本内容（去除HTML标签、[表情]、链接、零宽字符和emoji，合并空白）
         
         参数:
         - text: 原始文本
@@ -132,64 +187,19 @@ class MLAnalyzer:
         返回:
         - 处理后的文本
         """
-        if not text:
-            return ""
-            
-        try:
-            # 转换为字符串
-            text = str(text)
-            
-            # 移除HTML标签
-            text = re.sub(r'<[^>]+>', '', text)
-            
-            # 移除URL
-            text = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', '', text)
-            
-            # 移除表情符号和特殊字符
-            text = re.sub(r'[\U0001F300-\U0001F9FF]', '', text)
-            
-            # 移除所有换行符和多余的空格
-            text = re.sub(r'\s+', ' ', text)
-            
-            # 移除首尾空格
-            text = text.strip()
-            
-            return text
-            
-        except Exception as e:
-            print(f"预处理文本时出错: {e}")
-        
-        # 去除HTML标签
-        text = re.sub(r'<[^>]+>', '', text)
-        
-        # 去除URL
-        text = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', '', text)
-        
-        # 去除@用户
-        text = re.sub(r'@[\w\-]+', '', text)
-        
-        # 去除话题标签 #xxx#
-        text = re.sub(r'#([^#]+)#', r'\1', text)
-        
-        # 去除表情符号
-        emoji_pattern = re.compile("["
-                               u"\U0001F600-\U0001F64F"  # emoticons
-                               u"\U0001F300-\U0001F5FF"  # symbols & pictographs
-                               u"\U0001F680-\U0001F6FF"  # transport & map symbols
-                               u"\U0001F700-\U0001F77F"  # alchemical symbols
-                               u"\U0001F780-\U0001F7FF"  # Geometric Shapes
-                               u"\U0001F800-\U0001F8FF"  # Supplemental Arrows-C
-                               u"\U0001F900-\U0001F9FF"  # Supplemental Symbols and Pictographs
-                               u"\U0001FA00-\U0001FA6F"  # Chess Symbols
-                               u"\U0001FA70-\U0001FAFF"  # Symbols and Pictographs Extended-A
-                               u"\U00002702-\U000027B0"  # Dingbats
-                               "]+", flags=re.UNICODE)
-        text = emoji_pattern.sub(r'', text)
-        
-        # 去除多余的空格
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        return text
+        return clean_text(text, strip_emoji=True)
+    
+    def preprocess_texts(self, texts):
+        """
+        批量预处理文本内容
+        
+        参数:
+        - texts: 原始文本列表
+        
+        返回:
+        - 处理后的文本列表
+        """
+        return clean_texts(texts, strip_emoji=True)
     
     def extract_keywords(self, text, topk=10):
         """
@@ -202,13 +212,18 @@ class MLAnalyzer:
         返回:
         - 关键词列表和权重
         """
-        if not text:
+        if not text or not isinstance(text, str):
             return [], []
         
-        # 使用jieba提取关键词
-        keywords = jieba.analyse.extract_tags(text, topK=topk, withWeight=True)
+        # 使用jieba提取关键词（分词结果按正文缓存）
+        keywords = self.token_cache.keywords(text, topk)
         return [k[0] for k in keywords], [k[1] for k in keywords]
     
+    def _doc_keywords(self, docs, topk=5):
+        """批量提取每篇文本的关键词（不含权重）"""
+        return [[k[0] for k in keywords] if doc else []
+                for doc, keywords in zip(docs, self.token_cache.keywords_many(docs, topk))]
+    
     def get_simple_sentiment(self, text):
         """
         使用简单关键词匹配进行情感分析（替代BERT情感分析）
@@ -335,7 +350,7 @@ class MLAnalyzer:
         
         try:
             # 提取内容
-            contents = [self.preprocess_text(item.get('content', '')) for item in weibo_list]
+            contents = self.preprocess_texts([item.get('content', '') for item in weibo_list])
             valid_contents = [c for c in contents if c]
             
             if len(valid_contents) < n_clusters:
@@ -343,67 +358,70 @@ class MLAnalyzer:
             
             # 向量化
             X = self.vectorizer.fit_transform(valid_contents)
-            
-            # 聚类
-            self.kmeans = KMeans(n_clusters=n_clusters, random_state=42)
-            cluster_labels = self.kmeans.fit_predict(X)
-            
-            # 获取每个聚类的关键词
-            cluster_keywords = {}
-            feature_names = self.vectorizer.get_feature_names_out()
-            
-            for i in range(n_clusters):
-                # 找出属于该聚类的所有文档索引
-                indices = [j for j, label in enumerate(cluster_labels) if label == i]
-                
-                if not indices:
-                    continue
-                
-                # 收集该聚类中的所有文档
-                cluster_docs = [valid_contents[j] for j in indices]
-                
-                # 提取该聚类的关键词
-                all_keywords = []
-                for doc in cluster_docs:
-                    keywords, _ = self.extract_keywords(doc, topk=5)
-                    all_keywords.extend(keywords)
-                
-                # 统计关键词频率
-                keyword_counter = Counter(all_keywords)
-                top_keywords = keyword_counter.most_common(5)
-                
-                cluster_keywords[i] = [kw[0] for kw in top_keywords]
-            
-            return cluster_labels, cluster_keywords
+            return self._cluster_matrix(X, valid_contents, n_clusters)
             
         except Exception as e:
             print(f"聚类分析时出错: {e}")
             return [], {}
     
-    def filter_noise(self, weibo_list, min_score=50, min_likes=500, min_comments=0, min_forwards=0):
+    def _cluster_matrix(self, X, docs, n_clusters, doc_keywords=None):
+        """
+        对已向量化的文档聚类，并统计每个聚类的关键词
+        
+        参数:
+        - X: 文档的TF-IDF矩阵
+        - docs: 与 X 各行对应的文本
+        - n_clusters: 聚类数量
+        - doc_keywords: 每篇文档的前5个关键词，为空时现场提取
+        
+        返回:
+        - 聚类标签和每个聚类的关键词
+        """
+        # 聚类
+        from sklearn.cluster import KMeans
+        self.kmeans = KMeans(n_clusters=n_clusters, random_state=42)
+        cluster_labels = self.kmeans.fit_predict(X)
+        if doc_keywords is None:
+            doc_keywords = self._doc_keywords(docs, topk=5)
+        
+        # 获取每个聚类的关键词：统计该聚类中所有文档关键词的频率
+        cluster_keywords = {}
+        for i in range(n_clusters):
+            # 找出属于该聚类的所有文档索引
+            indices = [j for j, label in enumerate(cluster_labels) if label == i]
+            if not indices:
+                continue
+            keyword_counter = Counter(keyword for j in indices for keyword in doc_keywords[j])
+            cluster_keywords[i] = [kw[0] for kw in keyword_counter.most_common(5)]
+        
+        return cluster_labels, cluster_keywords
+    
+    def filter_noise(self, weibo_list, min_score=50, min_likes=500, min_comments=0, min_forwards=0, limit=None):
         """
         过滤低质量内容
         
         参数:
-        - weibo_list: 微博数据列表
+        - weibo_list: 微博数据列表（也可以是逐条生成的可迭代对象）
         - min_score: 最低质量分数阈值（已弃用，保留参数为了兼容性）
         - min_likes: 最低点赞数（默认500）
         - min_comments: 最低评论数（默认0）
         - min_forwards: 最低转发数（默认0）
+        - limit: 只需要排名前 limit 条时使用堆选取，不保留和排序全部通过筛选的微博
         
         返回:
         - 过滤后的微博列表
         """
-        if not weibo_list:
+        if weibo_list is None:
             return []
         
-        filtered_list = []
+        filtered_list = TopK(self._noise_order_key, limit) if limit is not None else []
         for weibo in weibo_list:
             # 1. 进行硬性筛选 - 点赞数、评论数和转发数必须达到要求
+            # 兼容爬虫原始字段名（attitudes_count/comments_count/reposts_count）
             try:
-                likes = int(float(weibo.get('likes', 0)))
-                comments = int(float(weibo.get('comments', 0)))
-                forwards = int(float(weibo.get('forwards', 0)))
+                likes = int(float(weibo.get('likes', weibo.get('attitudes_count', 0))))
+                comments = int(float(weibo.get('comments', weibo.get('comments_count', 0))))
+                forwards = int(float(weibo.get('forwards', weibo.get('reposts_count', 0))))
             except (ValueError, TypeError):
                 likes = 0
                 comments = 0
@@ -421,21 +439,36 @@ class MLAnalyzer:
                 weibo['content_score'] = 50  # 设置默认分数
         
             # 3. 添加到保留列表
-            filtered_list.append(weibo)
+            if limit is not None:
+                filtered_list.add((weibo,))
+            else:
+                filtered_list.append(weibo)
+        
+        if limit is not None:
+            return list(filtered_list)
         
         # 4. 尝试按点赞数和内容分数排序
         try:
-            filtered_list.sort(key=lambda x: (float(x.get('likes', 0)), x.get('content_score', 0)), reverse=True)
+            filtered_list.sort(key=lambda x: (float(x.get('likes', x.get('attitudes_count', 0))), x.get('content_score', 0)), reverse=True)
         except Exception as e:
             print(f"排序时出错: {e}")
             # 至少按点赞数排序
             try:
-                filtered_list.sort(key=lambda x: float(x.get('likes', 0)), reverse=True)
+                filtered_list.sort(key=lambda x: float(x.get('likes', x.get('attitudes_count', 0))), reverse=True)
             except:
                 pass  # 如果还是出错，就保持原始顺序
         
         return filtered_list
     
+    @staticmethod
+    def _noise_order_key(weibo):
+        """filter_noise 的排序键（升序）：点赞数降序，然后内容分数降序"""
+        try:
+            likes = float(weibo.get('likes', weibo.get('attitudes_count', 0)))
+        except (ValueError, TypeError):
+            likes = 0.0
+        return (-likes, -weibo.get('content_score', 0))
+    
     def identify_trending_topics(self, weibo_list, top_n=5):
         """
         识别热门话题
@@ -451,11 +484,9 @@ class MLAnalyzer:
             return []
         
         try:
-            # 提取所有内容
-            all_content = " ".join([weibo.get('content', '') for weibo in weibo_list])
-            
-            # 提取关键词
-            keywords, weights = self.extract_keywords(all_content, topk=top_n*2)
+            # 提取所有内容拼接后的关键词（由每条微博缓存的分词结果合并词频得到）
+            contents = [weibo.get('content', '') for weibo in weibo_list]
+            keywords = [k[0] for k in self.token_cache.corpus_keywords(contents, topk=top_n*2)] if any(contents) else []
             
             # 按照互动数据和内容分数计算每个关键词的热度
             keyword_trends = []
@@ -497,6 +528,44 @@ class MLAnalyzer:
             #print(f"识别热门话题时出错: {e}")
             return []
     
+    def _prepare_weibos(self, weibo_list, min_likes=500, min_comments=0, min_forwards=0):
+        """
+        按互动数过滤，并为保留下来的微博生成去掉无关字段、正文已预处理的副本
+        
+        参数:
+        - weibo_list: 微博数据列表
+        - min_likes: 最低点赞数
+        - min_comments: 最低评论数
+        - min_forwards: 最低转发数
+        
+        返回:
+        - 副本列表
+        """
+        # 1. 过滤噪声（只读取互动数，不复制原始数据）
+        # 2. 只为保留下来的微博生成去掉无关字段的副本
+        filtered_weibos = []
+        for weibo in weibo_list:
+            if not (_to_count(weibo.get('attitudes_count', 0)) >= min_likes and
+                    _to_count(weibo.get('comments_count', 0)) >= min_comments and
+                    _to_count(weibo.get('reposts_count', 0)) >= min_forwards):
+                continue
+            
+            # 移除不需要的字段
+            weibo_copy = {k: v for k, v in weibo.items() 
+                        if k not in ['user_id', 'image_urls', 'local_image_paths', 'source']}
+            
+            # 确保有post_link
+            if 'post_link' not in weibo_copy and 'weibo_id' in weibo_copy:
+                weibo_copy['post_link'] = f"https://weibo.com/detail/{weibo_copy['weibo_id']}"
+            
+            filtered_weibos.append(weibo_copy)
+        
+        # 批量预处理文本内容
+        with_content = [weibo for weibo in filtered_weibos if 'content' in weibo]
+        for weibo, content in zip(with_content, self.preprocess_texts([weibo['content'] for weibo in with_content])):
+            weibo['content'] = content
+        return filtered_weibos
+    
     def analyze_weibos(self, weibo_list, min_score=50, min_likes=500, min_comments=0, min_forwards=0, n_clusters=5):
         """
         分析微博列表，执行所有分析步骤
@@ -515,62 +584,96 @@ class MLAnalyzer:
         if not weibo_list:
             return {"error": "输入数据为空"}
         
+        print(f"开始分析 {len(weibo_list)} 条微博...")
+        results = self.analyze_weibos_by_keyword({None: weibo_list}, min_score=min_score, min_likes=min_likes,
+                                                 min_comments=min_comments, min_forwards=min_forwards,
+                                                 n_clusters=n_clusters)
+        return results.get(None, {"error": "输入数据为空"})
+    
+    def analyze_weibos_by_keyword(self, weibo_groups, min_score=50, min_likes=500, min_comments=0, min_forwards=0,
+                                  n_clusters=5, keyword_field='keyword'):
+        """
+        一次分析多个关键词的微博
+        
+        整个语料只预处理、向量化（TF-IDF 在全部关键词的文本上拟合一次）和提取文档关键词一次，
+        然后按关键词分别聚类、识别热门话题。词的 IDF 来自全部语料，因此与逐个关键词调用 analyze_weibos 相比，
+        聚类结果可能略有不同，返回结构相同。
+        
+        参数:
+        - weibo_groups: {关键词: 微博列表}，或带 keyword_field 字段的微博列表（按该字段分组）
+        - min_score: 过滤噪声的最低分数阈值
+        - min_likes: 最低点赞数
+        - min_comments: 最低评论数
+        - min_forwards: 最低转发数
+        - n_clusters: 聚类数量
+        - keyword_field: weibo_groups 为列表时用于分组的字段
+        
+        返回:
+        - {关键词: 分析结果字典}，每个结果的结构与 analyze_weibos 的返回相同；没有微博的关键词不在结果中
+        """
+        if not isinstance(weibo_groups, dict):
+            groups = {}
+            for weibo in weibo_groups or []:
+                groups.setdefault(weibo.get(keyword_field), []).append(weibo)
+            weibo_groups = groups
+        
+        results = {}
         try:
-            print(f"开始分析 {len(weibo_list)} 条微博...")
-            
-            # 1. 数据预处理
-            processed_weibos = []
-            for weibo in weibo_list:
-                # 移除不需要的字段
-                weibo_copy = {k: v for k, v in weibo.items() 
-                            if k not in ['user_id', 'image_urls', 'local_image_paths', 'source']}
+            # 1. 一次过滤、复制并预处理全部微博
+            prepared = {}
+            for keyword, weibo_list in weibo_groups.items():
+                if weibo_list:
+                    prepared[keyword] = self._prepare_weibos(weibo_list, min_likes, min_comments, min_forwards)
+            
+            # 2. 在全部非空正文上拟合一次 TF-IDF，记录每个关键词在矩阵中的行
+            docs = []
+            rows = {}
+            for keyword, filtered_weibos in prepared.items():
+                if len(filtered_weibos) < n_clusters:
+                    continue
+                valid_contents = [c for c in (weibo.get('content', '') for weibo in filtered_weibos) if c]
+                if len(valid_contents) >= n_clusters:
+                    rows[keyword] = (len(docs), len(docs) + len(valid_contents))
+                    docs.extend(valid_contents)
+            X = self.vectorizer.fit_transform(docs) if docs else None
+            doc_keywords = self._doc_keywords(docs, topk=5)
+            
+            for keyword, filtered_weibos in prepared.items():
+                weibo_list = weibo_groups[keyword]
+                print(f"关键词 {keyword or '全部'}: 过滤后保留 {len(filtered_weibos)}/{len(weibo_list)} 条有价值内容")
                 
-                # 确保有post_link
-                if 'post_link' not in weibo_copy and 'weibo_id' in weibo_copy:
-                    weibo_copy['post_link'] = f"https://weibo.com/detail/{weibo_copy['weibo_id']}"
+                # 3. 话题聚类
+                cluster_labels, cluster_keywords = [], {}
+                if keyword in rows:
+                    start, end = rows[keyword]
+                    try:
+                        cluster_labels, cluster_keywords = self._cluster_matrix(
+                            X[start:end], docs[start:end], n_clusters, doc_keywords[start:end])
+                    except Exception as e:
+                        print(f"聚类分析时出错: {e}")
                 
-                # 预处理文本内容
-                if 'content' in weibo_copy:
-                    weibo_copy['content'] = self.preprocess_text(weibo_copy['content'])
+                # 4. 识别热门话题
+                trending_topics = self.identify_trending_topics(filtered_weibos)
                 
-                processed_weibos.append(weibo_copy)
-            
-            # 2. 过滤噪声
-            filtered_weibos = []
-            for weibo in processed_weibos:
-                if (int(weibo.get('attitudes_count', 0)) >= min_likes and
-                    int(weibo.get('comments_count', 0)) >= min_comments and
-                    int(weibo.get('reposts_count', 0)) >= min_forwards):
-                    filtered_weibos.append(weibo)
-            
-            print(f"过滤后保留 {len(filtered_weibos)} 条有价值内容")
-            print(f"筛选条件: 点赞数 >= {min_likes}, 评论数 >= {min_comments}, 转发数 >= {min_forwards}")
-            
-            # 3. 话题聚类
-            cluster_labels, cluster_keywords = self.cluster_topics(filtered_weibos, n_clusters)
-            
-            # 4. 识别热门话题
-            trending_topics = self.identify_trending_topics(filtered_weibos)
-            
-            # 返回分析结果
-            result = {
-                "original_count": len(weibo_list),
-                "filtered_count": len(filtered_weibos),
-                "filtered_weibos": filtered_weibos,
-                "cluster_keywords": cluster_keywords,
-                "trending_topics": trending_topics,
-                "filter_criteria": {
-                    "min_likes": min_likes,
-                    "min_comments": min_comments,
-                    "min_forwards": min_forwards
+                results[keyword] = {
+                    "original_count": len(weibo_list),
+                    "filtered_count": len(filtered_weibos),
+                    "filtered_weibos": filtered_weibos,
+                    "cluster_keywords": cluster_keywords,
+                    "trending_topics": trending_topics,
+                    "filter_criteria": {
+                        "min_likes": min_likes,
+                        "min_comments": min_comments,
+                        "min_forwards": min_forwards
+                    }
                 }
-            }
-            
-            return result
+            print(f"筛选条件: 点赞数 >= {min_likes}, 评论数 >= {min_comments}, 转发数 >= {min_forwards}")
         
         except Exception as e:
             print(f"分析微博时出错: {e}")
-            return {"error": str(e)}
+            return {keyword: {"error": str(e)} for keyword in weibo_groups}
+        
+        return results
     
     def update_model_with_feedback(self, weibo_data, user_score):
         """
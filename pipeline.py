@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+分阶段流水线
+每个阶段在自己的线程中运行，阶段之间用有界队列连接：下游处理不过来时队列被填满，上游的 put 会阻塞，
+压力一直传回到数据源（例如爬虫的 on_page 回调），内存中同时存在的批次数不超过各队列容量之和。
+每个阶段只有一个线程，批次按输入顺序流过所有阶段，结果与逐批顺序执行完全相同；
+不同阶段可以同时处理不同的批次，因此计算密集的阶段可以和网络请求重叠进行。
+"""
+
+import time
+import queue
+import logging
+import threading
+
+_DONE = object()
+
+
+class Stage:
+    """流水线中的一个阶段"""
+
+    def __init__(self, name, func):
+        """
+        参数:
+        - name: 阶段名，用于统计输出
+        - func: 处理函数，参数为一个批次，返回处理后的批次；返回 None 表示丢弃该批次
+        """
+        self.name = name
+        self.func = func
+        self.items_in = 0
+        self.items_out = 0
+        self.records_in = 0
+        self.records_out = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.depth_max = 0
+        self._depth_total = 0
+
+    def stats(self, elapsed):
+        """
+        阶段统计
+
+        参数:
+        - elapsed: 流水线运行的总时间（秒）
+
+        返回:
+        - 统计字典：批次数、记录数、忙碌时间、吞吐量（记录/秒，按忙碌时间计算）、利用率、输入队列的最大和平均深度
+        """
+        return {
+            'stage': self.name,
+            'batches': self.items_in,
+            'records_in': self.records_in,
+            'records_out': self.records_out,
+            'errors': self.errors,
+            'busy_seconds': self.busy,
+            'throughput': self.records_in / self.busy if self.busy > 0 else 0.0,
+            'utilization': self.busy / elapsed if elapsed > 0 else 0.0,
+            'queue_max': self.depth_max,
+            'queue_avg': self._depth_total / self.items_in if self.items_in else 0.0,
+        }
+
+
+def _size(item):
+    try:
+        return len(item)
+    except TypeError:
+        return 1
+
+
+class Pipeline:
+    """由有界队列连接的多阶段流水线"""
+
+    def __init__(self, stages, queue_size=4, batch_size=None, name='pipeline'):
+        """
+        参数:
+        - stages: Stage 列表，按顺序执行
+        - queue_size: 每个阶段输入队列的容量（批次数）
+        - batch_size: 不为空时，put 传入的记录先合并到至少 batch_size 条再作为一个批次进入流水线
+        - name: 流水线名称，用于日志
+        """
+        self.stages = list(stages)
+        self.name = name
+        self.batch_size = batch_size
+        self.queues = [queue.Queue(maxsize=max(1, int(queue_size))) for _ in self.stages]
+        self._pending = []
+        self._lock = threading.Lock()
+        self._threads = []
+        self._started = None
+        self.elapsed = 0.0
+
+    def start(self):
+        """启动各阶段的线程"""
+        self._started = time.perf_counter()
+        for i, stage in enumerate(self.stages):
+            output = self.queues[i + 1] if i + 1 < len(self.stages) else None
+            thread = threading.Thread(target=self._run_stage, args=(stage, self.queues[i], output),
+                                      name=f"{self.name}-{stage.name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def _run_stage(self, stage, input_queue, output_queue):
+        while True:
+            depth = input_queue.qsize()
+            item = input_queue.get()
+            if item is _DONE:
+                if output_queue is not None:
+                    output_queue.put(_DONE)
+                return
+            stage.items_in += 1
+            stage.records_in += _size(item)
+            stage._depth_total += depth
+            stage.depth_max = max(stage.depth_max, depth)
+
+            started = time.perf_counter()
+            try:
+                result = stage.func(item)
+            except Exception as e:
+                stage.errors += 1
+                logging.error(f"流水线阶段 {stage.name} 处理批次时出错: {e}")
+                result = None
+            stage.busy += time.perf_counter() - started
+
+            if result is None:
+                continue
+            stage.items_out += 1
+            stage.records_out += _size(result)
+            if output_queue is not None:
+                # 下游队列满时阻塞，形成反压
+                output_queue.put(result)
+
+    def put(self, item):
+        """
+        向流水线输入一个批次（设置了 batch_size 时为若干条记录）；第一个阶段的队列满时阻塞
+
+        参数:
+        - item: 批次
+        """
+        if self.batch_size is None:
+            self.queues[0].put(item)
+            return
+        with self._lock:
+            self._pending.extend(item)
+            if len(self._pending) < self.batch_size:
+                return
+            batch, self._pending = self._pending, []
+            self.queues[0].put(batch)
+
+    def feed(self, items):
+        """依次输入可迭代对象中的每个批次"""
+        for item in items:
+            self.put(item)
+
+    def close(self):
+        """
+        输入结束，等待所有批次处理完成
+
+        返回:
+        - 各阶段的统计列表
+        """
+        with self._lock:
+            if self._pending:
+                self.queues[0].put(self._pending)
+                self._pending = []
+        self.queues[0].put(_DONE)
+        for thread in self._threads:
+            thread.join()
+        self.elapsed = time.perf_counter() - self._started
+        return self.stats()
+
+    @property
+    def failed_batches(self):
+        """处理时出错而被丢弃的批次数（各阶段之和）"""
+        return sum(stage.errors for stage in self.stages)
+
+    def stats(self):
+        """各阶段的统计列表"""
+        return [stage.stats(self.elapsed) for stage in self.stages]
+
+    def report(self):
+        """把各阶段的吞吐量和队列深度写入日志"""
+        logging.info(f"{self.name} 用时 {self.elapsed:.2f} 秒")
+        for stats in self.stats():
+            logging.info(
+                f"  {stats['stage']:<12} 批次 {stats['batches']:>6}  记录 {stats['records_in']:>8} -> {stats['records_out']:<8} "
+                f"忙碌 {stats['busy_seconds']:7.2f}s  {stats['throughput']:9.0f} 条/秒  利用率 {stats['utilization']:5.1%}  "
+                f"队列 最大 {stats['queue_max']} 平均 {stats['queue_avg']:.1f}"
+                + (f"  出错 {stats['errors']}" if stats['errors'] else ""))
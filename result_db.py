@@ -0,0 +1,271 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+嵌入式结果数据库（SQLite，本地单文件）
+posts 表以 weibo_id 为主键，每次运行按 weibo_id 更新（upsert），同一条微博只保留一行且互动数为最新值；
+first_run / last_run 记录首次与最近一次被爬到的运行批次。同一条微博可能被多个关键词爬到，posts.keyword 只记录
+最近一次的关键词，全部关键词记录在 post_keywords 表中，按关键词查询时以它为准。user_id、keyword、发布时间和
+点赞数上建有索引，分析器和 Web 界面直接按条件查询，不再重新读取各次运行的 CSV 快照。
+"""
+
+import os
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+DEFAULT_DB_PATH = os.path.join("results", "weibo.db")
+
+POST_COLUMNS = (
+    'weibo_id', 'keyword', 'type', 'user_id', 'user_name', 'content', 'publish_time', 'publish_ts',
+    'reposts_count', 'comments_count', 'attitudes_count', 'source', 'post_link',
+    'video_url', 'video_cover', 'image_urls', 'first_run', 'last_run',
+)
+INT_COLUMNS = ('reposts_count', 'comments_count', 'attitudes_count')
+# 重复爬到时保留首次记录的列，其余列取最新值
+KEEP_FIRST_COLUMNS = ('weibo_id', 'first_run')
+ORDER_COLUMNS = ('attitudes_count', 'comments_count', 'reposts_count', 'publish_ts', 'last_run')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    weibo_id TEXT PRIMARY KEY,
+    keyword TEXT,
+    type TEXT,
+    user_id TEXT,
+    user_name TEXT,
+    content TEXT,
+    publish_time TEXT,
+    publish_ts INTEGER,
+    reposts_count INTEGER DEFAULT 0,
+    comments_count INTEGER DEFAULT 0,
+    attitudes_count INTEGER DEFAULT 0,
+    source TEXT,
+    post_link TEXT,
+    video_url TEXT,
+    video_cover TEXT,
+    image_urls TEXT,
+    first_run TEXT,
+    last_run TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_posts_user_id ON posts(user_id);
+CREATE INDEX IF NOT EXISTS idx_posts_keyword ON posts(keyword);
+CREATE INDEX IF NOT EXISTS idx_posts_publish_ts ON posts(publish_ts);
+CREATE INDEX IF NOT EXISTS idx_posts_attitudes ON posts(attitudes_count);
+CREATE INDEX IF NOT EXISTS idx_posts_last_run ON posts(last_run);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    created_at TEXT,
+    post_count INTEGER
+);
+"""
+
+# 微博与关键词的多对多关系；旧数据库首次打开时从 posts.keyword 回填
+KEYWORD_SCHEMA = """
+CREATE TABLE post_keywords (
+    weibo_id TEXT NOT NULL,
+    keyword TEXT NOT NULL,
+    PRIMARY KEY (weibo_id, keyword)
+);
+CREATE INDEX idx_post_keywords_keyword ON post_keywords(keyword);
+INSERT OR IGNORE INTO post_keywords (weibo_id, keyword)
+    SELECT weibo_id, keyword FROM posts WHERE keyword IS NOT NULL AND keyword != '';
+"""
+
+
+def _to_int(value):
+    try:
+        if value is None or pd.isna(value):
+            return 0
+    except (TypeError, ValueError):
+        pass
+    try:
+        return int(float(str(value).replace(',', '')))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _to_text(value):
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple)):
+        return json.dumps(list(value), ensure_ascii=False)
+    try:
+        if pd.isna(value):
+            return None
+    except (TypeError, ValueError):
+        pass
+    return str(value)
+
+
+class ResultDB:
+    """微博结果数据库"""
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        """
+        打开（必要时创建）数据库
+
+        参数:
+        - path: 数据库文件路径
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        if not self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name='post_keywords'").fetchone():
+            self.conn.executescript(KEYWORD_SCHEMA)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _row(self, weibo, run_id, parse_time):
+        row = {}
+        for column in POST_COLUMNS:
+            if column in INT_COLUMNS:
+                row[column] = _to_int(weibo.get(column))
+            else:
+                row[column] = _to_text(weibo.get(column))
+        row['publish_ts'] = None
+        if parse_time is not None:
+            dt = parse_time(weibo.get('publish_time', ''))
+            if dt is not None:
+                row['publish_ts'] = int(dt.timestamp())
+        row['first_run'] = row['last_run'] = run_id
+        return tuple(row[column] for column in POST_COLUMNS)
+
+    def upsert_posts(self, weibos, run_id, parse_time=None):
+        """
+        按 weibo_id 写入或更新微博，并记录微博与关键词的对应关系
+
+        参数:
+        - weibos: 微博字典/记录列表，或结果 DataFrame
+        - run_id: 运行批次，格式为 YYYYMMDD_HHMMSS
+        - parse_time: 可选，把 publish_time 解析为 datetime 的函数，用于填充 publish_ts 索引列
+
+        返回:
+        - 写入的行数
+        """
+        if isinstance(weibos, pd.DataFrame):
+            weibos = weibos.to_dict('records')
+        rows = [self._row(weibo, run_id, parse_time) for weibo in weibos if weibo.get('weibo_id')]
+        if not rows:
+            return 0
+
+        placeholders = ", ".join("?" for _ in POST_COLUMNS)
+        updates = ", ".join(f"{column}=excluded.{column}" for column in POST_COLUMNS
+                            if column not in KEEP_FIRST_COLUMNS and column != 'publish_ts')
+        # 相对时间（如“5分钟前”）只在首次解析时准确，未能解析时保留已有的发布时间
+        updates += ", publish_ts=COALESCE(excluded.publish_ts, publish_ts)"
+        sql = (f"INSERT INTO posts ({', '.join(POST_COLUMNS)}) VALUES ({placeholders}) "
+               f"ON CONFLICT(weibo_id) DO UPDATE SET {updates}")
+        weibo_index, keyword_index = POST_COLUMNS.index('weibo_id'), POST_COLUMNS.index('keyword')
+        memberships = [(row[weibo_index], row[keyword_index]) for row in rows if row[keyword_index]]
+        with self._lock, self.conn:
+            self.conn.executemany(sql, rows)
+            self.conn.executemany("INSERT OR IGNORE INTO post_keywords (weibo_id, keyword) VALUES (?, ?)",
+                                  memberships)
+            # 同一批次分多次写入时累加条数
+            self.conn.execute(
+                "INSERT INTO runs (run_id, created_at, post_count) VALUES (?, ?, ?) "
+                "ON CONFLICT(run_id) DO UPDATE SET post_count = post_count + excluded.post_count",
+                (run_id, datetime.now().isoformat(timespec='seconds'), len(rows)))
+        print(f"已写入 {len(rows)} 条微博到结果数据库: {self.path}")
+        return len(rows)
+
+    def latest_run_id(self):
+        """最近一次写入的运行批次，没有时返回 None"""
+        row = self.conn.execute("SELECT MAX(run_id) FROM runs").fetchone()
+        return row[0] if row else None
+
+    def query_posts(self, columns=None, keyword=None, user_id=None, run_id=None, latest_run=False,
+                    since=None, min_likes=None, order_by='attitudes_count', limit=None):
+        """
+        按条件查询微博
+
+        参数:
+        - columns: 需要的列，为空时返回全部列
+        - keyword: 关键词或关键词列表，匹配爬到过该微博的任一关键词（post_keywords 表）
+        - user_id: 用户ID
+        - run_id: 只返回该批次中爬到的微博
+        - latest_run: 为 True 时只返回最近一次运行爬到的微博
+        - since: 只返回发布时间不早于该 datetime 的微博
+        - min_likes: 最低点赞数
+        - order_by: 降序排列的列，默认按点赞数
+        - limit: 最多返回的行数
+
+        返回:
+        - DataFrame
+        """
+        if columns is None:
+            columns = list(POST_COLUMNS)
+        else:
+            columns = [column for column in columns if column in POST_COLUMNS]
+        if latest_run and not run_id:
+            run_id = self.latest_run_id()
+
+        conditions, params = [], []
+        if keyword is not None:
+            keywords = [keyword] if isinstance(keyword, str) else list(keyword)
+            conditions.append("weibo_id IN (SELECT weibo_id FROM post_keywords "
+                              f"WHERE keyword IN ({', '.join('?' for _ in keywords)}))")
+            params.extend(keywords)
+        if user_id is not None:
+            conditions.append("user_id = ?")
+            params.append(str(user_id))
+        if run_id:
+            conditions.append("last_run = ?")
+            params.append(run_id)
+        if since is not None:
+            conditions.append("publish_ts >= ?")
+            params.append(int(since.timestamp()))
+        if min_likes is not None:
+            conditions.append("attitudes_count >= ?")
+            params.append(int(min_likes))
+
+        sql = f"SELECT {', '.join(columns)} FROM posts"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        if order_by in ORDER_COLUMNS:
+            sql += f" ORDER BY {order_by} DESC"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        with self._lock:
+            cursor = self.conn.execute(sql, params)
+            rows = cursor.fetchall()
+        df = pd.DataFrame(rows, columns=columns)
+        if 'image_urls' in df.columns:
+            df['image_urls'] = df['image_urls'].apply(lambda v: json.loads(v) if isinstance(v, str) and v else [])
+        return df
+
+
+def open_db(path=DEFAULT_DB_PATH, create=False):
+    """
+    打开结果数据库
+
+    参数:
+    - path: 数据库文件路径
+    - create: 文件不存在时是否创建
+
+    返回:
+    - ResultDB，文件不存在且不创建时返回 None
+    """
+    if not path or (not create and not os.path.exists(path)):
+        return None
+    try:
+        return ResultDB(path)
+    except sqlite3.Error as e:
+        print(f"打开结果数据库失败: {e}")
+        return None
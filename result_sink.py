@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+流式结果输出
+爬虫每处理完一页就把该页的记录追加到输出文件，程序中途崩溃时已爬到的结果不会丢失；
+最终的清理、排序和列选择由 main.ResultPipeline 完成（爬取时逐页处理，或爬取后分块读取这些文件），内存占用与批次大小有关，而与结果总量无关。
+支持三种格式：
+- jsonl: 每行一条记录（默认，保留全部字段和列表字段）
+- csv: 固定列的CSV，列表字段以JSON字符串保存
+- parquet: 目录中每个行组一个 Parquet 文件（需要 pyarrow），每个文件写完即完整可读
+"""
+
+import os
+import csv
+import json
+import threading
+
+import pandas as pd
+
+from weibo_record import RECORD_FIELDS, records_to_dataframe
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_ARROW = True
+except ImportError:
+    pa = pq = None
+    HAS_ARROW = False
+
+# CSV/Parquet 输出的固定列，其他字段只在 JSONL 中保留
+STREAM_COLUMNS = tuple(field for field in RECORD_FIELDS if field != 'type') + ('post_link',)
+LIST_COLUMNS = ('image_urls', 'local_image_paths')
+INT_COLUMNS = ('reposts_count', 'comments_count', 'attitudes_count')
+
+
+def _plain(value):
+    """转换为可JSON序列化的值"""
+    if isinstance(value, (list, tuple)):
+        return [str(item) for item in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+class ResultSink:
+    """流式结果输出的基类"""
+
+    extension = ''
+
+    def __init__(self, path):
+        """
+        参数:
+        - path: 输出路径
+        """
+        self.path = path
+        self.count = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def write(self, records):
+        """
+        追加一批记录并立即落盘
+
+        参数:
+        - records: 微博字典或 WeiboRecord 的列表
+        """
+        records = list(records)
+        if not records:
+            return
+        with self._lock:
+            self._write(records)
+            self.count += len(records)
+
+    def _write(self, records):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def iter_chunks(self, chunk_size=10000):
+        """
+        按块读回已写入的记录
+
+        参数:
+        - chunk_size: 每块的记录数
+
+        生成:
+        - 每块一个 DataFrame
+        """
+        raise NotImplementedError
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class JsonlSink(ResultSink):
+    extension = '.jsonl'
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def _write(self, records):
+        for record in records:
+            self._file.write(json.dumps({k: _plain(v) for k, v in record.items()}, ensure_ascii=False))
+            self._file.write('\n')
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def iter_chunks(self, chunk_size=10000):
+        chunk = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    chunk.append(json.loads(line))
+                except ValueError:
+                    # 崩溃时最后一行可能只写了一半
+                    continue
+                if len(chunk) >= chunk_size:
+                    yield records_to_dataframe(chunk)
+                    chunk = []
+        if chunk:
+            yield records_to_dataframe(chunk)
+
+
+class CsvSink(ResultSink):
+    extension = '.csv'
+
+    def __init__(self, path):
+        super().__init__(path)
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, 'a', encoding='utf-8-sig' if new_file else 'utf-8', newline='')
+        self._writer = csv.DictWriter(self._file, fieldnames=STREAM_COLUMNS, extrasaction='ignore')
+        if new_file:
+            self._writer.writeheader()
+
+    def _write(self, records):
+        for record in records:
+            row = {}
+            for column in STREAM_COLUMNS:
+                value = record.get(column)
+                row[column] = json.dumps(_plain(value), ensure_ascii=False) if column in LIST_COLUMNS else value
+            self._writer.writerow(row)
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def iter_chunks(self, chunk_size=10000):
+        dtype = {column: str for column in STREAM_COLUMNS if column not in INT_COLUMNS}
+        for chunk in pd.read_csv(self.path, encoding='utf-8-sig', dtype=dtype, chunksize=chunk_size,
+                                 on_bad_lines='skip'):
+            for column in LIST_COLUMNS:
+                if column in chunk.columns:
+                    chunk[column] = chunk[column].apply(lambda v: json.loads(v) if isinstance(v, str) and v else [])
+            yield chunk
+
+
+class ParquetSink(ResultSink):
+    extension = '.parquet'
+
+    def __init__(self, path, row_group_size=5000):
+        """
+        参数:
+        - path: 输出目录
+        - row_group_size: 缓冲多少条记录后写出一个行组文件
+        """
+        if not HAS_ARROW:
+            raise ImportError("Parquet 输出需要安装 pyarrow")
+        super().__init__(path)
+        os.makedirs(path, exist_ok=True)
+        self.row_group_size = row_group_size
+        self._buffer = []
+        self._parts = len([name for name in os.listdir(path) if name.endswith('.parquet')])
+        self._schema = pa.schema([
+            (column, pa.list_(pa.string()) if column in LIST_COLUMNS
+             else pa.int64() if column in INT_COLUMNS else pa.string())
+            for column in STREAM_COLUMNS
+        ])
+
+    def _write(self, records):
+        self._buffer.extend(records)
+        if len(self._buffer) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        columns = {}
+        for column in STREAM_COLUMNS:
+            values = [record.get(column) for record in self._buffer]
+            if column in LIST_COLUMNS:
+                values = [_plain(v) if isinstance(v, (list, tuple)) else [] for v in values]
+            elif column in INT_COLUMNS:
+                values = [int(v) if isinstance(v, (int, float)) and v == v else 0 for v in values]
+            else:
+                values = [None if v is None else str(v) for v in values]
+            columns[column] = values
+        table = pa.Table.from_pydict(columns, schema=self._schema)
+        pq.write_table(table, os.path.join(self.path, f"part-{self._parts:05d}.parquet"))
+        self._parts += 1
+        self._buffer = []
+
+    def close(self):
+        with self._lock:
+            self._flush()
+
+    def iter_chunks(self, chunk_size=10000):
+        with self._lock:
+            self._flush()
+        for name in sorted(os.listdir(self.path)):
+            if not name.endswith('.parquet'):
+                continue
+            for batch in pq.ParquetFile(os.path.join(self.path, name)).iter_batches(batch_size=chunk_size):
+                yield batch.to_pandas()
+
+
+SINKS = {
+    'jsonl': JsonlSink,
+    'csv': CsvSink,
+    'parquet': ParquetSink,
+}
+
+
+def create_sink(kind, path_prefix):
+    """
+    创建流式输出
+
+    参数:
+    - kind: jsonl / csv / parquet
+    - path_prefix: 不含扩展名的输出路径，如 results/stream_20250101_120000
+
+    返回:
+    - ResultSink 实例；未知格式或缺少依赖时退回 JSONL
+    """
+    sink_class = SINKS.get(kind)
+    if sink_class is None:
+        print(f"未知的流式输出格式 {kind}，使用 jsonl")
+        sink_class = JsonlSink
+    try:
+        return sink_class(path_prefix + sink_class.extension)
+    except ImportError as e:
+        print(f"{e}，使用 jsonl")
+        return JsonlSink(path_prefix + JsonlSink.extension)
@@ -0,0 +1,255 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+列式结果存储（可选，需要 pyarrow）
+每次运行的结果按 Hive 风格分区写入 Parquet：results/store/date=YYYY-MM-DD/keyword=xxx/part-<run_id>-N.parquet，
+keyword、type、run_id 以字典编码存储。读取时只读需要的列，并把关键词、日期、运行批次条件下推到
+分区裁剪和 Parquet 行组过滤，不再整份解析 CSV。CSV 作为存储的导出视图仍然可用。
+"""
+
+import os
+import argparse
+from datetime import datetime
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    HAS_ARROW = True
+except ImportError:
+    pa = ds = pq = None
+    HAS_ARROW = False
+
+STORE_DIR = os.path.join("results", "store")
+PARTITION_COLUMNS = ["date", "keyword"]
+DICTIONARY_COLUMNS = ["type", "run_id"]
+LIST_COLUMNS = ["image_urls", "local_image_paths"]
+# 与 main.py 写出的 all_results CSV 相同的列
+CSV_VIEW_COLUMNS = ['keyword', 'weibo_id', 'content', 'publish_time', 'reposts_count',
+                    'comments_count', 'attitudes_count', 'post_link']
+
+
+def run_date(run_id):
+    """由运行批次（YYYYMMDD_HHMMSS）得到分区日期 YYYY-MM-DD"""
+    return datetime.strptime(run_id[:8], "%Y%m%d").strftime("%Y-%m-%d")
+
+
+def _prepare_frame(df, run_id):
+    """补充分区列、规整列类型，使 DataFrame 可以无损转换为 Arrow 表"""
+    df = df.copy()
+    df["run_id"] = run_id
+    df["date"] = run_date(run_id)
+    df["keyword"] = df["keyword"].fillna("").astype(str) if "keyword" in df.columns else ""
+
+    for column in df.columns:
+        if column in LIST_COLUMNS:
+            df[column] = df[column].apply(lambda v: [str(x) for x in v] if isinstance(v, (list, tuple)) else [])
+        elif df[column].dtype == object:
+            # 混合了数字和字符串的列统一为字符串，缺失值保持为空
+            df[column] = df[column].where(df[column].isna(), df[column].astype(str))
+
+    for column in DICTIONARY_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype("category")
+    return df
+
+
+def write_results(df, run_id, store_dir=STORE_DIR, part=None):
+    """
+    把一次运行的结果写入分区存储
+
+    参数:
+    - df: 结果 DataFrame（需包含 keyword 列，可包含 type 分类列）
+    - run_id: 运行批次，格式为 YYYYMMDD_HHMMSS
+    - store_dir: 存储根目录
+    - part: 分块写入时的块编号，用于区分同一批次的多个文件
+
+    返回:
+    - 写入的行数，未安装 pyarrow 或没有数据时返回 0
+    """
+    if not HAS_ARROW:
+        print("未安装 pyarrow，跳过 Parquet 结果存储")
+        return 0
+    if df is None or df.empty:
+        return 0
+
+    table = pa.Table.from_pandas(_prepare_frame(df, run_id), preserve_index=False)
+    pq.write_to_dataset(
+        table,
+        root_path=store_dir,
+        partition_cols=PARTITION_COLUMNS,
+        basename_template=f"part-{run_id}-{{i}}.parquet" if part is None else f"part-{run_id}-{part}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+    )
+    print(f"已写入 {table.num_rows} 条结果到 Parquet 存储: {store_dir}")
+    return table.num_rows
+
+
+def has_results(store_dir=STORE_DIR):
+    """存储是否可用且已有数据"""
+    if not HAS_ARROW or not os.path.isdir(store_dir):
+        return False
+    for _, _, files in os.walk(store_dir):
+        if any(name.endswith(".parquet") for name in files):
+            return True
+    return False
+
+
+def _dataset(store_dir):
+    """
+    打开结果存储。dataset 默认只用第一个文件的结构，只在部分运行中写入的列（如 velocity）会被丢掉，
+    这里合并所有文件的结构，缺少该列的文件读为空值
+    """
+    partitioning = ds.HivePartitioning.discover(infer_dictionary=True)
+    dataset = ds.dataset(store_dir, format="parquet", partitioning=partitioning)
+    schemas = [dataset.schema] + [fragment.physical_schema for fragment in dataset.get_fragments()]
+    try:
+        schema = pa.unify_schemas(schemas, promote_options="permissive")
+    except TypeError:
+        # 旧版 pyarrow 没有 promote_options 参数
+        schema = pa.unify_schemas(schemas)
+    if schema.equals(dataset.schema):
+        return dataset
+    return ds.dataset(store_dir, schema=schema, format="parquet", partitioning=partitioning)
+
+
+def latest_run_id(store_dir=STORE_DIR):
+    """
+    最近一次运行的批次
+
+    返回:
+    - run_id 字符串，存储为空时返回 None
+    """
+    if not has_results(store_dir):
+        return None
+    # 只读 run_id 一列；最新的批次一定在最新的日期分区里
+    dates = sorted(name.split("=", 1)[1] for name in os.listdir(store_dir) if name.startswith("date="))
+    if not dates:
+        return None
+    dataset = _dataset(store_dir)
+    table = dataset.to_table(columns=["run_id"], filter=ds.field("date") == dates[-1])
+    if table.num_rows == 0:
+        return None
+    return max(table.column("run_id").to_pylist())
+
+
+def load_results(columns=None, keyword=None, date=None, run_id=None, latest_run=False, store_dir=STORE_DIR):
+    """
+    按列投影和条件下推读取结果
+
+    参数:
+    - columns: 需要的列，为空时读取全部；存储中不存在的列会被忽略
+    - keyword: 只读取该关键词（或关键词列表）的分区
+    - date: 只读取该日期（YYYY-MM-DD）的分区
+    - run_id: 只读取该运行批次的结果
+    - latest_run: 为 True 时只读取最近一次运行的结果
+    - store_dir: 存储根目录
+
+    返回:
+    - DataFrame，存储不可用或为空时返回 None
+    """
+    if not has_results(store_dir):
+        return None
+
+    if latest_run and not run_id:
+        run_id = latest_run_id(store_dir)
+        if run_id is None:
+            return None
+    if run_id and not date:
+        # 运行批次决定了日期分区，先裁剪分区再过滤行组
+        date = run_date(run_id)
+
+    dataset = _dataset(store_dir)
+    conditions = []
+    if date:
+        conditions.append(ds.field("date") == date)
+    if keyword is not None:
+        keywords = [keyword] if isinstance(keyword, str) else list(keyword)
+        conditions.append(ds.field("keyword").isin(keywords))
+    if run_id:
+        conditions.append(ds.field("run_id") == run_id)
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+
+    if columns is not None:
+        names = set(dataset.schema.names)
+        columns = [column for column in columns if column in names]
+
+    table = dataset.to_table(columns=columns, filter=expression)
+    return table.to_pandas()
+
+
+def latest_csv_run_id(result_dir="results"):
+    """结果目录中最新 all_results_<run_id>.csv 的运行批次，没有时返回 None"""
+    if not os.path.isdir(result_dir):
+        return None
+    run_ids = [name[len("all_results_"):-len(".csv")] for name in os.listdir(result_dir)
+               if name.startswith("all_results_") and name.endswith(".csv")]
+    return max(run_ids) if run_ids else None
+
+
+def load_latest(columns=None, keyword=None, result_dir="results", store_dir=STORE_DIR):
+    """
+    读取最近一次运行的结果，供画廊、图片索引等下游工具使用
+
+    参数:
+    - columns: 需要的列
+    - keyword: 只读取该关键词
+    - result_dir: CSV 结果目录
+    - store_dir: 存储根目录
+
+    返回:
+    - DataFrame；存储不可用、为空，或之后又有只写了 CSV 的运行时返回 None，由调用方退回读取 CSV
+    """
+    run_id = latest_run_id(store_dir)
+    if run_id is None:
+        return None
+    csv_run_id = latest_csv_run_id(result_dir)
+    if csv_run_id and csv_run_id > run_id:
+        return None
+    print(f"读取 Parquet 结果存储: {store_dir} (批次 {run_id})")
+    return load_results(columns=columns, keyword=keyword, run_id=run_id, store_dir=store_dir)
+
+
+def export_csv(output_file, columns=CSV_VIEW_COLUMNS, sort_by=("attitudes_count",), **filters):
+    """
+    把存储中的结果导出为 CSV 视图
+
+    参数:
+    - output_file: 输出的 CSV 路径
+    - columns: 导出的列
+    - sort_by: 按这些列降序排列
+    - filters: 传给 load_results 的过滤条件（keyword、date、run_id、latest_run）
+
+    返回:
+    - 导出的行数
+    """
+    df = load_results(columns=list(dict.fromkeys(list(columns) + list(sort_by))), **filters)
+    if df is None or df.empty:
+        print("存储中没有符合条件的结果")
+        return 0
+    sort_columns = [column for column in sort_by if column in df.columns]
+    if sort_columns:
+        df = df.sort_values(by=sort_columns, ascending=False)
+    df = df[[column for column in columns if column in df.columns]]
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    df.to_csv(output_file, index=False, encoding="utf-8-sig")
+    print(f"已导出 {len(df)} 条结果到: {output_file}")
+    return len(df)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='从 Parquet 结果存储导出 CSV')
+    parser.add_argument('output', help='输出的 CSV 文件路径')
+    parser.add_argument('--keyword', help='只导出该关键词')
+    parser.add_argument('--date', help='只导出该日期（YYYY-MM-DD）')
+    parser.add_argument('--run', help='只导出该运行批次（YYYYMMDD_HHMMSS）')
+    parser.add_argument('--latest', action='store_true', help='只导出最近一次运行')
+    args = parser.parse_args()
+
+    export_csv(args.output, keyword=args.keyword, date=args.date, run_id=args.run, latest_run=args.latest)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+微博正文清理
+把去除 HTML 标签、[表情] 标记、链接、零宽字符（以及可选的 emoji）和合并空白合并为一个预编译的正则，
+每条文本只扫描一次：连续的空白和待删除片段作为一个整体匹配，其中含有空白时替换为一个空格，否则直接删除，
+因此与依次执行各步替换的结果相同。
+爬虫在每页结果产出时就清理正文，之后的汇总、分析等环节拿到的都是已清理的文本；再次清理不会改变结果。
+"""
+
+import re
+
+import pandas as pd
+
+_DROP = (
+    r'<[^>]*>'                                      # HTML标签
+    r'|\[[^\]\n]*\]'                                # 微博表情等标记，如[笑]
+    r'|https?://[A-Za-z0-9$\-_@.&+!*(),%/?=#:~;]+'  # 链接
+    r'|[\u200b-\u200f\u202a-\u202e\u2060-\u206f\ufeff]'  # 零宽和方向控制字符
+)
+_EMOJI = (
+    '|['
+    '\U0001F300-\U0001F5FF'  # symbols & pictographs
+    '\U0001F600-\U0001F64F'  # emoticons
+    '\U0001F680-\U0001F6FF'  # transport & map symbols
+    '\U0001F700-\U0001F7FF'  # alchemical symbols / geometric shapes
+    '\U0001F800-\U0001F8FF'  # supplemental arrows-C
+    '\U0001F900-\U0001F9FF'  # supplemental symbols and pictographs
+    '\U0001FA00-\U0001FAFF'  # chess symbols / pictographs extended-A
+    '\U00002702-\U000027B0'  # dingbats
+    '\ufe0f'                  # variation selector
+    ']'
+)
+
+
+def _compile(drop):
+    # 先尝试“待删除片段 + 至少一个空白 + 其后的空白/片段”，匹配不到时才是只有待删除片段的一段
+    return re.compile(rf'(?P<space>(?:{drop})*\s(?:\s|{drop})*)|(?:{drop})+')
+
+
+_PATTERN = _compile(_DROP)
+_EMOJI_PATTERN = _compile(_DROP + _EMOJI)
+
+
+def _replace(match):
+    return ' ' if match.lastgroup == 'space' else ''
+
+
+def clean_text(text, strip_emoji=False):
+    """
+    清理单条微博正文
+
+    参数:
+    - text: 原始文本，None/NaN 视为空
+    - strip_emoji: 是否同时去除 emoji
+
+    返回:
+    - 清理后的文本
+    """
+    if not isinstance(text, str):
+        if text is None or (isinstance(text, float) and text != text):
+            return ''
+        text = str(text)
+    pattern = _EMOJI_PATTERN if strip_emoji else _PATTERN
+    return pattern.sub(_replace, text).strip()
+
+
+def clean_texts(texts, strip_emoji=False):
+    """
+    批量清理微博正文
+
+    参数:
+    - texts: 文本的 Series 或可迭代对象
+    - strip_emoji: 是否同时去除 emoji
+
+    返回:
+    - 传入 Series 时返回索引相同的 Series，否则返回列表
+    """
+    sub = (_EMOJI_PATTERN if strip_emoji else _PATTERN).sub
+    cleaned = [sub(_replace, text).strip() if isinstance(text, str) else clean_text(text, strip_emoji)
+               for text in texts]
+    if isinstance(texts, pd.Series):
+        return pd.Series(cleaned, index=texts.index, dtype=object)
+    return cleaned
+
+
+def clean_records(records, strip_emoji=False):
+    """
+    原地清理一批记录的 content 字段
+
+    参数:
+    - records: 微博字典或 WeiboRecord 的列表
+    - strip_emoji: 是否同时去除 emoji
+
+    返回:
+    - 传入的 records
+    """
+    for record, content in zip(records, clean_texts([record.get('content', '') for record in records],
+                                                     strip_emoji=strip_emoji)):
+        record['content'] = content
+    return records
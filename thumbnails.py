@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+缩略图服务
+缩略图按“原图内容哈希 + 尺寸”缓存在 results/thumbnails 下，同一张图片无论路径、运行多少次都只生成一次；
+再次生成画廊时只需计算哈希并检查缓存文件是否存在。未命中的图片交给进程池并行生成，
+JPEG 原图用 draft 模式解码：解码器直接按 1/2、1/4、1/8 缩小输出，不必先还原全分辨率图像。
+"""
+
+import os
+import base64
+import hashlib
+import logging
+from html import escape
+from urllib.parse import quote
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from PIL import Image  # 可选依赖
+except ImportError:
+    Image = None
+
+THUMBNAIL_DIR = os.path.join("results", "thumbnails")
+DEFAULT_SIZE = (300, 300)
+# 画廊的 srcset 变体：1x 和 2x 屏幕
+SRCSET_SIZES = ((300, 300), (600, 600))
+JPEG_QUALITY = 85
+
+
+def content_hash(image_path):
+    """
+    计算图片文件内容的哈希
+
+    参数:
+    - image_path: 图片路径
+
+    返回:
+    - 十六进制哈希字符串，文件无法读取时返回 None
+    """
+    try:
+        digest = hashlib.blake2b(digest_size=16)
+        with open(image_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+    except OSError:
+        return None
+
+
+def cache_path(digest, size, cache_dir=THUMBNAIL_DIR):
+    """由内容哈希和尺寸得到缓存文件路径（按哈希前两位分子目录）"""
+    return os.path.join(cache_dir, digest[:2], f"{digest}_{size[0]}x{size[1]}.jpg")
+
+
+def _render(image_path, target, size):
+    """解码原图、缩放并写入 target（先写临时文件再改名，并发生成同一张图时不会读到半个文件）"""
+    with Image.open(image_path) as img:
+        # JPEG 在解码前选择不小于目标尺寸的最大缩小倍数
+        img.draft('RGB', size)
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        img.thumbnail(size, Image.Resampling.LANCZOS)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp = f"{target}.{os.getpid()}.tmp"
+        img.save(tmp, format='JPEG', quality=JPEG_QUALITY, optimize=True)
+    os.replace(tmp, target)
+
+
+def _render_task(task):
+    image_path, target, size = task
+    try:
+        _render(image_path, target, size)
+        return target
+    except Exception as e:
+        logging.warning(f"生成缩略图失败 {image_path}: {e}")
+        return None
+
+
+def make_thumbnails(image_paths, size=DEFAULT_SIZE, cache_dir=THUMBNAIL_DIR, workers=None):
+    """
+    批量生成缩略图
+
+    参数:
+    - image_paths: 原图路径的可迭代对象
+    - size: 最大尺寸(宽, 高)
+    - cache_dir: 缩略图缓存目录
+    - workers: 进程数，默认为 CPU 核数；只有一张图需要生成时不启动进程池
+
+    返回:
+    - 字典 {原图路径: 缩略图路径}，无法生成的图片为 None
+    """
+    size = tuple(size)
+    result = {}
+    tasks = {}
+    for image_path in dict.fromkeys(image_paths):
+        digest = content_hash(image_path) if image_path and os.path.isfile(image_path) else None
+        if digest is None or Image is None:
+            result[image_path] = None
+            continue
+        target = cache_path(digest, size, cache_dir)
+        if os.path.exists(target):
+            result[image_path] = target
+        else:
+            # 内容相同的图片只生成一次
+            tasks.setdefault(target, (image_path, target, size))
+            result[image_path] = target
+
+    if tasks:
+        pending = list(tasks.values())
+        workers = max(1, min(workers or os.cpu_count() or 1, len(pending)))
+        if workers == 1:
+            done = [_render_task(task) for task in pending]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                done = list(executor.map(_render_task, pending, chunksize=max(1, len(pending) // (workers * 4))))
+        failed = {task[1] for task, target in zip(pending, done) if target is None}
+        for image_path, target in result.items():
+            if target in failed:
+                result[image_path] = None
+    return result
+
+
+def make_thumbnail(image_path, size=DEFAULT_SIZE, cache_dir=THUMBNAIL_DIR):
+    """
+    生成单张缩略图（在当前进程中）
+
+    返回:
+    - 缩略图路径，无法生成时返回 None
+    """
+    return make_thumbnails([image_path], size=size, cache_dir=cache_dir, workers=1)[image_path]
+
+
+def data_uri(thumbnail_path):
+    """
+    把缩略图文件转换为 data:image/jpeg;base64 字符串
+
+    返回:
+    - data URI，文件不存在时返回空字符串
+    """
+    if not thumbnail_path:
+        return ""
+    try:
+        with open(thumbnail_path, 'rb') as f:
+            return "data:image/jpeg;base64," + base64.b64encode(f.read()).decode('ascii')
+    except OSError:
+        return ""
+
+
+def relative_url(path, start):
+    """
+    文件相对于 HTML 所在目录的 URL
+
+    参数:
+    - path: 文件路径
+    - start: HTML 文件所在目录
+
+    返回:
+    - 以 / 分隔、经过转义的相对 URL
+    """
+    return quote(os.path.relpath(path, start or '.').replace(os.sep, '/'))
+
+
+def make_variants(image_paths, sizes=SRCSET_SIZES, cache_dir=THUMBNAIL_DIR, workers=None):
+    """
+    为每张图片生成各尺寸的缩略图
+
+    参数:
+    - image_paths: 原图路径的可迭代对象
+    - sizes: 尺寸列表，依次对应 1x、2x……
+    - cache_dir: 缩略图缓存目录
+    - workers: 进程数
+
+    返回:
+    - 字典 {原图路径: [各尺寸缩略图路径]}，无法生成的图片不在字典中
+    """
+    image_paths = list(dict.fromkeys(image_paths))
+    by_size = [make_thumbnails(image_paths, size=size, cache_dir=cache_dir, workers=workers) for size in sizes]
+    variants = {}
+    for image_path in image_paths:
+        paths = [thumbnails[image_path] for thumbnails in by_size]
+        if paths[0]:
+            variants[image_path] = paths
+    return variants
+
+
+def img_tag(variants, html_dir, alt='', inline=False, css_class='thumb'):
+    """
+    生成引用缩略图的 <img> 标签
+
+    参数:
+    - variants: 各尺寸缩略图路径（make_variants 的值），第一个为 1x
+    - html_dir: HTML 文件所在目录，用于计算相对 URL
+    - alt: 替代文本
+    - inline: 为 True 时把 1x 缩略图以 base64 内嵌，HTML 单文件即可查看
+    - css_class: CSS 类名
+
+    返回:
+    - HTML 字符串
+    """
+    alt = escape(alt or '', quote=True)
+    if inline:
+        return f'<img class="{css_class}" src="{data_uri(variants[0])}" alt="{alt}" loading="lazy" decoding="async">'
+    srcset = ", ".join(f"{relative_url(path, html_dir)} {i}x" for i, path in enumerate(variants, 1) if path)
+    return (f'<img class="{css_class}" src="{relative_url(variants[0], html_dir)}" srcset="{srcset}" '
+            f'alt="{alt}" loading="lazy" decoding="async">')
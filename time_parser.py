@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+微博发布时间的批量解析
+parse_publish_times 先对整列去重，再用正则把每个不同的字符串按格式归类，每一类整体转换：
+- 相对时间：'5分钟前'、'2小时前'、'刚刚'
+- '今天 12:34'、'昨天 12:34'（不带时刻时取当前时刻）
+- 'MM-DD HH:MM'、'MM月DD日 HH:MM'（补当前年份）
+- 'YYYY-MM-DD HH:MM[:SS]'、'YYYY年MM月DD日 HH:MM'
+- 接口的 created_at 格式 'Thu Aug 07 16:59:47 +0800 2025'（转换为本地时间）
+与当前时间无关的格式（完整日期和 created_at）的解析结果在多次调用之间缓存。
+"""
+
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+RELATIVE_PATTERN = r'^(\d+)\s*(分钟|小时)前$'
+DAY_PATTERN = r'^(今天|昨天)\s*(?:(\d{1,2}):(\d{2}))?$'
+MONTH_DAY_PATTERN = r'^(\d{1,2})[-月](\d{1,2})日?\s+(\d{1,2}):(\d{2})$'
+FULL_DATE_PATTERN = r'^(\d{4})[-年](\d{1,2})[-月](\d{1,2})日?\s+(\d{1,2}):(\d{2})(?::(\d{2}))?$'
+CREATED_AT_PATTERN = r'^[A-Z][a-z]{2} [A-Z][a-z]{2} \d{2} \d{2}:\d{2}:\d{2} [+-]\d{4} \d{4}$'
+CREATED_AT_FORMAT = '%a %b %d %H:%M:%S %z %Y'
+
+_ABSOLUTE_CACHE = {}
+_ABSOLUTE_CACHE_SIZE = 100000
+
+
+def _assemble(parts, index):
+    """由年月日时分秒各列组装时间，非法日期为 NaT"""
+    frame = pd.DataFrame(parts, index=index).astype('float64')
+    return pd.to_datetime(frame, errors='coerce')
+
+
+def _parse_unique(values, now):
+    """解析互不相同的字符串，返回与 values 对齐的 datetime64 Series"""
+    result = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+
+    relative = values.str.extract(RELATIVE_PATTERN)
+    mask = relative[0].notna()
+    if mask.any():
+        amount = relative.loc[mask, 0].astype('int64')
+        minutes = amount.where(relative.loc[mask, 1] == '分钟', amount * 60)
+        result[mask] = pd.Timestamp(now) - pd.to_timedelta(minutes, unit='m')
+    result[values == '刚刚'] = pd.Timestamp(now)
+
+    day = values.str.extract(DAY_PATTERN)
+    mask = day[0].notna()
+    if mask.any():
+        offset = (day.loc[mask, 0] == '昨天').astype('int64')
+        dates = pd.Timestamp(now.date()) - pd.to_timedelta(offset, unit='D')
+        assembled = _assemble({
+            'year': dates.dt.year, 'month': dates.dt.month, 'day': dates.dt.day,
+            'hour': day.loc[mask, 1], 'minute': day.loc[mask, 2],
+        }, dates.index)
+        without_clock = day.loc[mask, 1].isna()
+        assembled[without_clock] = pd.Timestamp(now) - pd.to_timedelta(offset[without_clock], unit='D')
+        result[mask] = assembled
+
+    month_day = values.str.extract(MONTH_DAY_PATTERN)
+    mask = month_day[0].notna()
+    if mask.any():
+        result[mask] = _assemble({
+            'year': now.year, 'month': month_day.loc[mask, 0], 'day': month_day.loc[mask, 1],
+            'hour': month_day.loc[mask, 2], 'minute': month_day.loc[mask, 3],
+        }, month_day.index[mask])
+
+    full = values.str.extract(FULL_DATE_PATTERN)
+    mask = full[0].notna()
+    if mask.any():
+        result[mask] = _assemble({
+            'year': full.loc[mask, 0], 'month': full.loc[mask, 1], 'day': full.loc[mask, 2],
+            'hour': full.loc[mask, 3], 'minute': full.loc[mask, 4], 'second': full.loc[mask, 5].fillna(0),
+        }, full.index[mask])
+
+    mask = values.str.match(CREATED_AT_PATTERN)
+    if mask.any():
+        local_tz = datetime.now().astimezone().tzinfo
+        parsed = pd.to_datetime(values[mask], format=CREATED_AT_FORMAT, errors='coerce', utc=True)
+        result[mask] = parsed.dt.tz_convert(local_tz).dt.tz_localize(None)
+
+    return result
+
+
+def _normalize(values):
+    """把输入统一为去掉首尾空白的字符串 Series，缺失值为空字符串"""
+    if not isinstance(values, pd.Series):
+        values = pd.Series(list(values), dtype=object)
+    return values.astype(object).where(values.notna(), '').astype(str).str.strip()
+
+
+def parse_publish_times(values, now=None):
+    """
+    批量解析微博发布时间
+
+    参数:
+    - values: 时间字符串的序列（Series、列表等）
+    - now: 相对时间的参照时间，默认为当前时间
+
+    返回:
+    - datetime64[ns] 类型的 Series（本地时间，无时区），与输入一一对应；无法解析的值为 NaT
+    """
+    if now is None:
+        now = datetime.now()
+    strings = _normalize(values)
+
+    # 每个不同的字符串只解析一次
+    codes, uniques = pd.factorize(strings.values)
+    uniques = pd.Series(uniques, dtype=object)
+
+    parsed = pd.Series(pd.NaT, index=uniques.index, dtype='datetime64[ns]')
+    cached = uniques.map(_ABSOLUTE_CACHE.get)
+    hit = cached.notna()
+    parsed[hit] = cached[hit]
+    if (~hit).any():
+        missing = uniques[~hit]
+        fresh = _parse_unique(missing.astype(str), now)
+        parsed[~hit] = fresh
+
+        # 缓存与当前时间无关的格式
+        absolute = (missing.str.match(FULL_DATE_PATTERN) | missing.str.match(CREATED_AT_PATTERN)) & fresh.notna()
+        if len(_ABSOLUTE_CACHE) > _ABSOLUTE_CACHE_SIZE:
+            _ABSOLUTE_CACHE.clear()
+        _ABSOLUTE_CACHE.update(zip(missing[absolute], fresh[absolute]))
+
+    values_out = parsed.to_numpy()[codes]
+    return pd.Series(values_out, index=strings.index, dtype='datetime64[ns]')
+
+
+def parse_publish_time(value, now=None):
+    """
+    解析单个微博发布时间
+
+    参数:
+    - value: 时间字符串
+    - now: 相对时间的参照时间，默认为当前时间
+
+    返回:
+    - datetime 对象，无法解析时返回 None
+    """
+    parsed = parse_publish_times([value], now=now).iloc[0]
+    return None if pd.isna(parsed) else parsed.to_pydatetime()
+
+
+def publish_time_lookup(values, now=None, parsed=None):
+    """
+    批量解析后生成 字符串 -> datetime 的映射，供逐条处理的代码查询
+
+    参数:
+    - values: 时间字符串的序列
+    - now: 相对时间的参照时间
+    - parsed: 已经由 parse_publish_times 解析好的结果，提供时不再重复解析
+
+    返回:
+    - 查询函数，参数为时间字符串，返回 datetime 或 None
+    """
+    strings = _normalize(values)
+    if parsed is None:
+        parsed = parse_publish_times(strings, now=now)
+    lookup = {value: None if pd.isna(dt) else dt.to_pydatetime() for value, dt in zip(strings, parsed)}
+    return lambda value: lookup.get(str(value).strip()) if value is not None else None
+
+
+def within_recent_days(published, now, days):
+    """
+    判断每个时间是否在最近 days 个自然日内（包含今天）
+
+    参数:
+    - published: parse_publish_times 返回的 Series
+    - now: 当前时间
+    - days: 自然日数
+
+    返回:
+    - 布尔 Series，NaT 为 False
+    """
+    today = pd.Timestamp(now.date())
+    start = today - timedelta(days=days - 1)
+    dates = published.dt.normalize()
+    return (dates >= start) & (dates <= today)
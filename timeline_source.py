@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+用户时间线数据源
+提供 PC 端 mymblog 接口和移动端 container 接口两种后端，
+由爬虫按用户选择单次请求返回微博最多的那一个
+"""
+
+import re
+import html
+
+from fast_json import get, project_weibo
+
+
+class TimelineSource:
+    """时间线数据源基类"""
+
+    name = 'base'
+
+    def __init__(self, page_size=20):
+        """
+        初始化数据源
+
+        参数:
+        - page_size: 每页请求的微博数量（接口支持时生效）
+        """
+        self.page_size = page_size
+        self.extra_headers = {}
+
+    def build_url(self, user_id, page, cursor=''):
+        """
+        构建某一页的请求URL
+
+        参数:
+        - user_id: 用户ID
+        - page: 页码
+        - cursor: 上一页返回的since_id游标
+
+        返回:
+        - 请求URL
+        """
+        raise NotImplementedError
+
+    def parse(self, payload):
+        """
+        解析接口响应
+
+        参数:
+        - payload: fast_json.parse 解析出的响应文档
+
+        返回:
+        - (微博列表, 下一页游标) 元组，微博统一为 mymblog 的字段格式，且只保留 project_weibo 投影的字段
+        """
+        raise NotImplementedError
+
+
+class MymblogSource(TimelineSource):
+    """PC 端 weibo.com/ajax/statuses/mymblog 接口，每页条数固定"""
+
+    name = 'mymblog'
+
+    def build_url(self, user_id, page, cursor=''):
+        url = f"https://weibo.com/ajax/statuses/mymblog?uid={user_id}&page={page}&feature=0"
+        if cursor:
+            url += f"&since_id={cursor}"
+        return url
+
+    def parse(self, payload):
+        data = get(payload, 'data', {})
+        return [project_weibo(item) for item in get(data, 'list', [])], str(get(data, 'since_id', ''))
+
+
+class ContainerSource(TimelineSource):
+    """移动端 m.weibo.cn/api/container/getIndex 接口，支持 count 参数指定每页条数"""
+
+    name = 'container'
+
+    def __init__(self, page_size=50):
+        super().__init__(page_size)
+        self.extra_headers = {
+            'Referer': 'https://m.weibo.cn/',
+            'MWeibo-Pwa': '1',
+        }
+
+    def build_url(self, user_id, page, cursor=''):
+        url = (f"https://m.weibo.cn/api/container/getIndex?type=uid&value={user_id}"
+               f"&containerid=107603{user_id}&count={self.page_size}")
+        if cursor:
+            url += f"&since_id={cursor}"
+        else:
+            url += f"&page={page}"
+        return url
+
+    def parse(self, payload):
+        if get(payload, 'ok') != 1:
+            return [], ''
+        data = get(payload, 'data', {})
+        weibo_list = []
+        for card in get(data, 'cards', []):
+            if get(card, 'card_type') == 9:  # 微博类型
+                mblog = get(card, 'mblog')
+                if mblog is not None:
+                    weibo_list.append(self._to_timeline_item(project_weibo(mblog)))
+        cursor = str(get(get(data, 'cardlistInfo'), 'since_id', ''))
+        return weibo_list, cursor
+
+    def _to_timeline_item(self, mblog):
+        """将移动端 mblog 转换为 mymblog 的字段格式"""
+        item = dict(mblog)
+        if 'text_raw' not in item:
+            text = item.get('raw_text') or item.get('text', '')
+            item['text_raw'] = html.unescape(re.sub(r'<[^>]+>', '', text))
+        if 'pic_ids' not in item:
+            item['pic_ids'] = [pic.get('pid') for pic in item.get('pics', []) or [] if pic.get('pid')]
+        return item
+
+
+TIMELINE_SOURCES = {
+    MymblogSource.name: MymblogSource,
+    ContainerSource.name: ContainerSource,
+}
+
+
+def create_timeline_sources(names=None, page_size=50):
+    """
+    按名称创建数据源列表
+
+    参数:
+    - names: 数据源名称列表，默认为全部数据源
+    - page_size: 支持自定义条数的数据源每页请求的数量
+
+    返回:
+    - 数据源实例列表
+    """
+    names = names or list(TIMELINE_SOURCES)
+    sources = []
+    for name in names:
+        source_cls = TIMELINE_SOURCES.get(name)
+        if source_cls is None:
+            print(f"未知的时间线数据源: {name}")
+            continue
+        sources.append(source_cls(page_size) if source_cls is ContainerSource else source_cls())
+    return sources
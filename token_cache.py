@@ -0,0 +1,431 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+分词与关键词提取缓存
+同一条微博的正文会在内容评分、话题聚类、热门话题识别和用户反馈中多次提取关键词，每次都要重新分词。
+TokenCache 以“规范化正文（合并空白）的哈希”为键缓存 jieba 的分词结果，内存中按 LRU 淘汰，
+可选的 SQLite 持久层让分词结果在多次运行之间复用，因此每条不同的微博只分词一次。
+关键词由缓存的分词结果按 jieba.analyse.extract_tags（TF-IDF）的同样规则计算，结果与直接调用相同；
+多篇文本拼接后的关键词（热门话题）由各篇的词频合并得到，不再对拼接后的长文本重新分词。
+未命中的文本较多时（语料较大）交给 ParallelTokenizer 在进程池中分词：每个工作进程启动时加载一次词典，
+按块接收文本并以紧凑形式返回分词结果，分词不再受 GIL 限制只用一个核。
+jieba 的词典在第一次真正需要分词时才加载；build_dictionary 把自定义词典合并进主词典，
+jieba 为合并后的词典生成的前缀词典缓存保存在同一目录下，词表不变时直接读取缓存，不必逐词 add_word。
+"""
+
+import os
+import glob
+import atexit
+import hashlib
+import sqlite3
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import jieba
+
+# 分词结果的紧凑形式：各词以 \x1f 连接的字符串
+TOKEN_SEPARATOR = '\x1f'
+DEFAULT_MAX_ENTRIES = 200000
+# 每篇文本缓存的关键词数量，更少的 topk 直接截取（extract_tags 的结果是按权重排序后截取的）
+CACHED_TOPK = 20
+FLUSH_EVERY = 1000
+# 一次需要分词的文本数达到该值时才使用进程池，较少时进程间传输的开销不划算
+PARALLEL_THRESHOLD = 5000
+# 每个任务的最少文本数
+MIN_CHUNK_SIZE = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tokens (
+    namespace TEXT,
+    key BLOB,
+    tokens TEXT,
+    PRIMARY KEY (namespace, key)
+)
+"""
+
+
+def normalize(text):
+    """规范化正文：合并空白并去除首尾空白（extract_tags 会忽略空白词，关键词不受影响）"""
+    if not isinstance(text, str):
+        text = '' if text is None else str(text)
+    return ' '.join(text.split())
+
+
+def content_key(text):
+    """规范化正文的哈希"""
+    return hashlib.blake2b(normalize(text).encode('utf-8'), digest_size=16).digest()
+
+
+def tokenize(texts):
+    """在当前进程中分词，返回紧凑形式的列表"""
+    return [TOKEN_SEPARATOR.join(jieba.cut(text)) for text in texts]
+
+
+def build_dictionary(userdict, dict_dir):
+    """
+    生成包含自定义词的 jieba 主词典（只在自定义词典内容变化时重新生成）
+
+    主词典的各行之后追加自定义词典的各行，jieba 构建前缀词典时依次累加，
+    与加载主词典后再 load_userdict 得到的词频和总词频相同，因此分词结果一致。
+
+    参数:
+    - userdict: 自定义词典路径（每行“词 词频”）
+    - dict_dir: 合并后的词典及其前缀词典缓存所在目录
+
+    返回:
+    - 合并后的词典路径
+    """
+    with open(userdict, 'rb') as f:
+        extra = f.read()
+    digest = hashlib.blake2b(extra, digest_size=8).hexdigest()
+    path = os.path.join(dict_dir, f"jieba_dict_{digest}.txt")
+    if os.path.exists(path):
+        return path
+
+    # 词表变化：删除旧的合并词典和前缀词典缓存
+    for old in glob.glob(os.path.join(dict_dir, "jieba_dict_*.txt")) + glob.glob(os.path.join(dict_dir, "jieba.u*.cache")):
+        try:
+            os.remove(old)
+        except OSError:
+            pass
+    with jieba.get_module_res(jieba.DEFAULT_DICT_NAME) as f:
+        main = f.read()
+    if main and not main.endswith(b'\n'):
+        main += b'\n'
+    # jieba.posseg 要求词典每行都有词性：沿用主词典中的词性，新词用未知词性 x（与 load_userdict 后的词性相同）
+    tags = dict(line.split(b' ')[0::2] for line in main.splitlines() if line.count(b' ') == 2)
+    lines = []
+    for line in extra.splitlines():
+        parts = line.strip().split(b' ')
+        if len(parts) >= 2:
+            lines.append(b' '.join(parts[:2] + [parts[2] if len(parts) > 2 else tags.get(parts[0], b'x')]) + b'\n')
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(main)
+        f.write(b''.join(lines))
+    os.replace(tmp, path)
+    return path
+
+
+def load_dictionary(dictionary=None):
+    """
+    在当前进程中加载 jieba 词典（已加载同一词典时直接返回）
+
+    参数:
+    - dictionary: build_dictionary 生成的词典路径，为空时使用 jieba 默认词典
+    """
+    if dictionary:
+        # 前缀词典缓存与词典放在同一目录，不依赖系统临时目录
+        jieba.dt.tmp_dir = os.path.dirname(os.path.abspath(dictionary))
+    jieba.dt.initialize(dictionary)
+
+
+def _init_worker(dictionary):
+    """工作进程初始化：加载一次 jieba 词典，之后的任务直接分词"""
+    load_dictionary(dictionary)
+
+
+class ParallelTokenizer:
+    """在进程池中分词的 tokenizer，文本数低于阈值时在当前进程中分词"""
+
+    def __init__(self, workers=None, threshold=PARALLEL_THRESHOLD, dictionary=None):
+        """
+        参数:
+        - workers: 工作进程数，默认为 CPU 核数；为 1 时始终在当前进程中分词
+        - threshold: 使用进程池的最少文本数
+        - dictionary: 当前进程和工作进程使用的 jieba 词典（build_dictionary 生成），为空时使用默认词典
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.threshold = threshold
+        self.dictionary = dictionary
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                # 使用 spawn：流水线等线程可能持有锁，fork 出的子进程会继承这些锁的状态
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker, initargs=(self.dictionary,))
+                atexit.register(self.close)
+            return self._executor
+
+    def __call__(self, texts):
+        """
+        分词
+
+        参数:
+        - texts: 文本列表
+
+        返回:
+        - 与 texts 对应的紧凑形式分词结果
+        """
+        texts = list(texts)
+        if self.workers <= 1 or len(texts) < self.threshold:
+            load_dictionary(self.dictionary)
+            return tokenize(texts)
+        size = max(MIN_CHUNK_SIZE, -(-len(texts) // (self.workers * 4)))
+        chunks = [texts[i:i + size] for i in range(0, len(texts), size)]
+        try:
+            result = []
+            for tokens in self._pool().map(tokenize, chunks):
+                result.extend(tokens)
+            return result
+        except Exception as e:
+            print(f"多进程分词失败，改为在当前进程中分词: {e}")
+            load_dictionary(self.dictionary)
+            return tokenize(texts)
+
+    def close(self):
+        """关闭进程池"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
+def word_counts(tokens):
+    """
+    按 extract_tags 的规则统计词频（忽略不足两个字符的词和停用词）
+
+    返回:
+    - 按首次出现顺序排列的 {词: 次数}
+    """
+    import jieba.analyse  # 加载 IDF 词表较慢，第一次提取关键词时才导入
+    stop_words = jieba.analyse.default_tfidf.stop_words
+    counts = {}
+    for word in tokens:
+        if len(word.strip()) < 2 or word.lower() in stop_words:
+            continue
+        counts[word] = counts.get(word, 0) + 1
+    return counts
+
+
+def tags_from_counts(counts, topk):
+    """
+    由词频计算 TF-IDF 关键词，与 jieba.analyse.extract_tags(topK=topk, withWeight=True) 相同
+
+    返回:
+    - [(词, 权重)] 列表，按权重降序
+    """
+    import jieba.analyse
+    tfidf = jieba.analyse.default_tfidf
+    freq = {word: float(count) for word, count in counts.items()}
+    total = sum(freq.values())
+    for word in freq:
+        freq[word] *= tfidf.idf_freq.get(word, tfidf.median_idf) / total
+    tags = sorted(freq.items(), key=lambda item: item[1], reverse=True)
+    return tags[:topk] if topk else tags
+
+
+class _Entry:
+    __slots__ = ('tokens', 'counts', 'tags')
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.counts = None
+        self.tags = None
+
+
+class TokenCache:
+    """内存 LRU + 可选 SQLite 持久层的分词缓存（线程安全）"""
+
+    def __init__(self, path=None, max_entries=DEFAULT_MAX_ENTRIES, namespace=''):
+        """
+        参数:
+        - path: 持久层数据库路径，为空时只使用内存缓存
+        - max_entries: 内存中最多缓存的文本数
+        - namespace: 分词配置（自定义词典等）的标识，配置改变后不会读到旧的分词结果
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.namespace = namespace
+        self.tokenizer = tokenize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._pending = []
+        self._lock = threading.Lock()
+        self.conn = None
+        if path:
+            try:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                self.conn = sqlite3.connect(path, check_same_thread=False)
+                self.conn.execute("PRAGMA journal_mode=WAL")
+                self.conn.execute(SCHEMA)
+                self.conn.commit()
+            except sqlite3.Error as e:
+                print(f"打开分词缓存 {path} 失败，只使用内存缓存: {e}")
+                self.conn = None
+
+    def _get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def _put(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _load(self, keys):
+        """从持久层读取一批键，返回 {键: 紧凑形式的分词结果}"""
+        if self.conn is None or not keys:
+            return {}
+        found = {}
+        keys = list(keys)
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            rows = self.conn.execute(
+                f"SELECT key, tokens FROM tokens WHERE namespace = ? AND key IN ({','.join('?' * len(chunk))})",
+                [self.namespace] + chunk).fetchall()
+            found.update(rows)
+        return found
+
+    def entries(self, texts):
+        """
+        批量获取分词缓存条目；内存和持久层都未命中的文本一次性交给 tokenizer 分词
+
+        参数:
+        - texts: 文本列表
+
+        返回:
+        - 与 texts 对应的条目列表
+        """
+        normalized = [normalize(text) for text in texts]
+        keys = [content_key(text) for text in normalized]
+        result = [None] * len(keys)
+        missing = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = self._get(key)
+                if entry is None:
+                    missing.setdefault(key, []).append(i)
+                else:
+                    result[i] = entry
+            self.hits += len(keys) - sum(len(indices) for indices in missing.values())
+            stored = self._load(missing.keys())
+
+        fresh = [key for key in missing if key not in stored]
+        if fresh:
+            tokenized = self.tokenizer([normalized[missing[key][0]] for key in fresh])
+            stored.update(zip(fresh, tokenized))
+
+        with self._lock:
+            self.misses += len(fresh)
+            for key, indices in missing.items():
+                entry = _Entry(stored[key].split(TOKEN_SEPARATOR) if stored[key] else [])
+                self._put(key, entry)
+                for i in indices:
+                    result[i] = entry
+            if self.conn is not None and fresh:
+                self._pending.extend((self.namespace, key, stored[key]) for key in fresh)
+                if len(self._pending) >= FLUSH_EVERY:
+                    self._flush()
+        return result
+
+    def tokens(self, text):
+        """单条文本的分词结果"""
+        return self.entries([text])[0].tokens
+
+    def prefetch(self, texts):
+        """批量分词并放入缓存，之后逐条查询时直接命中"""
+        self.entries(texts)
+
+    def keywords(self, text, topk=10):
+        """
+        提取单条文本的关键词
+
+        返回:
+        - [(词, 权重)] 列表，与 jieba.analyse.extract_tags(text, topK=topk, withWeight=True) 相同
+        """
+        return self.keywords_many([text], topk)[0]
+
+    def keywords_many(self, texts, topk=10):
+        """批量提取关键词，返回与 texts 对应的 [(词, 权重)] 列表"""
+        result = []
+        for entry in self.entries(texts):
+            if entry.tags is None or topk > CACHED_TOPK:
+                if entry.counts is None:
+                    entry.counts = word_counts(entry.tokens)
+                tags = tags_from_counts(entry.counts, max(topk, CACHED_TOPK))
+                if entry.tags is None:
+                    entry.tags = tags[:CACHED_TOPK]
+            else:
+                tags = entry.tags
+            result.append(tags[:topk])
+        return result
+
+    def corpus_keywords(self, texts, topk=10):
+        """
+        提取多篇文本拼接（以空格连接）后的关键词，由各篇的词频合并得到
+
+        返回:
+        - [(词, 权重)] 列表，与对 " ".join(texts) 调用 extract_tags 的结果相同
+        """
+        merged = {}
+        for entry in self.entries(texts):
+            if entry.counts is None:
+                entry.counts = word_counts(entry.tokens)
+            for word, count in entry.counts.items():
+                merged[word] = merged.get(word, 0) + count
+        return tags_from_counts(merged, topk)
+
+    def _flush(self):
+        if not self._pending:
+            return
+        try:
+            self.conn.executemany("INSERT OR REPLACE INTO tokens (namespace, key, tokens) VALUES (?, ?, ?)",
+                                  self._pending)
+            self.conn.commit()
+        except sqlite3.Error as e:
+            print(f"写入分词缓存失败: {e}")
+        self._pending = []
+
+    def flush(self):
+        """把新的分词结果写入持久层"""
+        with self._lock:
+            if self.conn is not None:
+                self._flush()
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+    def stats(self):
+        """命中次数、分词次数和内存中的条目数"""
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_token_cache(path=None, namespace='', max_entries=DEFAULT_MAX_ENTRIES):
+    """
+    获取共享的分词缓存：同一持久层路径和命名空间在进程内只有一个实例，所有分析器共用
+
+    参数:
+    - path: 持久层数据库路径，为空时只使用内存缓存
+    - namespace: 分词配置的标识
+    - max_entries: 内存中最多缓存的文本数
+
+    返回:
+    - TokenCache 实例
+    """
+    key = (os.path.abspath(path) if path else None, namespace)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = TokenCache(path, max_entries=max_entries, namespace=namespace)
+            if path:
+                atexit.register(cache.close)
+        return cache
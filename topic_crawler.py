@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+话题（#话题#）跟进爬取
+从高分微博中提取话题标签，通过 s.weibo.com 抓取话题下的微博，
+与已爬取的微博去重后交给正常的分析流程
+"""
+
+import re
+from collections import Counter
+
+HASHTAG_PATTERN = re.compile(r'#([^#\s][^#\n]{0,40}?)#')
+
+
+def extract_hashtags(weibos, top_n=5):
+    """
+    从微博列表中提取出现最多的话题标签
+
+    参数:
+    - weibos: 微博数据列表（应为已按分数排好序的高分微博）
+    - top_n: 返回的话题数量
+
+    返回:
+    - 话题列表（不含#号），出现次数相同时按首次出现的顺序
+    """
+    counter = Counter()
+    for weibo in weibos:
+        # 同一条微博中重复的标签只计一次
+        for tag in dict.fromkeys(HASHTAG_PATTERN.findall(str(weibo.get('content', '') or ''))):
+            tag = tag.strip()
+            if tag:
+                counter[tag] += 1
+    return [tag for tag, _ in counter.most_common(top_n)]
+
+
+class TopicCrawler:
+    def __init__(self, spider, max_workers=3, pages_per_topic=2):
+        """
+        初始化话题爬取器
+
+        参数:
+        - spider: fetch.WeiboSpider 实例，复用其搜索页解析和已爬取ID集合
+        - max_workers: 同时请求的搜索页数量
+        - pages_per_topic: 每个话题爬取的页数
+        """
+        self.spider = spider
+        self.max_workers = max(1, int(max_workers))
+        self.pages_per_topic = pages_per_topic
+
+    def crawl(self, topics):
+        """
+        爬取各话题下的微博
+
+        参数:
+        - topics: 话题列表（不含#号）
+
+        返回:
+        - 微博数据列表，已与爬虫的已爬取ID去重，keyword 字段为 #话题#；每个搜索页的新微博
+          和其他爬取入口一样经 spider._emit_page 清理正文后交给 on_page 回调
+        """
+        tasks = [(f"#{topic}#", page) for topic in topics for page in range(1, self.pages_per_topic + 1)]
+        if not tasks:
+            return []
+
+        print(f"开始爬取 {len(topics)} 个话题，共 {len(tasks)} 个搜索页")
+        page_results = self.spider._fetch_search_pages(tasks, max_workers=self.max_workers)
+
+        # 按任务顺序合并，保证去重结果稳定
+        results = []
+        for (query, page), weibos in zip(tasks, page_results):
+            new_weibos = []
+            for weibo_data in weibos or []:
+                if weibo_data['weibo_id'] in self.spider.seen_weibos:
+                    continue
+                self.spider.seen_weibos.add(weibo_data['weibo_id'])
+                weibo_data['keyword'] = query
+                new_weibos.append(weibo_data)
+            self.spider._emit_page(new_weibos)
+            results.extend(new_weibos)
+
+        print(f"话题爬取完成，新增 {len(results)} 条微博")
+        return results
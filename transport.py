@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+HTTP 传输层
+爬虫引擎的所有请求都经过这里：连接复用、限速和响应缓存只在这一处实现。
+提供三种传输方式：
+- sync: 每次请求直接调用 requests.get（与旧版行为一致）
+- pooled: 每个线程复用一个带连接池的 requests.Session
+- async: 在 pooled 基础上用线程池提交请求，返回 Future；引擎的批量请求（WeiboEngine.get_many：长微博全文、
+  全站/话题搜索页）都提交到这一个线程池，不再各自创建临时线程池
+"""
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class RateLimiter:
+    """线程安全的令牌桶限速器，rate 为每秒允许的请求数，0 表示不限速"""
+
+    def __init__(self, rate=0, burst=1):
+        self.rate = float(rate or 0)
+        self.capacity = max(1, int(burst))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """取得一个令牌，令牌不足时阻塞等待"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class ResponseCache:
+    """按URL缓存成功响应的内存缓存，超过 ttl 秒的条目视为过期"""
+
+    def __init__(self, ttl=300, max_entries=2000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                return None
+            stored_at, response = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[url]
+                return None
+            return response
+
+    def put(self, url, response):
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                # 淘汰最早写入的条目
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[url] = (time.monotonic(), response)
+
+
+class SyncTransport:
+    """直接调用 requests.get 的传输方式"""
+
+    name = 'sync'
+
+    def __init__(self, rate_limit=0, burst=1, cache_ttl=300, proxy=None):
+        """
+        初始化传输层
+
+        参数:
+        - rate_limit: 每秒最多发出的请求数，0 表示不限速
+        - burst: 限速器允许的突发请求数
+        - cache_ttl: 响应缓存的有效期（秒），0 表示不缓存
+        - proxy: 代理地址，同时用于 http 和 https
+        """
+        self.rate_limiter = RateLimiter(rate_limit, burst)
+        self.cache = ResponseCache(cache_ttl) if cache_ttl else None
+        self.proxies = {'http': proxy, 'https': proxy} if proxy else None
+
+    def _send(self, url, **kwargs):
+        return requests.get(url, **kwargs)
+
+    def get(self, url, headers=None, cookies=None, timeout=15, cache=False, **kwargs):
+        """
+        发送 GET 请求
+
+        参数:
+        - url: 请求URL
+        - headers: 请求头
+        - cookies: Cookie字典
+        - timeout: 超时秒数
+        - cache: 是否使用响应缓存（只缓存状态码200的响应）
+        - 其余参数原样传给 requests
+
+        返回:
+        - requests.Response
+        """
+        use_cache = cache and self.cache is not None and not kwargs.get('stream')
+        if use_cache:
+            response = self.cache.get(url)
+            if response is not None:
+                return response
+
+        if self.proxies:
+            kwargs.setdefault('proxies', self.proxies)
+        self.rate_limiter.acquire()
+        response = self._send(url, headers=headers, cookies=cookies, timeout=timeout, **kwargs)
+
+        if use_cache and response.status_code == 200:
+            self.cache.put(url, response)
+        return response
+
+    def close(self):
+        """释放传输层持有的资源"""
+
+
+class PooledTransport(SyncTransport):
+    """每个线程复用一个带连接池的 Session，避免重复建立TCP/TLS连接"""
+
+    name = 'pooled'
+
+    def __init__(self, rate_limit=0, burst=1, cache_ttl=300, proxy=None, pool_size=10):
+        super().__init__(rate_limit, burst, cache_ttl, proxy)
+        self.pool_size = pool_size
+        self._local = threading.local()
+        self._sessions = []
+        self._sessions_lock = threading.Lock()
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            self._local.session = session
+            with self._sessions_lock:
+                self._sessions.append(session)
+        return session
+
+    def _send(self, url, **kwargs):
+        return self._session().get(url, **kwargs)
+
+    def close(self):
+        with self._sessions_lock:
+            for session in self._sessions:
+                session.close()
+            self._sessions = []
+        self._local = threading.local()
+
+
+class AsyncTransport(PooledTransport):
+    """在线程池中发出请求的传输方式，submit 返回 Future，get 仍为阻塞调用"""
+
+    name = 'async'
+
+    def __init__(self, rate_limit=0, burst=1, cache_ttl=300, proxy=None, pool_size=10, max_workers=8):
+        super().__init__(rate_limit, burst, cache_ttl, proxy, pool_size)
+        self.executor = ThreadPoolExecutor(max_workers=max(1, int(max_workers)))
+
+    def submit(self, url, **kwargs):
+        """
+        提交一个 GET 请求
+
+        参数:
+        - url: 请求URL
+        - 其余参数与 get 相同
+
+        返回:
+        - concurrent.futures.Future，结果为 requests.Response
+        """
+        return self.executor.submit(self.get, url, **kwargs)
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        super().close()
+
+
+TRANSPORTS = {
+    SyncTransport.name: SyncTransport,
+    PooledTransport.name: PooledTransport,
+    AsyncTransport.name: AsyncTransport,
+}
+
+
+def create_transport(name='pooled', rate_limit=0, burst=1, cache_ttl=300, proxy=None, pool_size=10):
+    """
+    按名称创建传输层
+
+    参数:
+    - name: sync / pooled / async，未知名称时使用 pooled
+    - rate_limit: 每秒最多发出的请求数，0 表示不限速
+    - burst: 限速器允许的突发请求数
+    - cache_ttl: 响应缓存的有效期（秒），0 表示不缓存
+    - proxy: 代理地址
+    - pool_size: 连接池大小（sync 方式忽略）
+
+    返回:
+    - 传输层实例
+    """
+    transport_cls = TRANSPORTS.get(name)
+    if transport_cls is None:
+        print(f"未知的传输方式: {name}，使用 pooled")
+        transport_cls = PooledTransport
+    if transport_cls is SyncTransport:
+        return SyncTransport(rate_limit, burst, cache_ttl, proxy)
+    return transport_cls(rate_limit, burst, cache_ttl, proxy, pool_size)
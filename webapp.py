@@ -15,11 +15,16 @@ from typing import Optional
 from fastapi import FastAPI, Form
 from fastapi.responses import HTMLResponse, FileResponse, PlainTextResponse, JSONResponse
 
+import result_store
+from result_db import open_db
+
 
 APP_DIR = os.path.dirname(os.path.abspath(__file__))
 FRONTEND_DIR = os.path.join(APP_DIR, 'frontend')
 CONFIG_PATH = os.path.join(APP_DIR, 'config.json')
 RESULTS_DIR = os.path.join(APP_DIR, 'results')
+STORE_DIR = os.path.join(RESULTS_DIR, 'store')
+DB_PATH = os.path.join(RESULTS_DIR, 'weibo.db')
 
 
 def ensure_dirs() -> None:
@@ -41,6 +46,11 @@ def update_cookie_in_config(cookie: str) -> None:
 
 def find_latest_csv() -> Optional[str]:
     ensure_dirs()
+    # 最近一次运行只写了列式存储时，导出它的CSV视图供下载
+    run_id = result_store.latest_run_id(STORE_DIR)
+    if run_id and run_id > (result_store.latest_csv_run_id(RESULTS_DIR) or ''):
+        result_store.export_csv(os.path.join(RESULTS_DIR, f'all_results_{run_id}.csv'),
+                                run_id=run_id, store_dir=STORE_DIR)
     csv_files = sorted(glob.glob(os.path.join(RESULTS_DIR, 'all_results_*.csv')), key=os.path.getmtime, reverse=True)
     return csv_files[0] if csv_files else None
 
@@ -316,6 +326,19 @@ def download(filename: str):
     return FileResponse(target_path, media_type='text/csv', filename=filename)
 
 
+@app.get('/posts', response_class=JSONResponse)
+def posts(keyword: Optional[str] = None, user_id: Optional[str] = None, latest: bool = False,
+          min_likes: Optional[int] = None, order_by: str = 'attitudes_count', limit: int = 100):
+    result_db = open_db(DB_PATH)
+    if result_db is None:
+        return JSONResponse({'ok': False, 'msg': '结果数据库不存在', 'posts': []})
+    with result_db:
+        df = result_db.query_posts(keyword=keyword, user_id=user_id, latest_run=latest,
+                                   min_likes=min_likes, order_by=order_by, limit=min(max(limit, 1), 1000))
+    df = df.astype(object).where(df.notna(), None)
+    return {'ok': True, 'count': len(df), 'posts': df.to_dict('records')}
+
+
 @app.get('/logs', response_class=JSONResponse)
 def logs():
     with _job_lock:
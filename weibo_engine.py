@@ -0,0 +1,1048 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+微博爬虫引擎
+所有爬虫入口（fetch.py、WeiboSpider.py、weibo_spider.py）共用的实现：
+- 请求统一经过可替换的传输层（transport.py），连接池、限速和缓存只在一处
+- 用户时间线通过可替换的数据源获取（timeline_source.py）
+- 接口返回的微博统一由 normalize_weibo 转换为结果记录
+"""
+
+import os
+import re
+import copy
+import json
+import time
+import random
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
+from lxml import etree
+from tqdm import tqdm
+from fake_useragent import UserAgent
+from timeline_source import create_timeline_sources
+from long_text import LongTextExpander
+from transport import create_transport
+import fast_json
+from weibo_record import WeiboRecord
+from text_cleaner import clean_records
+
+DETAIL_URL = "https://weibo.com/ajax/statuses/show?id={}"
+DEFAULT_VIDEO_COVER = 'https://h5.sinaimg.cn/upload/100/1493/2020/05/09/timeline_card_small_video_default.png'
+
+# s.weibo.com 搜索结果卡片的预编译XPath，避免每张卡片重复编译表达式
+CARD_XPATH = etree.XPath('//div[@action-type="feed_list_item"][@mid]')
+CARD_MID_XPATH = etree.XPath('string(@mid)')
+CARD_CONTENT_FULL_XPATH = etree.XPath('.//p[@node-type="feed_list_content_full"]')
+CARD_CONTENT_XPATH = etree.XPath('.//p[@node-type="feed_list_content"]')
+CARD_USER_NAME_XPATH = etree.XPath('string(.//a[@class="name"][1])')
+CARD_USER_LINK_XPATH = etree.XPath('string(.//a[@class="name"][1]/@href)')
+CARD_FROM_LINKS_XPATH = etree.XPath('.//div[@class="from"][1]/a')
+CARD_ACT_ITEMS_XPATH = etree.XPath('.//div[@class="card-act"]/ul/li')
+TEXT_XPATH = etree.XPath('string(.)')
+IMAGE_SRC_XPATHS = (
+    etree.XPath('.//div[contains(@class, "media-pic")]//img/@src'),
+    etree.XPath('.//div[@node-type="feed_list_media_prev"]//img/@src'),
+    etree.XPath('.//img[contains(@class, "pic")]/@src'),
+)
+VIDEO_NODE_XPATH = etree.XPath('.//div[contains(@class, "media-video")]')
+VIDEO_URL_XPATHS = (
+    etree.XPath('./@data-url'),
+    etree.XPath('./video/@src'),
+    etree.XPath('./@action-data'),
+)
+
+USER_ID_PATTERNS = [
+    re.compile(r'weibo\.com/u/(\d+)'),
+    re.compile(r'weibo\.com/(\d+)'),
+    re.compile(r'weibo\.com/p/(\d+)'),
+    re.compile(r'weibo\.com/profile/(\d+)'),
+]
+SHORT_URL_PATTERN = re.compile(r'http://t\.cn/[A-Za-z0-9]+')
+
+
+def extract_user_id(user_url):
+    """从用户URL中提取用户ID，无法识别时返回 None"""
+    for pattern in USER_ID_PATTERNS:
+        match = pattern.search(user_url or '')
+        if match:
+            return match.group(1)
+    return None
+
+
+def parse_cookie_string(cookie_str):
+    """
+    解析Cookie配置
+
+    参数:
+    - cookie_str: "k1=v1; k2=v2" 格式的字符串、JSON字符串或字典
+
+    返回:
+    - Cookie字典
+    """
+    if isinstance(cookie_str, dict):
+        return dict(cookie_str)
+    cookie_str = (cookie_str or '').strip()
+    if cookie_str.startswith('{'):
+        return json.loads(cookie_str)
+    cookies = {}
+    for item in cookie_str.split(';'):
+        if '=' in item:
+            key, value = item.strip().split('=', 1)
+            cookies[key] = value
+    return cookies
+
+
+def _pick_video_url(urls, media_info, container):
+    """按清晰度依次从 urls、media_info 中取视频地址，最后退回到播放页地址"""
+    for source in (urls, media_info):
+        if isinstance(source, dict):
+            url = (source.get('mp4_720p_mp4', '') or source.get('mp4_hd_url', '')
+                   or source.get('mp4_sd_url', '') or source.get('stream_url', ''))
+            if url:
+                return url
+    return container.get('play_url', '') or container.get('media_url', '') or container.get('url', '')
+
+
+def _page_pic_url(page_info):
+    page_pic = page_info.get('page_pic', '')
+    if isinstance(page_pic, dict):
+        return page_pic.get('url', '')
+    return page_pic or ''
+
+
+def extract_video(weibo):
+    """
+    从接口返回的微博中提取视频地址和封面
+
+    依次检查 page_info、mix_media_info 和被转发微博的 page_info，
+    前面找到的地址和封面不会被后面的覆盖。
+
+    参数:
+    - weibo: 接口返回的微博字典
+
+    返回:
+    - (video_url, video_cover) 元组
+    """
+    video_url = video_cover = ''
+
+    page_info = weibo.get('page_info') or {}
+    if page_info.get('type') == 'video':
+        video_url = _pick_video_url(page_info.get('urls'), page_info.get('media_info'), page_info)
+        video_cover = _page_pic_url(page_info)
+
+    for item in (weibo.get('mix_media_info') or {}).get('items', []) or []:
+        if item.get('type') == 'video':
+            data = item.get('data', {}) or {}
+            if not video_url:
+                video_url = _pick_video_url(data.get('urls'), data.get('media_info'), data)
+            if not video_cover:
+                video_cover = ((data.get('cover_image') or {}).get('url', '')
+                               or data.get('cover_image_url', '') or data.get('thumb_pic', ''))
+            break
+
+    retweeted_page_info = (weibo.get('retweeted_status') or {}).get('page_info') or {}
+    if retweeted_page_info.get('type') == 'video':
+        if not video_url:
+            video_url = _pick_video_url(retweeted_page_info.get('urls'), retweeted_page_info.get('media_info'),
+                                        retweeted_page_info)
+        if not video_cover:
+            video_cover = _page_pic_url(retweeted_page_info)
+
+    return video_url, video_cover
+
+
+def normalize_weibo(weibo, user_id, keyword='', content=None, user_name=None, image_urls=None, local_paths=None):
+    """
+    将接口返回的微博转换为统一的结果记录
+
+    参数:
+    - weibo: 接口返回的微博字典（mymblog/container/statuses/show 格式）
+    - user_id: 用户ID
+    - keyword: 匹配的关键词
+    - content: 微博正文，为空时取 weibo 的 text_raw（展开后的全文应由调用方传入）
+    - user_name: 用户昵称，为空时取 weibo 中的 screen_name
+    - image_urls: 图片地址列表，为空时由 pic_ids 生成
+    - local_paths: 已下载图片的本地路径列表
+
+    返回:
+    - WeiboRecord 结果记录
+    """
+    if image_urls is None:
+        image_urls = [f"https://wx1.sinaimg.cn/large/{pic_id}.jpg" for pic_id in weibo.get('pic_ids', []) or []]
+    if user_name is None:
+        user_name = (weibo.get('user') or {}).get('screen_name', '')
+    video_url, video_cover = extract_video(weibo)
+
+    return WeiboRecord(
+        weibo_id=str(weibo.get('id', '未知ID')),
+        user_name=user_name,
+        user_id=user_id,
+        content=weibo.get('text_raw', '') if content is None else content,
+        publish_time=weibo.get('created_at', '未知时间'),
+        reposts_count=weibo.get('reposts_count', 0),
+        comments_count=weibo.get('comments_count', 0),
+        attitudes_count=weibo.get('attitudes_count', 0),
+        source=weibo.get('source', '未知来源'),
+        keyword=keyword,
+        image_urls=image_urls,
+        local_image_paths=local_paths or [],
+        video_url=video_url,
+        video_cover=video_cover
+    )
+
+
+def load_spider_config():
+    """读取 config.json，失败时返回空配置"""
+    try:
+        with open('config.json', 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"读取config.json失败: {str(e)}")
+        return {}
+
+
+def _future_result(future):
+    """Future 的结果，出错时返回异常对象"""
+    try:
+        return future.result()
+    except Exception as e:
+        return e
+
+
+class WeiboEngine:
+    def __init__(self, config=None, transport=None, timeline_sources=None):
+        """
+        初始化爬虫引擎
+
+        参数:
+        - config: 配置字典，为空时读取 config.json
+        - transport: 传输层实例，为空时按配置 transport（sync/pooled/async）创建
+        - timeline_sources: 时间线数据源名称列表，为空时按配置 timeline_source 选择
+        """
+        self.seen_weibos = set()
+        self.downloaded_images = set()  # 跟踪已下载的图片URL
+        self.timeline_cursors = {}  # 用户ID -> 下一页的since_id游标，用于断点续爬
+        self.on_page = None  # 每处理完一页时以该页的新记录列表调用，用于流式写出结果
+        self.download_media_enabled = False
+        # 尝试创建 UserAgent；若在受限网络环境（如 serverless）失败，则忽略
+        try:
+            self.ua = UserAgent()
+        except Exception:
+            self.ua = None
+        self.base_url = "https://s.weibo.com/weibo"
+        self.headers = {
+            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
+            "Accept": "application/json, text/plain, */*",
+            "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+            "Accept-Encoding": "gzip, deflate, br",
+            "Connection": "keep-alive",
+            "Referer": "https://weibo.com/",
+            "X-Requested-With": "XMLHttpRequest",
+            "Sec-Fetch-Dest": "empty",
+            "Sec-Fetch-Mode": "cors",
+            "Sec-Fetch-Site": "same-origin",
+            "Cache-Control": "no-cache",
+            "Pragma": "no-cache",
+        }
+
+        if config is None:
+            config = load_spider_config()
+        self.config = config
+
+        self.cookies = {}
+        cookie_str = config.get('cookie', '')
+        if cookie_str:
+            self.set_cookies(cookie_str)
+            print("已从config.json加载cookie配置")
+        else:
+            print("警告: config.json中未找到cookie配置")
+
+        # 传输层：连接池、限速和响应缓存
+        self.transport = transport or create_transport(
+            config.get('transport', 'pooled'),
+            rate_limit=config.get('rate_limit_per_second', 2),
+            burst=config.get('rate_limit_burst', 1),
+            cache_ttl=config.get('response_cache_ttl', 300),
+            proxy=config.get('proxy'),
+            pool_size=config.get('http_pool_size', 10)
+        )
+
+        # 时间线数据源：auto 表示按用户探测，选用单次请求返回微博最多的数据源
+        if timeline_sources is None:
+            source_name = config.get('timeline_source', 'auto')
+            timeline_sources = None if source_name == 'auto' else [source_name]
+        self.timeline_sources = create_timeline_sources(
+            timeline_sources,
+            page_size=config.get('timeline_page_size', 50)
+        ) or create_timeline_sources(['mymblog'])
+        self.user_timeline_sources = {}  # 用户ID -> 选定的数据源
+        self._probed_pages = {}  # (用户ID, 数据源名称) -> 探测时拿到的第一页
+
+        # 长微博全文展开（按页批量请求 longtext 接口）
+        self.long_text = LongTextExpander(
+            self,
+            max_workers=config.get('long_text_workers', 4),
+            cache_file=config.get('long_text_cache') or None,
+            max_entries=config.get('long_text_cache_size', 20000),
+            save_interval=config.get('long_text_save_interval', 300)
+        )
+
+        # 创建下载目录
+        self.media_dir = "media"
+        os.makedirs(self.media_dir, exist_ok=True)
+
+    def _get_random_delay(self):
+        """生成随机延迟，避免被检测为爬虫"""
+        return random.uniform(2, 5)
+
+    def _update_headers(self):
+        """更新请求头，防止被检测。若 fake_useragent 可用则更新 UA，否则使用固定 UA。"""
+        try:
+            if self.ua:
+                self.headers["User-Agent"] = self.ua.random
+        except Exception:
+            # 保持默认固定 UA
+            pass
+
+    def get(self, url, headers=None, timeout=15, cache=False, **kwargs):
+        """
+        通过传输层发送带 Cookie 的 GET 请求
+
+        参数:
+        - url: 请求URL
+        - headers: 请求头，为空时使用爬虫的默认请求头
+        - timeout: 超时秒数
+        - cache: 是否使用响应缓存
+
+        返回:
+        - requests.Response
+        """
+        return self.transport.get(url, headers=headers or self.headers, cookies=self.cookies,
+                                  timeout=timeout, cache=cache, **kwargs)
+
+    def get_many(self, batch, max_workers=4):
+        """
+        并发发送一批带 Cookie 的 GET 请求
+
+        传输层为 async 时请求经 transport.submit 提交到传输层共享的线程池，所有批量请求共用这组线程；
+        其他传输方式在临时线程池中以 max_workers 个线程发送。请求总速率都受传输层限速器限制。
+
+        参数:
+        - batch: (url, 参数字典) 列表，参数与 get 相同
+        - max_workers: 非 async 传输方式的并发数
+
+        返回:
+        - 与 batch 顺序相同的列表，元素为 requests.Response；请求出错时为该异常
+        """
+        if not batch:
+            return []
+        calls = []
+        for url, options in batch:
+            options = dict(options)
+            options['headers'] = options.get('headers') or self.headers
+            options['cookies'] = self.cookies
+            calls.append((url, options))
+
+        submit = getattr(self.transport, 'submit', None)
+        if submit is not None:
+            futures = [submit(url, **options) for url, options in calls]
+            return [_future_result(future) for future in futures]
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(calls)))) as executor:
+            futures = [executor.submit(self.transport.get, url, **options) for url, options in calls]
+            return [_future_result(future) for future in futures]
+
+    def download_media(self, url, media_type, keyword, weibo_id):
+        """
+        下载媒体文件（图片或视频）
+
+        参数:
+        - url: 媒体文件URL
+        - media_type: 媒体类型 ('image' 或 'video')
+        - keyword: 搜索关键词
+        - weibo_id: 微博ID
+
+        返回:
+        - 本地文件路径
+        """
+        try:
+            # 检查是否已经下载过这个URL
+            if url in self.downloaded_images:
+                print(f"图片已下载过，跳过: {url}")
+                return ""
+
+            # 创建关键词专用目录
+            keyword_dir = os.path.join(self.media_dir, keyword)
+            os.makedirs(keyword_dir, exist_ok=True)
+
+            # 从URL中提取更具体的标识符
+            url_parts = url.split('/')
+            unique_id = url_parts[-1].split('?')[0] if url_parts else str(int(time.time()))
+
+            # 获取文件扩展名
+            file_ext = url.split('.')[-1].split('?')[0]
+            if file_ext not in ['jpg', 'jpeg', 'png', 'gif', 'webp', 'mp4', 'mov']:
+                file_ext = 'jpg'  # 默认为jpg
+
+            # 生成更唯一的文件名
+            timestamp = int(time.time() * 1000)  # 使用毫秒级时间戳
+            random_suffix = random.randint(1000, 9999)
+            filename = f"{media_type}_{weibo_id}_{unique_id}_{timestamp}_{random_suffix}.{file_ext}"
+            file_path = os.path.join(keyword_dir, filename)
+
+            # 下载文件（图片服务器不需要Cookie）
+            headers = self.headers.copy()
+            headers['Referer'] = 'https://weibo.com/'
+
+            response = self.transport.get(url, headers=headers, timeout=30, stream=True)
+            response.raise_for_status()
+
+            # 保存文件
+            with open(file_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=8192):
+                    if chunk:
+                        f.write(chunk)
+
+            # 检查文件大小
+            file_size = os.path.getsize(file_path)
+            print(f"下载成功: {filename} (大小: {file_size} bytes)")
+
+            # 记录已下载的URL
+            self.downloaded_images.add(url)
+
+            return file_path
+
+        except Exception as e:
+            print(f"下载失败 {url}: {e}")
+            return ""
+
+    def extract_images(self, card, keyword, weibo_id):
+        """
+        提取微博图片链接并可选下载
+
+        参数:
+        - card: 微博卡片元素
+        - keyword: 搜索关键词
+        - weibo_id: 微博ID
+
+        返回:
+        - (image_urls, local_paths) 元组
+        """
+        # 图片容器通常在这些位置，依次尝试
+        image_nodes = []
+        for xpath in IMAGE_SRC_XPATHS:
+            image_nodes = xpath(card)
+            if image_nodes:
+                break
+
+        if image_nodes:
+            print(f"微博{weibo_id}找到{len(image_nodes)}个图片")
+
+        # 清理URL地址
+        image_urls = []
+        local_paths = []
+
+        for url in image_nodes:
+            if url.startswith('//'):
+                url = 'https:' + url
+
+            # 将thumbnail链接转换为原图链接
+            if '/thumb150/' in url:
+                url = url.replace('/thumb150/', '/large/')
+            elif '/bmiddle/' in url:
+                url = url.replace('/bmiddle/', '/large/')
+
+            image_urls.append(url)
+
+            # 如果启用了媒体下载，则下载图片
+            if self.download_media_enabled:
+                local_path = self.download_media(url, 'image', keyword, weibo_id)
+                if local_path:
+                    local_paths.append(local_path)
+                time.sleep(0.5)  # 短暂延迟，避免请求过快
+
+        return image_urls, local_paths
+
+    def extract_videos(self, card, keyword, weibo_id):
+        """
+        提取微博视频链接 - 简化版中不会下载
+        """
+        video_urls = []
+        for node in VIDEO_NODE_XPATH(card):
+            # 依次尝试 data-url、video/@src 和 action-data 属性
+            video_url = []
+            for xpath in VIDEO_URL_XPATHS:
+                video_url = xpath(node)
+                if video_url:
+                    break
+
+            if video_url:
+                url = video_url[0]
+                if url.startswith('//'):
+                    url = 'https:' + url
+
+                video_urls.append(url)
+
+        return video_urls, []  # 返回空列表作为本地路径，不下载
+
+    def _emit_page(self, records):
+        """清理一页新记录的正文（原地修改，返回结果中的记录同样是清理后的），再交给 on_page 回调"""
+        clean_records(records)
+        if self.on_page is not None and records:
+            try:
+                self.on_page(records)
+            except Exception as e:
+                print(f"写出页面结果时出错: {e}")
+
+    def worker_copy(self, on_page=None):
+        """
+        创建供单个爬取线程使用的爬虫副本
+
+        副本与原实例共用传输层（连接池和限速器）、Cookie 和长文本缓存，但有自己的去重集合（以当前
+        已爬取的微博为起点）、数据源选择、探测缓存、请求头和 on_page 回调，线程之间不共享可变的爬取状态。
+        副本之间的去重由调用方在合并结果时完成。
+
+        参数:
+        - on_page: 副本每处理完一页时调用的回调
+
+        返回:
+        - 爬虫副本
+        """
+        worker = copy.copy(self)
+        worker.seen_weibos = set(self.seen_weibos)
+        worker.user_timeline_sources = dict(self.user_timeline_sources)
+        worker._probed_pages = {}
+        worker.headers = dict(self.headers)
+        worker.on_page = on_page
+        return worker
+
+    def _extract_user_id(self, user_url):
+        """从用户URL中提取用户ID"""
+        return extract_user_id(user_url)
+
+    def _request_timeline_page(self, source, user_id, page, cursor=''):
+        """
+        请求并解析时间线的一页
+
+        参数:
+        - source: 时间线数据源
+        - user_id: 用户ID
+        - page: 页码
+        - cursor: since_id游标
+
+        返回:
+        - (微博列表, 下一页游标) 元组；请求失败时返回 None
+        """
+        # 更新请求头
+        self._update_headers()
+        headers = dict(self.headers, **source.extra_headers)
+
+        # 发送请求
+        response = self.get(source.build_url(user_id, page, cursor), headers=headers, allow_redirects=True)
+
+        # 检查响应状态
+        if response.status_code == 403:
+            print("请求被拒绝(403)，可能cookie已过期或被封，等待更长时间后重试...")
+            time.sleep(10)
+            return None
+        elif response.status_code != 200:
+            print(f"请求失败，状态码: {response.status_code}")
+            if response.status_code == 429:
+                print("请求过于频繁，等待更长时间...")
+                time.sleep(30)
+            return None
+
+        try:
+            return source.parse(fast_json.parse(response.content))
+        except ValueError:
+            print(f"解析JSON失败，页面 {page}")
+            return None
+
+    def _select_timeline_source(self, user_id):
+        """
+        为用户选择时间线数据源
+
+        只配置了一个数据源时直接使用；否则各请求一次第一页，选用返回微博
+        最多的数据源。探测拿到的第一页会被缓存，正式爬取时不再重复请求。
+
+        参数:
+        - user_id: 用户ID
+
+        返回:
+        - 时间线数据源
+        """
+        if user_id in self.user_timeline_sources:
+            return self.user_timeline_sources[user_id]
+        if len(self.timeline_sources) == 1:
+            self.user_timeline_sources[user_id] = self.timeline_sources[0]
+            return self.timeline_sources[0]
+
+        best_source, best_count = self.timeline_sources[0], -1
+        for source in self.timeline_sources:
+            try:
+                result = self._request_timeline_page(source, user_id, 1)
+            except Exception as e:
+                print(f"探测数据源 {source.name} 时出错: {str(e)}")
+                result = None
+            if result is None:
+                continue
+            self._probed_pages[(user_id, source.name)] = result
+            if len(result[0]) > best_count:
+                best_source, best_count = source, len(result[0])
+
+        print(f"用户 {user_id} 使用时间线数据源: {best_source.name}（单页 {max(best_count, 0)} 条）")
+        self.user_timeline_sources[user_id] = best_source
+        return best_source
+
+    def _iter_timeline_pages(self, user_id, pages, start_page=1, since_id=None):
+        """
+        按游标遍历用户的微博列表页
+
+        接口每页响应都会返回 since_id，带上它请求下一页可以避免爬取过程中
+        有新微博发布导致的翻页错位（重复或遗漏）。若接口没有返回游标，
+        则退回到按页码翻页。
+
+        参数:
+        - user_id: 用户ID
+        - pages: 最多请求的页数
+        - start_page: 起始页码
+        - since_id: 起始游标，为空时从最新一页开始
+
+        生成:
+        - (页码, 微博列表) 元组
+        """
+        source = self._select_timeline_source(user_id)
+        cursor = str(since_id) if since_id else ''
+        use_cursor = bool(cursor)
+        page = start_page
+
+        for _ in tqdm(range(pages), desc="爬取进度"):
+            try:
+                # 第一页优先使用选择数据源时的探测结果
+                result = None
+                if page == 1 and not cursor:
+                    result = self._probed_pages.pop((user_id, source.name), None)
+                if result is None:
+                    # 失败时保留当前游标，下一轮重试同一页
+                    result = self._request_timeline_page(source, user_id, page, cursor)
+                    if result is None:
+                        continue
+
+                weibo_list, next_cursor = result
+                if not weibo_list:
+                    print(f"页面 {page} 未找到微博内容，可能已到达末页")
+                    break
+
+                self.timeline_cursors[user_id] = next_cursor
+
+                yield page, weibo_list
+
+                page += 1
+                if next_cursor:
+                    cursor = next_cursor
+                    use_cursor = True
+                elif use_cursor:
+                    # 游标模式下接口不再返回since_id，说明已经到达时间线末尾
+                    break
+
+                # 添加延迟
+                time.sleep(self._get_random_delay())
+
+            except Exception as e:
+                print(f"爬取页面 {page} 时出错: {str(e)}")
+                continue
+
+    def get_timeline_cursor(self, user_url):
+        """
+        获取用户时间线的续爬游标
+
+        参数:
+        - user_url: 用户主页URL
+
+        返回:
+        - 下一页的since_id，没有记录时返回空字符串
+        """
+        user_id = self._extract_user_id(user_url)
+        return self.timeline_cursors.get(user_id, '') if user_id else ''
+
+    def fetch_detail(self, weibo_id):
+        """
+        获取单条微博的详细信息（结果按URL缓存，同一条微博不会重复请求）
+
+        参数:
+        - weibo_id: 微博ID
+
+        返回:
+        - 只含所需字段的详细信息字典（见 fast_json.project_weibo），失败时返回 None
+        """
+        try:
+            response = self.get(DETAIL_URL.format(weibo_id), timeout=10, cache=True)
+            if response.status_code == 200:
+                return fast_json.parse_weibo(response.content) or None
+        except Exception as e:
+            print(f"获取微博详细信息时出错: {e}")
+        return None
+
+    def _build_record(self, weibo, user_id, keyword, download_media, media_keyword):
+        """
+        补全详细信息、按需下载图片，并转换为结果记录
+
+        参数:
+        - weibo: 时间线接口返回的微博
+        - user_id: 用户ID
+        - keyword: 写入记录的关键词
+        - download_media: 是否下载图片
+        - media_keyword: 图片保存的子目录名
+
+        返回:
+        - WeiboRecord 结果记录
+        """
+        # 正文和昵称取自时间线（长微博已展开），其余字段优先用详细信息
+        content = weibo.get('text_raw', '')
+        user_name = (weibo.get('user') or {}).get('screen_name', '')
+        weibo_id = str(weibo.get('id', '未知ID'))
+
+        detail = self.fetch_detail(weibo_id)
+        if detail:
+            weibo = detail
+            print(f"成功获取微博详细信息: {weibo_id}")
+
+        # 提取图片URL，如果启用了媒体下载则下载图片
+        image_urls = [f"https://wx1.sinaimg.cn/large/{pic_id}.jpg" for pic_id in weibo.get('pic_ids', []) or []]
+        local_paths = []
+        if download_media and image_urls:
+            for url in image_urls:
+                local_path = self.download_media(url, 'image', media_keyword, weibo_id)
+                if local_path:
+                    local_paths.append(local_path)
+                time.sleep(0.5)  # 短暂延迟，避免请求过快
+
+        weibo_data = normalize_weibo(weibo, user_id, keyword=keyword, content=content, user_name=user_name,
+                                     image_urls=image_urls, local_paths=local_paths)
+        weibo_data['weibo_id'] = weibo_id
+        if weibo_data['video_url']:
+            print(f"找到视频微博，视频链接: {weibo_data['video_url']}")
+        return weibo_data
+
+    def _resolve_short_url_video(self, weibo_data):
+        """正文中含 t.cn 短链接但还没有视频地址时，尝试从详细信息中找视频，找不到则用短链接代替"""
+        short_urls = SHORT_URL_PATTERN.findall(weibo_data['content'])
+        if not short_urls:
+            return
+
+        detail = self.fetch_detail(weibo_data['weibo_id'])
+        page_info = (detail or {}).get('page_info') or {}
+        if page_info.get('type') == 'video':
+            weibo_data['video_url'] = _pick_video_url(None, page_info.get('media_info'), page_info)
+            weibo_data['video_cover'] = _page_pic_url(page_info)
+            print(f"在短链接中找到视频，视频链接: {weibo_data['video_url']}")
+
+        if not weibo_data['video_url']:
+            weibo_data['video_url'] = short_urls[0]
+            weibo_data['video_cover'] = DEFAULT_VIDEO_COVER
+            print(f"使用短链接作为视频链接: {weibo_data['video_url']}")
+
+    def fetch_user_posts(self, user_url, pages=1, download_media=False, since_id=None):
+        """
+        直接爬取用户主页的所有帖子（不使用关键词过滤）
+
+        参数:
+        - user_url: 用户主页URL
+        - pages: 爬取页数，默认为1页
+        - download_media: 是否下载媒体文件
+        - since_id: 起始游标，传入上次保存的游标可从中断处继续爬取
+
+        返回:
+        - 微博数据列表
+        """
+        results = []
+        self.download_media_enabled = download_media
+
+        user_id = self._extract_user_id(user_url)
+        if not user_id:
+            print(f"无法从URL中提取用户ID: {user_url}")
+            return results
+
+        print(f"准备直接爬取用户 {user_id} 的主页，计划爬取 {pages} 页")
+
+        for page, weibo_list in self._iter_timeline_pages(user_id, pages, since_id=since_id):
+            page_results = []
+            try:
+                # 批量展开本页被截断的长微博
+                self.long_text.expand(weibo_list, skip_ids=self.seen_weibos)
+
+                for weibo in weibo_list:
+                    weibo_id = str(weibo.get('id', '未知ID'))
+
+                    # 检查是否已经爬取过这条微博
+                    if weibo_id in self.seen_weibos:
+                        continue
+                    self.seen_weibos.add(weibo_id)
+
+                    # 直接爬取不需要关键词
+                    weibo_data = self._build_record(weibo, user_id, '', download_media, f'user_{user_id}')
+                    results.append(weibo_data)
+                    page_results.append(weibo_data)
+                    print(f"爬取到微博: {weibo_data['content'][:50]}...")
+            except Exception as e:
+                print(f"处理页面 {page} 时出错: {str(e)}")
+                continue
+            finally:
+                self._emit_page(page_results)
+
+        self.long_text.save_cache()
+        print(f"\n用户 {user_id} 共爬取到 {len(results)} 条微博")
+        return results
+
+    def search_keyword(self, user_url, keyword, pages=5, start_page=1, download_media=False, since_id=None):
+        """
+        在用户主页中搜索包含关键词的微博
+
+        参数:
+        - user_url: 用户主页URL
+        - keyword: 搜索关键词
+        - pages: 爬取页数
+        - start_page: 开始爬取的页码，默认从第1页开始（仅在没有游标时生效）
+        - download_media: 是否下载媒体文件
+        - since_id: 起始游标，传入上次保存的游标可从中断处继续爬取
+
+        返回:
+        - 搜索结果列表
+        """
+        results = []
+        self.download_media_enabled = download_media
+
+        user_id = self._extract_user_id(user_url)
+        if not user_id:
+            print(f"无法从URL中提取用户ID: {user_url}")
+            return results
+
+        end_page = start_page + pages - 1
+        print(f"准备在用户 {user_id} 的主页中搜索关键词 '{keyword}', 计划爬取 {start_page} 到 {end_page} 页")
+
+        for page, weibo_list in self._iter_timeline_pages(user_id, pages, start_page=start_page, since_id=since_id):
+            page_results = []
+            try:
+                # 批量展开本页被截断、且前缀中尚未命中关键词的长微博
+                self.long_text.expand(weibo_list, keyword=keyword, skip_ids=self.seen_weibos)
+
+                for weibo in weibo_list:
+                    # 检查是否包含关键词（不区分大小写）
+                    content = weibo.get('text_raw', '')
+                    if keyword.lower() not in content.lower():
+                        continue
+
+                    weibo_id = str(weibo.get('id', '未知ID'))
+
+                    # 检查是否已经爬取过这条微博
+                    if weibo_id in self.seen_weibos:
+                        continue
+                    self.seen_weibos.add(weibo_id)
+
+                    weibo_data = self._build_record(weibo, user_id, keyword, download_media, keyword)
+
+                    # 检查短链接中的视频
+                    if not weibo_data['video_url']:
+                        try:
+                            self._resolve_short_url_video(weibo_data)
+                        except Exception as e:
+                            print(f"解析短链接时出错: {e}")
+
+                    results.append(weibo_data)
+                    page_results.append(weibo_data)
+                    print(f"找到匹配关键词 '{keyword}' 的微博: {content[:50]}...")
+            except Exception as e:
+                print(f"处理页面 {page} 时出错: {str(e)}")
+                continue
+            finally:
+                self._emit_page(page_results)
+
+        self.long_text.save_cache()
+        print(f"\n在用户 {user_id} 的主页中共找到 {len(results)} 条包含关键词 '{keyword}' 的微博")
+        return results
+
+    def _parse_count(self, text):
+        """解析互动数文本，如 '转发 12'、'1.2万'，无法解析时返回0"""
+        match = re.search(r'(\d+(?:\.\d+)?)\s*(万)?', text or '')
+        if not match:
+            return 0
+        value = float(match.group(1))
+        if match.group(2):
+            value *= 10000
+        return int(value)
+
+    def _parse_search_card(self, card, keyword):
+        """
+        将搜索结果卡片解析为与用户主页爬取相同格式的微博数据
+
+        参数:
+        - card: 微博卡片元素
+        - keyword: 搜索关键词
+
+        返回:
+        - WeiboRecord 结果记录，缺少微博ID时返回 None
+        """
+        weibo_id = CARD_MID_XPATH(card)
+        if not weibo_id:
+            return None
+
+        # 长微博的全文在 feed_list_content_full 中，否则取 feed_list_content
+        content_nodes = CARD_CONTENT_FULL_XPATH(card) or CARD_CONTENT_XPATH(card)
+        content = TEXT_XPATH(content_nodes[0]) if content_nodes else ''
+        content = re.sub(r'\s*收起d?\s*$', '', content.strip())
+
+        user_link = CARD_USER_LINK_XPATH(card)
+        user_match = re.search(r'weibo\.com/(?:u/)?(\d+)', user_link)
+
+        from_links = CARD_FROM_LINKS_XPATH(card)
+        publish_time = TEXT_XPATH(from_links[0]).strip() if from_links else '未知时间'
+        source = TEXT_XPATH(from_links[1]).strip() if len(from_links) > 1 else '未知来源'
+
+        # 互动栏依次为 转发、评论、赞（部分版本前面还有收藏）
+        reposts_count = comments_count = attitudes_count = 0
+        for item in CARD_ACT_ITEMS_XPATH(card):
+            text = TEXT_XPATH(item).strip()
+            if '转发' in text:
+                reposts_count = self._parse_count(text)
+            elif '评论' in text:
+                comments_count = self._parse_count(text)
+            elif '收藏' not in text:
+                attitudes_count = self._parse_count(text)
+
+        image_urls, local_paths = self.extract_images(card, keyword, weibo_id)
+        video_urls, _ = self.extract_videos(card, keyword, weibo_id)
+
+        return WeiboRecord(
+            weibo_id=weibo_id,
+            user_name=CARD_USER_NAME_XPATH(card).strip(),
+            user_id=user_match.group(1) if user_match else '',
+            content=content,
+            publish_time=publish_time or '未知时间',
+            reposts_count=reposts_count,
+            comments_count=comments_count,
+            attitudes_count=attitudes_count,
+            source=source or '未知来源',
+            keyword=keyword,
+            image_urls=image_urls,
+            local_image_paths=local_paths,
+            video_url=video_urls[0] if video_urls else '',
+            video_cover=''
+        )
+
+    def _search_page_request(self, keyword, page):
+        """s.weibo.com 一页搜索结果的 (url, 请求参数) ，供 get_many 使用"""
+        headers = dict(self.headers)
+        headers["Accept"] = "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8"
+        headers["Referer"] = "https://s.weibo.com/"
+        for key in ("X-Requested-With", "Sec-Fetch-Dest", "Sec-Fetch-Mode", "Sec-Fetch-Site"):
+            headers.pop(key, None)
+        return f"{self.base_url}?q={quote(keyword)}&page={page}", {'headers': headers}
+
+    def _fetch_search_pages(self, tasks, max_workers=3):
+        """
+        并发请求并解析多页 s.weibo.com 搜索结果（经 get_many，async 传输时使用传输层的线程池）
+
+        参数:
+        - tasks: (关键词, 页码) 列表
+        - max_workers: 并发请求的页数
+
+        返回:
+        - 与 tasks 顺序相同的列表，每项为微博数据列表，请求失败时为 None
+        """
+        responses = self.get_many([self._search_page_request(keyword, page) for keyword, page in tasks],
+                                  max_workers=max_workers)
+        return [self._parse_search_page(response, keyword, page)
+                for (keyword, page), response in zip(tasks, responses)]
+
+    def _parse_search_page(self, response, keyword, page):
+        """
+        解析 s.weibo.com 的一页搜索结果
+
+        参数:
+        - response: 搜索页的响应，请求出错时为异常
+        - keyword: 搜索关键词
+        - page: 页码
+
+        返回:
+        - 微博数据列表，请求失败时返回 None
+        """
+        if isinstance(response, Exception):
+            print(f"请求搜索页 {page} 时出错: {str(response)}")
+            return None
+        if response.status_code != 200:
+            print(f"搜索页 {page} 请求失败，状态码: {response.status_code}")
+            return None
+
+        try:
+            tree = etree.HTML(response.text)
+        except Exception as e:
+            print(f"解析搜索页 {page} 失败: {str(e)}")
+            return None
+        if tree is None:
+            return []
+
+        results = []
+        for card in CARD_XPATH(tree):
+            try:
+                weibo_data = self._parse_search_card(card, keyword)
+            except Exception as e:
+                print(f"解析搜索结果卡片时出错: {str(e)}")
+                continue
+            if weibo_data:
+                results.append(weibo_data)
+        return results
+
+    def search_global(self, keyword, pages=5, start_page=1, download_media=False, max_workers=3):
+        """
+        在 s.weibo.com 全站搜索包含关键词的微博
+
+        参数:
+        - keyword: 搜索关键词
+        - pages: 爬取页数
+        - start_page: 开始爬取的页码
+        - download_media: 是否下载媒体文件
+        - max_workers: 并发请求的页数
+
+        返回:
+        - 搜索结果列表，格式与 search_keyword 相同
+        """
+        self.download_media_enabled = download_media
+        page_numbers = list(range(start_page, start_page + pages))
+        print(f"准备在全站搜索关键词 '{keyword}', 计划爬取 {start_page} 到 {page_numbers[-1] if page_numbers else start_page} 页")
+
+        page_results = self._fetch_search_pages([(keyword, page) for page in page_numbers], max_workers=max_workers)
+
+        # 按页码顺序合并，保证结果稳定
+        results = []
+        for page, weibos in zip(page_numbers, page_results):
+            if weibos is None:
+                continue
+            if not weibos:
+                print(f"搜索页 {page} 没有结果")
+                continue
+            page_results = []
+            for weibo_data in weibos:
+                if weibo_data['weibo_id'] in self.seen_weibos:
+                    continue
+                self.seen_weibos.add(weibo_data['weibo_id'])
+                page_results.append(weibo_data)
+            results.extend(page_results)
+            self._emit_page(page_results)
+
+        print(f"\n全站搜索关键词 '{keyword}' 共找到 {len(results)} 条微博")
+        return results
+
+    def set_cookies(self, cookie_str):
+        """
+        设置Cookie，提高爬取效果
+
+        参数:
+        - cookie_str: Cookie字符串（"k=v; k2=v2" 或 JSON）或字典
+        """
+        if not cookie_str:
+            return
+
+        try:
+            self.cookies = parse_cookie_string(cookie_str)
+            print("Cookie设置成功")
+        except Exception as e:
+            print(f"设置Cookie失败: {str(e)}")
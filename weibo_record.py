@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+微博结果记录
+WeiboRecord 用 __slots__ 存放固定字段，其余字段（content_score、post_link 等）放在按需创建的
+附加字典里；关键词、用户ID、分类等重复率很高的字段会被驻留（sys.intern），所有记录共用同一个字符串对象。
+记录实现了字典接口（get、[]、items 等），原来按字典读写微博的代码无需修改。
+"""
+
+import sys
+from collections.abc import MutableMapping
+
+RECORD_FIELDS = (
+    'weibo_id', 'user_name', 'user_id', 'content', 'publish_time',
+    'reposts_count', 'comments_count', 'attitudes_count', 'source', 'keyword',
+    'image_urls', 'local_image_paths', 'video_url', 'video_cover', 'type',
+)
+INTERNED_FIELDS = frozenset(('user_name', 'user_id', 'source', 'keyword', 'type'))
+_FIELD_SET = frozenset(RECORD_FIELDS)
+_MISSING = object()
+
+
+class WeiboRecord(MutableMapping):
+    __slots__ = RECORD_FIELDS + ('_extra',)
+
+    def __init__(self, data=(), **fields):
+        """
+        创建记录
+
+        参数:
+        - data: 字典或 (字段, 值) 序列
+        - fields: 以关键字参数给出的字段
+        """
+        self._extra = None
+        if data:
+            self.update(data)
+        if fields:
+            self.update(fields)
+
+    def __getitem__(self, key):
+        if key in _FIELD_SET:
+            value = getattr(self, key, _MISSING)
+        elif self._extra is not None:
+            value = self._extra.get(key, _MISSING)
+        else:
+            value = _MISSING
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if key in _FIELD_SET:
+            if key in INTERNED_FIELDS and type(value) is str:
+                value = sys.intern(value)
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        try:
+            if key in _FIELD_SET:
+                delattr(self, key)
+            else:
+                del self._extra[key]
+        except (AttributeError, KeyError, TypeError):
+            raise KeyError(key) from None
+
+    def __iter__(self):
+        for field in RECORD_FIELDS:
+            if hasattr(self, field):
+                yield field
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for field in RECORD_FIELDS if hasattr(self, field)) + len(self._extra or ())
+
+    def __contains__(self, key):
+        if key in _FIELD_SET:
+            return hasattr(self, key)
+        return self._extra is not None and key in self._extra
+
+    def get(self, key, default=None):
+        if key in _FIELD_SET:
+            return getattr(self, key, default)
+        if self._extra is not None:
+            return self._extra.get(key, default)
+        return default
+
+    def __getstate__(self):
+        return self.to_dict()
+
+    def __setstate__(self, state):
+        self._extra = None
+        self.update(state)
+
+    def __repr__(self):
+        return f"WeiboRecord({self.to_dict()!r})"
+
+    def to_dict(self):
+        """转换为普通字典（用于 JSON 序列化等）"""
+        data = {field: getattr(self, field) for field in RECORD_FIELDS if hasattr(self, field)}
+        if self._extra:
+            data.update(self._extra)
+        return data
+
+    def copy(self):
+        """浅拷贝记录，列表字段与原记录共用"""
+        record = WeiboRecord()
+        for field in RECORD_FIELDS:
+            value = getattr(self, field, _MISSING)
+            if value is not _MISSING:
+                setattr(record, field, value)
+        if self._extra:
+            record._extra = dict(self._extra)
+        return record
+
+
+def to_records(items):
+    """
+    把字典列表转换为记录列表，已是 WeiboRecord 的元素原样保留
+
+    参数:
+    - items: 字典或记录的可迭代对象
+
+    返回:
+    - WeiboRecord 列表
+    """
+    return [item if isinstance(item, WeiboRecord) else WeiboRecord(item) for item in items]
+
+
+def records_to_dicts(records):
+    """把记录列表转换为普通字典列表，用于 JSON 序列化"""
+    return [record.to_dict() if isinstance(record, WeiboRecord) else dict(record) for record in records]
+
+
+def records_to_dataframe(records):
+    """
+    按列把记录列表转换为 DataFrame，不为每条记录创建中间字典
+
+    参数:
+    - records: WeiboRecord 或字典的列表
+
+    返回:
+    - pandas.DataFrame，列顺序为各记录字段第一次出现的顺序，缺失值为 NaN
+    """
+    import pandas as pd
+
+    columns = {}
+    for record in records:
+        for key in record:
+            columns.setdefault(key, None)
+    nan = float('nan')
+    return pd.DataFrame({key: [record.get(key, nan) for record in records] for key in columns},
+                        columns=list(columns))
+
+
+def records_from_dataframe(df):
+    """
+    把 DataFrame 的每一行转换为 WeiboRecord
+
+    参数:
+    - df: pandas.DataFrame
+
+    返回:
+    - WeiboRecord 列表
+    """
+    columns = [str(column) for column in df.columns]
+    return [WeiboRecord(zip(columns, row)) for row in df.itertuples(index=False, name=None)]
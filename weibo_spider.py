@@ -1,25 +1,31 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
+"""
+兼容模块：爬虫实现已统一到 weibo_engine.WeiboEngine（使用移动端 container 数据源），
+这里保留爬取娱乐博主并用机器学习分析器筛选的流程
+"""
 
-import requests
 import json
 import time
 import random
 import os
 from datetime import datetime
 from ml_analyzer import MLAnalyzer
-import re
+from weibo_engine import WeiboEngine, normalize_weibo
+from text_cleaner import clean_text
 
-class WeiboSpider:
-    def __init__(self, output_dir="results"):
+class WeiboSpider(WeiboEngine):
+    def __init__(self, output_dir="results", entertainment_users=None):
         """
         初始化微博爬虫
         
         参数:
         - output_dir: 输出目录
+        - entertainment_users: 要爬取的娱乐博主用户ID列表
         """
+        super().__init__(timeline_sources=['container'])
         self.output_dir = output_dir
-        self.seen_weibos = set()
+        self.entertainment_users = list(entertainment_users or [])
         try:
             self.analyzer = MLAnalyzer()
         except Exception:
@@ -34,116 +40,39 @@ class WeiboSpider:
         # Create output directory if it doesn't exist
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
-        
-        # 设置请求头和Cookie
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.110 Safari/537.36',
-            'Accept': 'application/json, text/plain, */*',
-            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-            'Referer': 'https://weibo.com/',
-            'Connection': 'keep-alive',
-            'Cookie': 'alf=02_1750516658; scf=AkWHOAHKVZR4U72tMy8Q9LgjIM7MQMvaHKSwQ04eOAsI2JBgQkQlmfrVVyedYcX4H4xf1lMZmepPJVFN3N841Ao.; SUB=_2A25FK0biDeRhGeFN4lcQ9CvOwjiIHXVmScYqrDV8PUNbmtAbLW_WkW9NQ6CKww8EwXECI8JlmiQpUQKXs8dpOdDq; SUBP=0033WrSXqPxfM725Ws9jqgMF55529P9D9WWeLWqEhZspcsieflC20plM5NHD95QNe0.feKBfeo.XWs4DqcjLPEH81F-ReE-RBEH8SCHWxbHF1CH8SFHFBE-4SEH8SE-4SF-4xntt; WBPSESS=W66fnaoZnYKPDz3Z3SHfiobUNR0t11ESD3A9xqxy8ehc3p8TkmgbC7FjmtozMmYK7QurYzSmlE6O2FLDqKVDAqh-oFLsCLR8CxSj2aBAfc71Qt-4PUU6Ve_iJBaTQAnP-qLHPOmuJ13HfRasQnf_zA==; XSRF-TOKEN=QXhEQujwl5E0gIA29udcRdhn'
-        }
+    
+    def _get_random_delay(self):
+        """生成随机延迟，避免被检测为爬虫"""
+        return random.uniform(1, 3)
     
     def _generate_post_link(self, weibo_id):
         """Generate post link from weibo_id"""
         return f"https://weibo.com/detail/{weibo_id}"
 
-    def _process_weibo_data(self, mblog):
+    def _process_weibo_data(self, mblog, user_id=''):
         """Process raw weibo data into standardized format"""
-        weibo_id = mblog.get('id', '')
-        content = mblog.get('text', '')
-        
-        # 清理内容中的换行符和多余空格
-        content = re.sub(r'\s+', ' ', content.strip())
-        content = self.analyzer.preprocess_text(content)
-        
-        return {
-            'weibo_id': weibo_id,
-            'content': content,
-            'publish_time': mblog.get('created_at', ''),
-            'reposts_count': mblog.get('reposts_count', 0),
-            'comments_count': mblog.get('comments_count', 0),
-            'attitudes_count': mblog.get('attitudes_count', 0),
-            'post_link': self._generate_post_link(weibo_id)
-        }
-
-    def search_keyword(self, user_url, keyword, pages, start_page=1, download_media=False):
-        """Search for weibos containing the keyword"""
-        results = []
-        user_id = self._extract_user_id(user_url)
-        
-        if not user_id:
-            print(f"无法从URL提取用户ID: {user_url}")
-            return results
-            
-        print(f"\n开始搜索用户 {user_id} 的微博，关键词: '{keyword}'")
-        print(f"计划爬取 {pages} 页，从第 {start_page} 页开始")
-        
-        for page in range(start_page, start_page + pages):
-            try:
-                print(f"\n正在爬取第 {page} 页...")
-                response = self._fetch_user_weibos(user_id, page)
-                
-                if not response:
-                    print(f"获取页面 {page} 失败")
-                    continue
-                
-                try:
-                    data = response.json()
-                    weibo_list = data.get('data', {}).get('list', [])
-                    
-                    if not weibo_list:
-                        print(f"页面 {page} 未找到微博内容，可能已到达末页")
-                        break
-                    
-                    for weibo in weibo_list:
-                        content = weibo.get('text_raw', '')
-                        
-                        if keyword.lower() not in content.lower():
-                            continue
-                            
-                        weibo_data = self._process_weibo_data(weibo)
-                        weibo_data['keyword'] = keyword
-                        
-                        if weibo_data['weibo_id'] not in self.seen_weibos:
-                            self.seen_weibos.add(weibo_data['weibo_id'])
-                            results.append(weibo_data)
-                            print(f"找到匹配关键词 '{keyword}' 的微博: {content[:50]}...")
-                
-                except json.JSONDecodeError:
-                    print(f"解析JSON失败，页面 {page}")
-                    continue
-                
-                time.sleep(self._get_random_delay())
-                
-            except Exception as e:
-                print(f"爬取页面 {page} 时出错: {str(e)}")
-                continue
+        weibo_data = normalize_weibo(mblog, user_id or str((mblog.get('user') or {}).get('id', '')))
         
-        print(f"\n在用户 {user_id} 的主页中共找到 {len(results)} 条包含关键词 '{keyword}' 的微博")
-        return results
+        # 清理正文（HTML标签、[表情]、链接、emoji、多余空白）
+        weibo_data['content'] = clean_text(weibo_data['content'], strip_emoji=True)
+        weibo_data['post_link'] = self._generate_post_link(weibo_data['weibo_id'])
+        return weibo_data
 
     def get_entertainment_weibo(self, page=1, count=20):
         """获取娱乐博主的微博"""
         weibo_list = []
+        source = self.timeline_sources[0]
         
         for user_id in self.entertainment_users:
             try:
-                response = self._fetch_user_weibos(user_id, page, count)
+                result = self._request_timeline_page(source, user_id, page)
                 
-                if response and response.status_code == 200:
-                    data = response.json()
+                for mblog in (result[0] if result else [])[:count]:
+                    weibo_data = self._process_weibo_data(mblog, user_id)
                     
-                    if data.get('ok') == 1:
-                        for card in data.get('data', {}).get('cards', []):
-                            if card.get('card_type') == 9:  # 微博类型
-                                mblog = card.get('mblog', {})
-                                weibo_data = self._process_weibo_data(mblog)
-                                
-                                if weibo_data['weibo_id'] not in self.seen_weibos:
-                                    self.seen_weibos.add(weibo_data['weibo_id'])
-                                    weibo_list.append(weibo_data)
+                    if weibo_data['weibo_id'] not in self.seen_weibos:
+                        self.seen_weibos.add(weibo_data['weibo_id'])
+                        weibo_list.append(weibo_data)
                 
                 time.sleep(self._get_random_delay())
                 